@@ -0,0 +1,117 @@
+"""
+Modo por lotes, sin menú: carga uno o más PDFs una sola vez y ejecuta muchas
+consultas leídas de un archivo o de la entrada estándar. Cada resultado se
+escribe como una línea JSON (JSON Lines) con su latencia.
+
+Formato de las consultas (una por línea):
+    {"id": 1, "mode": "exact", "phrase": "count dracula"}
+    {"mode": "flexible", "phrase": "count dracula", "max_intermediate": 3, "pdf": "Dracula.pdf"}
+    {"mode": "multi", "phrases": ["van helsing", "mina"]}
+    {"mode": "heatmap", "top_n": 15, "min_length": 4}
+Una línea que no es JSON se toma como una búsqueda exacta de esa frase.
+
+Uso:
+    python batch.py libro1.pdf libro2.pdf --queries consultas.jsonl --output resultados.jsonl
+"""
+import argparse
+import contextlib
+import json
+import statistics
+import sys
+import time
+from typing import Dict, Any, Iterator, List, TextIO
+from corpus import Corpus, run_query
+
+def read_queries(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """Lee consultas JSON Lines; las líneas vacías o que empiezan con # se ignoran."""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            query = json.loads(line)
+        except json.JSONDecodeError:
+            query = line
+        if not isinstance(query, dict):
+            query = {"mode": "exact", "phrase": str(query)}
+        query.setdefault("id", line_number)
+        yield query
+
+def run_batch(corpus: Corpus, queries: Iterator[Dict[str, Any]], output: TextIO,
+              include_matches: bool = True) -> List[float]:
+    """
+    Ejecuta cada consulta sobre los documentos indicados (o sobre todos) y
+    escribe una línea por consulta y documento. Devuelve las latencias en ms.
+    """
+    latencies = []
+    for query in queries:
+        targets = query.get("pdf") or corpus.names()
+        if isinstance(targets, str):
+            targets = [targets]
+
+        for name in targets:
+            start_time = time.perf_counter()
+            try:
+                result = run_query(corpus.get(name), query)
+            except Exception as e:
+                result = {"mode": query.get("mode", "exact"), "error": str(e)}
+            latency_ms = (time.perf_counter() - start_time) * 1000
+            latencies.append(latency_ms)
+
+            if not include_matches:
+                result.pop("matches", None)
+                for phrase_result in result.get("phrases", {}).values():
+                    phrase_result.pop("matches", None)
+
+            record = {"id": query["id"], "pdf": name, **result, "latency_ms": round(latency_ms, 3)}
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+    return latencies
+
+def print_summary(latencies: List[float], elapsed: float):
+    if not latencies:
+        print("No se ejecutaron consultas", file=sys.stderr)
+        return
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"Consultas: {len(latencies)} en {elapsed:.2f}s "
+          f"({len(latencies) / elapsed if elapsed else 0:.1f} consultas/s) | "
+          f"latencia p50 {statistics.median(ordered):.2f} ms, p95 {p95:.2f} ms, "
+          f"máx {ordered[-1]:.2f} ms", file=sys.stderr)
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Búsquedas por lotes con salida JSON Lines")
+    parser.add_argument("pdfs", nargs="+", help="PDFs a cargar")
+    parser.add_argument("--queries", default="-", help="Archivo de consultas (por defecto, entrada estándar)")
+    parser.add_argument("--output", default="-", help="Archivo de resultados (por defecto, salida estándar)")
+    parser.add_argument("--backend", default="process", choices=("thread", "process"),
+                        help="Backend de extracción")
+    parser.add_argument("--no-cache", action="store_true", help="No usar la caché de texto extraído")
+    parser.add_argument("--summary-only", action="store_true",
+                        help="Omitir las coincidencias y escribir solo los conteos")
+    args = parser.parse_args(argv)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    queries_in = sys.stdin if args.queries == "-" else open(args.queries, encoding="utf-8")
+    try:
+        # Los mensajes de progreso van a stderr para no mezclarse con los resultados
+        with contextlib.redirect_stdout(sys.stderr):
+            corpus = Corpus(backend=args.backend, use_cache=not args.no_cache)
+            for pdf_path in args.pdfs:
+                start_time = time.perf_counter()
+                name = corpus.load(pdf_path)
+                print(f"Cargado {name} en {time.perf_counter() - start_time:.2f}s")
+
+            start_time = time.perf_counter()
+            latencies = run_batch(corpus, read_queries(queries_in), output,
+                                  include_matches=not args.summary_only)
+            print_summary(latencies, time.perf_counter() - start_time)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if queries_in is not sys.stdin:
+            queries_in.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+"""
+Suite de benchmarks reproducible sobre un corpus PDF sintético.
+
+Genera el corpus con corpus_generator (determinista) y mide cada subsistema:
+extracción (por backend), preparación del documento, búsqueda exacta y
+flexible (con índice, desde la caché de consultas y recorriendo el texto con
+hilos o con procesos), mapa de calor de palabras y reportes PDF.
+Por subsistema se registran tiempo, páginas/s, percentiles de latencia de las
+consultas y memoria pico (RSS). Los resultados se escriben en JSON y se
+comparan con una línea base guardada; el programa termina con código 1 si
+alguna métrica empeora más que la tolerancia.
+
+Uso:
+    python benchmarks/benchmark_suite.py [--pages 200] [--words-per-page 400]
+        [--density 2.0] [--seed 0] [--repeat 5] [--output resultados.json]
+        [--baseline benchmarks/baseline.json] [--save-baseline]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Any, Tuple
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from corpus_generator import generate_corpus  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(REPO_DIR, "benchmarks", "baseline.json")
+
+# Empeoramiento relativo permitido antes de marcar una regresión
+TOLERANCE = float(os.environ.get("BENCHMARK_TOLERANCE", 0.25))
+
+# Diferencias absolutas por debajo de estos mínimos se consideran ruido
+MIN_DELTA_MS = 5.0
+MIN_DELTA_MB = 5.0
+
+# Métricas comparadas con la línea base y si un valor mayor es mejor
+COMPARED_METRICS = {
+    "seconds": False,
+    "pages_per_s": True,
+    "p50_ms": False,
+    "p90_ms": False,
+    "p99_ms": False,
+    "peak_rss_mb": False,
+}
+
+RESULTS_VERSION = 1
+
+# --- Memoria ---
+
+def _reset_peak_rss():
+    """
+    Reinicia el pico de memoria del proceso (VmHWM) en Linux para medir cada
+    subsistema por separado. En otros sistemas el pico es el del proceso entero.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+def peak_rss_mb() -> float:
+    """Pico de memoria residente del proceso en MB."""
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def children_peak_rss_mb() -> float:
+    """Pico del mayor proceso hijo terminado (workers del backend de procesos)."""
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_stage(function: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, float], str]:
+    """
+    Ejecuta una etapa con la salida por consola capturada.
+    Devuelve (resultado, {seconds, peak_rss_mb}, salida).
+    """
+    _reset_peak_rss()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    return result, {"seconds": elapsed, "peak_rss_mb": peak_rss_mb()}, output.getvalue()
+
+def best_of(runs: int, function: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, float]]:
+    """Repite una etapa y conserva el menor tiempo (y el mayor pico de memoria)."""
+    best = None
+    for _ in range(max(1, runs)):
+        result, metrics, _ = run_stage(function, *args, **kwargs)
+        if best is None:
+            best = metrics
+        else:
+            best = {"seconds": min(best["seconds"], metrics["seconds"]),
+                    "peak_rss_mb": max(best["peak_rss_mb"], metrics["peak_rss_mb"])}
+    return result, best
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """Percentiles de latencia en milisegundos."""
+    values = np.array(latencies) * 1000
+    return {
+        "queries": len(latencies),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+# --- Subsistemas ---
+
+def bench_extraction(pdf_path: str, pages: int, backends: List[str], runs: int) -> Dict[str, Dict[str, float]]:
+    from text_extractor import extract_document
+
+    results = {}
+    for backend in backends:
+        _, metrics = best_of(runs, extract_document, pdf_path, use_cache=False, backend=backend)
+        metrics["pages_per_s"] = pages / metrics["seconds"]
+        metrics["children_peak_rss_mb"] = children_peak_rss_mb()
+        results[f"extraction_{backend}"] = metrics
+    return results
+
+def bench_queries(document, queries: List[str], search: Callable, repeat: int) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """
+    Ejecuta cada consulta repeat veces, después de una pasada sin medir;
+    devuelve métricas y ocurrencias por consulta.
+    """
+    from match_set import total_count
+
+    latencies = []
+    counts = {}
+    for query in queries:
+        search(document, query)
+
+    def run():
+        for _ in range(repeat):
+            for query in queries:
+                start = time.perf_counter()
+                _, matches = search(document, query)
+                latencies.append(time.perf_counter() - start)
+                counts[query] = total_count(matches)
+
+    _, metrics, _ = run_stage(run)
+    metrics.update(latency_summary(latencies))
+    return metrics, counts
+
+def bench_searches(document, info: Dict[str, Any], repeat: int) -> Dict[str, Dict[str, Any]]:
+    from search_engine import concurrent_search, flexible_search
+    from query_cache import QUERY_CACHE
+
+    phrases = info["phrases"]
+    exact_queries = phrases + [info["frequent_word"], "phrase not in corpus"]
+
+    def flexible(document, phrase):
+        return flexible_search(document, phrase, 2)
+
+    def exact_process(document, phrase):
+        return concurrent_search(document, phrase, backend="process")
+
+    def flexible_process(document, phrase):
+        return flexible_search(document, phrase, 2, backend="process")
+
+    # Las consultas repetidas se medirían contra la caché de resultados: se
+    # desactiva salvo en la etapa que mide justamente los aciertos
+    cache_entries = QUERY_CACHE.max_entries
+    QUERY_CACHE.max_entries = 0
+    QUERY_CACHE.clear()
+    results = {}
+    index, proximity = document.index, document.proximity
+    try:
+        for name, search, queries, kind in (("exact_search", concurrent_search, exact_queries, "exact"),
+                                            ("flexible_search", flexible, phrases, "flexible")):
+            metrics, counts = bench_queries(document, queries, search, repeat)
+            metrics["counts"] = counts
+            metrics["expected"] = info["expected"][kind]
+            results[name] = metrics
+
+        QUERY_CACHE.max_entries = max(cache_entries, len(exact_queries))
+        results["exact_search_cached"], _ = bench_queries(document, exact_queries, concurrent_search, repeat)
+        QUERY_CACHE.max_entries = 0
+        QUERY_CACHE.clear()
+
+        # Las mismas consultas recorriendo el texto, sin índice
+        document.index = document.proximity = None
+        results["exact_search_scan"], _ = bench_queries(document, exact_queries, concurrent_search, 1)
+        results["flexible_search_scan"], _ = bench_queries(document, phrases, flexible, 1)
+        # Workers de procesos sobre el texto en memoria compartida
+        results["exact_search_scan_process"], _ = bench_queries(document, exact_queries, exact_process, 1)
+        results["flexible_search_scan_process"], _ = bench_queries(document, phrases, flexible_process, 1)
+    finally:
+        QUERY_CACHE.max_entries = cache_entries
+        document.index, document.proximity = index, proximity
+        from shared_corpus import release_document, shutdown_executor
+        release_document(document)
+        shutdown_executor()
+    return results
+
+def _report_metrics(metrics: Dict[str, float], output: str) -> Dict[str, float]:
+    found = re.search(r"Reporte generado: (\d+) páginas", output)
+    metrics["pages"] = int(found.group(1)) if found else 0
+    metrics["pages_per_s"] = metrics["pages"] / metrics["seconds"]
+    return metrics
+
+def bench_outputs(document, info: Dict[str, Any], workdir: str) -> Dict[str, Dict[str, float]]:
+    from search_engine import concurrent_search, flexible_search
+    from heatmap import generate_word_frequency_heatmap
+    from pdf_reporter import create_exact_search_pdf_report, create_flexible_pdf_report
+
+    results = {}
+    document.term_table = None
+    _, results["word_heatmap"], _ = run_stage(
+        generate_word_frequency_heatmap, document, output_file=os.path.join(workdir, "word_heatmap.png"))
+
+    # Reporte exacto de la consulta con más coincidencias (la palabra frecuente)
+    phrase = info["frequent_word"]
+    total_words, matches = concurrent_search(document, phrase)
+    _, metrics, output = run_stage(create_exact_search_pdf_report, total_words, matches, phrase,
+                                   os.path.join(workdir, "exact_report.pdf"))
+    results["exact_report"] = _report_metrics(metrics, output)
+
+    phrase = info["phrases"][0]
+    total_words, matches = flexible_search(document, phrase, 2)
+    _, metrics, output = run_stage(create_flexible_pdf_report, total_words, matches, phrase,
+                                   os.path.join(workdir, "flexible_report.pdf"))
+    results["flexible_report"] = _report_metrics(metrics, output)
+    return results
+
+def run_suite(pages: int, words_per_page: int, density: float, seed: int, repeat: int,
+              backends: List[str], workdir: str) -> Dict[str, Any]:
+    from text_extractor import extract_document
+    from normalizer import normalize_document, build_proximity_index
+    from inverted_index import build_index
+
+    pdf_path = os.path.join(workdir, "corpus.pdf")
+    info, metrics, _ = run_stage(generate_corpus, pdf_path, pages, words_per_page, density, seed)
+    print(f"Corpus: {pages} páginas, {info['total_words']:,} palabras "
+          f"({os.path.getsize(pdf_path) / 1e6:.1f} MB) en {metrics['seconds']:.2f}s")
+
+    subsystems = bench_extraction(pdf_path, pages, backends, repeat)
+
+    document, _, _ = run_stage(extract_document, pdf_path, use_cache=False, backend=backends[0])
+
+    def prepare():
+        document.normalized = document.index = document.proximity = None
+        normalize_document(document)
+        build_index(document)
+        build_proximity_index(document)
+
+    _, metrics = best_of(repeat, prepare)
+    metrics["pages_per_s"] = pages / metrics["seconds"]
+    subsystems["preparation"] = metrics
+
+    subsystems.update(bench_searches(document, info, repeat))
+    subsystems.update(bench_outputs(document, info, workdir))
+
+    corpus = {key: value for key, value in info.items() if key != "file"}
+    corpus["size_bytes"] = os.path.getsize(pdf_path)
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "corpus": corpus,
+        "repeat": repeat,
+        "subsystems": subsystems,
+    }
+
+# --- Resultados ---
+
+def print_results(results: Dict[str, Any]):
+    print(f"\n{'Subsistema':<28} {'Tiempo':>10} {'Págs/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'RSS MB':>8}")
+    for name, metrics in results["subsystems"].items():
+        pages_per_s = f"{metrics['pages_per_s']:.1f}" if "pages_per_s" in metrics else "-"
+        p50 = f"{metrics['p50_ms']:.2f}" if "p50_ms" in metrics else "-"
+        p99 = f"{metrics['p99_ms']:.2f}" if "p99_ms" in metrics else "-"
+        print(f"{name:<28} {metrics['seconds']:>9.3f}s {pages_per_s:>10} {p50:>9} {p99:>9} "
+              f"{metrics['peak_rss_mb']:>8.1f}")
+
+    for name in ("exact_search", "flexible_search"):
+        metrics = results["subsystems"].get(name, {})
+        for phrase, expected in metrics.get("expected", {}).items():
+            found = metrics["counts"].get(phrase)
+            if found != expected:
+                print(f"AVISO: {name} '{phrase}': {found} ocurrencias, se plantaron {expected}")
+
+def _is_noise(metric: str, current: Dict[str, float], previous: Dict[str, float]) -> bool:
+    if metric == "pages_per_s":
+        # El rendimiento se juzga por el tiempo del que se deriva
+        metric = "seconds"
+    delta = abs(current[metric] - previous[metric])
+    if metric == "seconds":
+        return delta * 1000 < MIN_DELTA_MS
+    if metric.endswith("_ms"):
+        return delta < MIN_DELTA_MS
+    if metric.endswith("_mb"):
+        return delta < MIN_DELTA_MB
+    return False
+
+def compare_results(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regresiones respecto a la línea base (lista vacía si no hay)."""
+    if baseline.get("corpus") != results["corpus"] or baseline.get("repeat") != results["repeat"]:
+        print("AVISO: la línea base se midió con otro corpus o repeticiones; no se compara")
+        return []
+
+    regressions = []
+    print(f"\nComparación con la línea base del {baseline.get('created', '?')} (tolerancia {tolerance:.0%}):")
+    for name, metrics in results["subsystems"].items():
+        previous_metrics = baseline["subsystems"].get(name)
+        if previous_metrics is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if metric not in metrics or not previous_metrics.get(metric):
+                continue
+            current, previous = metrics[metric], previous_metrics[metric]
+            change = (current - previous) / previous
+            worse = -change if higher_is_better else change
+            if worse > tolerance and not _is_noise(metric, metrics, previous_metrics):
+                regressions.append(f"{name}.{metric}: {previous:.3f} -> {current:.3f} ({change:+.0%})")
+            elif abs(change) > tolerance:
+                print(f"  {name}.{metric}: {previous:.3f} -> {current:.3f} ({change:+.0%})")
+
+    for regression in regressions:
+        print(f"  REGRESIÓN {regression}")
+    if not regressions:
+        print("  Sin regresiones")
+    return regressions
+
+def write_json(path: str, data: Dict[str, Any]):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de extracción, búsqueda y reportes")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--density", type=float, default=2.0,
+                        help="Frases plantadas por cada 1000 palabras")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Repeticiones de cada consulta y de la extracción y preparación")
+    parser.add_argument("--backends", nargs="+", default=["thread", "process", "serial"],
+                        choices=["thread", "process", "serial"])
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Guarda los resultados como nueva línea base")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--workdir", help="Directorio para el corpus y los archivos generados "
+                                          "(por defecto uno temporal que se borra al terminar)")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="pdf_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        results = run_suite(args.pages, args.words_per_page, args.density, args.seed,
+                            args.repeat, args.backends, workdir)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results)
+    write_json(args.output, results)
+    print(f"\nResultados: {os.path.abspath(args.output)}")
+
+    if args.save_baseline:
+        write_json(args.baseline, results)
+        print(f"Línea base guardada: {args.baseline}")
+        sys.exit(0)
+    if not os.path.exists(args.baseline):
+        print(f"No hay línea base en {args.baseline} (use --save-baseline para crearla)")
+        sys.exit(0)
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    sys.exit(1 if compare_results(results, baseline, args.tolerance) else 0)
@@ -0,0 +1,169 @@
+"""
+Generador determinista de corpus PDF para los benchmarks.
+
+Cada corpus queda definido por (páginas, palabras por página, densidad de
+frases, semilla): el mismo juego de parámetros produce siempre el mismo PDF,
+byte a byte. El texto de relleno usa pseudopalabras que nunca coinciden con
+las frases buscadas, así que el número de ocurrencias plantadas es exacto.
+
+Uso:
+    python benchmarks/corpus_generator.py corpus.pdf [--pages 200]
+        [--words-per-page 400] [--density 2.0] [--seed 0]
+"""
+import argparse
+import json
+import random
+from typing import Dict, List, Any, Tuple
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+
+# Frases plantadas (de dos palabras, como pide la búsqueda flexible)
+DEFAULT_PHRASES = ("count dracula", "van helsing", "castle gate")
+
+# Sílabas para formar el vocabulario de relleno
+SYLLABLES = ("ka", "lo", "mi", "ne", "tu", "ra", "so", "vi", "pe", "du", "fa", "ri", "go", "zen", "bal")
+VOCABULARY_SIZE = 400
+
+# Cada FLEXIBLE_EVERY ocurrencias, una se planta con una palabra intermedia
+FLEXIBLE_EVERY = 3
+
+FONT = "Helvetica"
+MAX_FONT_SIZE = 10.0
+MIN_FONT_SIZE = 4.0
+
+def filler_vocabulary(rng: random.Random, phrases: Tuple[str, ...]) -> List[str]:
+    """Pseudopalabras de 2 a 4 sílabas que no aparecen en ninguna frase."""
+    reserved = {word for phrase in phrases for word in phrase.lower().split()}
+    words: List[str] = []
+    seen = set(reserved)
+    while len(words) < VOCABULARY_SIZE:
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+def _sentences(rng: random.Random, vocabulary: List[str], weights: List[float],
+               words_per_page: int) -> List[List[str]]:
+    """Oraciones de relleno (de 6 a 14 palabras) hasta completar la página."""
+    sentences = []
+    remaining = words_per_page
+    while remaining > 0:
+        length = min(remaining, rng.randint(6, 14))
+        sentences.append(rng.choices(vocabulary, weights, k=length))
+        remaining -= length
+    return sentences
+
+def _plant(rng: random.Random, sentence: List[str], phrase_words: List[str],
+           filler: str = None) -> List[str]:
+    """Reemplaza palabras de la oración por la frase (con una intermedia si filler)."""
+    planted = list(phrase_words)
+    if filler is not None:
+        planted.insert(1, filler)
+    if len(planted) >= len(sentence):
+        return planted
+    start = rng.randint(0, len(sentence) - len(planted))
+    return sentence[:start] + planted + sentence[start + len(planted):]
+
+def _wrap(words: List[str], font_size: float, width: float) -> List[str]:
+    lines, current = [], ""
+    for word in words:
+        candidate = f"{current} {word}" if current else word
+        if current and stringWidth(candidate, FONT, font_size) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+def _layout(words: List[str], width: float, height: float) -> Tuple[float, List[str]]:
+    """Tamaño de letra más grande con el que el texto de la página entra en el área."""
+    font_size = MAX_FONT_SIZE
+    while True:
+        lines = _wrap(words, font_size, width)
+        if len(lines) * font_size * 1.2 <= height or font_size <= MIN_FONT_SIZE:
+            return font_size, lines
+        font_size -= 0.5
+
+def generate_corpus(output_file: str, pages: int = 200, words_per_page: int = 400,
+                    phrase_density: float = 2.0, seed: int = 0,
+                    phrases: Tuple[str, ...] = DEFAULT_PHRASES) -> Dict[str, Any]:
+    """
+    Genera el PDF y devuelve su descripción: parámetros, palabras totales,
+    la palabra de relleno más frecuente y las ocurrencias plantadas por frase
+    ('exact' y 'flexible', esta última con una palabra intermedia).
+
+    phrase_density es el número de frases plantadas por cada 1000 palabras.
+    """
+    rng = random.Random(seed)
+    vocabulary = filler_vocabulary(rng, phrases)
+    # Distribución tipo Zipf: unas pocas palabras muy frecuentes
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    expected = {"exact": {phrase: 0 for phrase in phrases},
+                "flexible": {phrase: 0 for phrase in phrases}}
+
+    page_width, page_height = letter
+    margin = inch
+    # invariant=1 omite fechas e identificadores aleatorios del PDF
+    canvas = Canvas(output_file, pagesize=letter, invariant=1, pageCompression=1)
+    carry = 0.0
+    planted = 0
+    total_words = 0
+    for _ in range(pages):
+        sentences = _sentences(rng, vocabulary, weights, words_per_page)
+
+        # Ocurrencias de la página con un acumulador: el total es exacto
+        carry += phrase_density * words_per_page / 1000
+        count = min(int(carry), len(sentences))
+        carry -= int(carry)
+        for index in sorted(rng.sample(range(len(sentences)), count)):
+            phrase = phrases[planted % len(phrases)]
+            flexible = (planted // len(phrases)) % FLEXIBLE_EVERY == FLEXIBLE_EVERY - 1
+            filler = rng.choice(vocabulary) if flexible else None
+            sentences[index] = _plant(rng, sentences[index], phrase.split(), filler)
+            expected["flexible" if flexible else "exact"][phrase] += 1
+            planted += 1
+
+        words = []
+        for sentence in sentences:
+            sentence[0] = sentence[0].capitalize()
+            sentence[-1] += "."
+            words.extend(sentence)
+        total_words += len(words)
+
+        font_size, lines = _layout(words, page_width - 2 * margin, page_height - 2 * margin)
+        text = canvas.beginText(margin, page_height - margin - font_size)
+        text.setFont(FONT, font_size, leading=font_size * 1.2)
+        for line in lines:
+            text.textLine(line)
+        canvas.drawText(text)
+        canvas.showPage()
+    canvas.save()
+
+    return {
+        "file": output_file,
+        "pages": pages,
+        "words_per_page": words_per_page,
+        "phrase_density": phrase_density,
+        "seed": seed,
+        "total_words": total_words,
+        "frequent_word": vocabulary[0],
+        "phrases": list(phrases),
+        "expected": expected,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un corpus PDF sintético y determinista")
+    parser.add_argument("output_file")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--density", type=float, default=2.0,
+                        help="Frases plantadas por cada 1000 palabras")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    info = generate_corpus(args.output_file, args.pages, args.words_per_page, args.density, args.seed)
+    print(json.dumps(info, indent=2, ensure_ascii=False))
@@ -0,0 +1,90 @@
+"""
+Benchmark de arranque: mide con `python -X importtime` cuánto tarda en
+importarse main.py y falla si se supera el presupuesto o si al arrancar se
+cargan dependencias pesadas que solo necesitan algunas opciones del menú.
+
+Uso:
+    python benchmarks/startup_benchmark.py [--runs 5] [--budget-ms 400]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Presupuesto de arranque en milisegundos (puede ajustarse por entorno)
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", 400))
+
+# Módulos que no deben cargarse solo por arrancar el programa
+LAZY_MODULES = ("matplotlib", "reportlab", "PyPDF2")
+
+def measure_import(module: str = "main") -> Tuple[float, Dict[str, int], List[str]]:
+    """
+    Importa el módulo en un intérprete nuevo con -X importtime.
+    Devuelve (tiempo_total_ms, {módulo: tiempo_acumulado_us}, importaciones_directas).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}:\n{result.stderr}")
+
+    cumulative: Dict[str, int] = {}
+    # Python imprime cada módulo después de sus dependencias; la sangría del
+    # nombre (dos espacios por nivel) indica la profundidad
+    pending: List[str] = []
+    direct: List[str] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        try:
+            cumulative[name.strip()] = int(cumulative_us)
+        except ValueError:
+            continue  # Encabezado de la tabla
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == module:
+                direct = pending
+            pending = []
+        elif depth == 1:
+            pending.append(name.strip())
+    return cumulative.get(module, 0) / 1000, cumulative, direct
+
+def run_benchmark(runs: int, budget_ms: float) -> bool:
+    totals: List[float] = []
+    loaded, direct = {}, []
+    for _ in range(runs):
+        total_ms, loaded, direct = measure_import()
+        totals.append(total_ms)
+
+    median_ms = statistics.median(totals)
+    print(f"Arranque (import main): mediana {median_ms:.1f} ms, "
+          f"mín {min(totals):.1f} ms, máx {max(totals):.1f} ms en {runs} ejecuciones")
+
+    print("Módulos más costosos (última ejecución):")
+    for name in sorted(direct, key=loaded.get, reverse=True)[:10]:
+        print(f"  {name:<30} {loaded[name] / 1000:8.1f} ms")
+
+    ok = True
+    eager = sorted({name.split(".")[0] for name in loaded if name.split(".")[0] in LAZY_MODULES})
+    if eager:
+        print(f"ERROR: se cargan al arrancar: {', '.join(eager)}")
+        ok = False
+    if median_ms > budget_ms:
+        print(f"ERROR: el arranque supera el presupuesto de {budget_ms:.0f} ms")
+        ok = False
+    if ok:
+        print(f"OK: dentro del presupuesto de {budget_ms:.0f} ms")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de tiempo de arranque")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+    sys.exit(0 if run_benchmark(args.runs, args.budget_ms) else 1)
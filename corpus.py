@@ -0,0 +1,142 @@
+import os
+import threading
+from typing import Dict, Any, List
+from document import Document
+from text_extractor import extract_document
+from normalizer import normalize_document, build_proximity_index
+from inverted_index import build_index
+from search_engine import concurrent_search, flexible_search, DEFAULT_MAX_INTERMEDIATE
+from multi_phrase import multi_phrase_search
+from fuzzy import fuzzy_search
+from term_frequency import build_term_table
+from match_set import total_count
+from search_limits import deadline_after, truncation
+from tracing import span
+
+QUERY_MODES = ("exact", "flexible", "fuzzy", "multi", "heatmap")
+
+def load_document(pdf_path: str, backend: str = "process", use_cache: bool = True) -> Document:
+    """
+    Extrae el PDF y prepara todo lo que usan las búsquedas: texto normalizado,
+    índice posicional e índice de proximidad.
+    """
+    return prepare_document(extract_document(pdf_path, use_cache=use_cache, backend=backend))
+
+def prepare_document(document: Document) -> Document:
+    """Normaliza el documento ya extraído y construye sus dos índices."""
+    with span("normalize", "preparation", chars=len(document)):
+        normalize_document(document)
+    with span("build_index", "preparation"):
+        build_index(document)
+    with span("build_proximity_index", "preparation"):
+        build_proximity_index(document)
+    return document
+
+def serialize_match(match: Dict[str, Any]) -> Dict[str, Any]:
+    """Coincidencia con tipos compatibles con JSON."""
+    return {key: list(value) if isinstance(value, tuple) else value for key, value in match.items()}
+
+def run_query(document: Document, query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Ejecuta una consulta sobre un documento cargado y devuelve un resultado
+    serializable a JSON.
+
+    query: {"mode": "exact" | "flexible" | "fuzzy" | "multi" | "heatmap",
+            "phrase": str, "phrases": [str], "max_intermediate": int, "max_distance": int,
+            "top_n": int, "min_length": int, "output_file": str,
+            "max_results": int, "timeout_ms": float}
+
+    max_results y timeout_ms limitan las búsquedas exacta y flexible; el
+    resultado indica en "truncated" si se cortó y por qué (None si está
+    completo).
+    """
+    mode = query.get("mode", "exact")
+    result: Dict[str, Any] = {"mode": mode}
+    max_results = query.get("max_results")
+    max_results = None if max_results is None else int(max_results)
+    timeout_ms = query.get("timeout_ms")
+    deadline = None if timeout_ms is None else deadline_after(float(timeout_ms) / 1000)
+
+    if mode == "exact":
+        total_words, matches = concurrent_search(document, query["phrase"], max_results=max_results,
+                                                 deadline=deadline)
+        result.update(phrase=query["phrase"], total_words=total_words,
+                      count=total_count(matches), truncated=truncation(matches),
+                      matches=[serialize_match(m) for m in matches])
+    elif mode == "flexible":
+        max_intermediate = int(query.get("max_intermediate", DEFAULT_MAX_INTERMEDIATE))
+        total_words, matches = flexible_search(document, query["phrase"], max_intermediate,
+                                               max_results=max_results, deadline=deadline)
+        result.update(phrase=query["phrase"], max_intermediate=max_intermediate,
+                      total_words=total_words, count=total_count(matches), truncated=truncation(matches),
+                      matches=[serialize_match(m) for m in matches])
+    elif mode == "fuzzy":
+        max_distance = query.get("max_distance")
+        max_distance = None if max_distance is None else int(max_distance)
+        total_words, matches = fuzzy_search(document, query["phrase"], max_distance)
+        result.update(phrase=query["phrase"], max_distance=max_distance,
+                      total_words=total_words, count=total_count(matches),
+                      matches=[serialize_match(m) for m in matches])
+    elif mode == "multi":
+        total_words, results = multi_phrase_search(document, query["phrases"])
+        result.update(total_words=total_words, phrases={
+            phrase: {"count": total_count(matches),
+                     "matches": [serialize_match(m) for m in matches]}
+            for phrase, matches in results.items()
+        })
+    elif mode == "heatmap":
+        table = document.term_table if document.term_table is not None else build_term_table(document)
+        top_n = int(query.get("top_n", 20))
+        min_length = int(query.get("min_length", 4))
+        result.update(top_n=top_n, min_length=min_length,
+                      terms=[list(term) for term in table.top_terms(top_n, min_length)])
+        if query.get("output_file"):
+            # La imagen solo se dibuja si se pide (carga matplotlib)
+            from heatmap import generate_word_frequency_heatmap
+            result["output_file"] = generate_word_frequency_heatmap(
+                document, top_n=top_n, output_file=query["output_file"], min_length=min_length)
+    else:
+        raise ValueError(f"Modo de consulta desconocido: {mode} (use {', '.join(QUERY_MODES)})")
+
+    return result
+
+class Corpus:
+    """Documentos cargados en memoria, identificados por nombre."""
+
+    def __init__(self, backend: str = "process", use_cache: bool = True):
+        self.backend = backend
+        self.use_cache = use_cache
+        self.documents: Dict[str, Document] = {}
+        self._lock = threading.Lock()
+
+    def name_for(self, pdf_path: str) -> str:
+        """Nombre del archivo, o la ruta completa si ya hay otro con ese nombre."""
+        name = os.path.basename(pdf_path)
+        existing = self.documents.get(name)
+        if existing is not None and os.path.abspath(existing.source) != os.path.abspath(pdf_path):
+            return os.path.abspath(pdf_path)
+        return name
+
+    def load(self, pdf_path: str) -> str:
+        """Carga (o recarga) un PDF y devuelve su nombre dentro del corpus."""
+        document = load_document(pdf_path, self.backend, self.use_cache)
+        with self._lock:
+            name = self.name_for(pdf_path)
+            self.documents[name] = document
+        return name
+
+    def unload(self, name: str) -> bool:
+        with self._lock:
+            return self.documents.pop(name, None) is not None
+
+    def get(self, name: str) -> Document:
+        document = self.documents.get(name)
+        if document is None:
+            raise LookupError(f"Documento no cargado: {name}")
+        return document
+
+    def names(self) -> List[str]:
+        return list(self.documents)
+
+    def __len__(self) -> int:
+        return len(self.documents)
@@ -0,0 +1,120 @@
+import os
+from array import array
+from bisect import bisect_right
+from typing import List, Tuple, Iterator
+
+PAGE_SEPARATOR = "\n"
+
+def chunk_ranges(total_pages: int, chunk_size: int = None) -> List[Tuple[int, int]]:
+    """Divide las páginas en rangos, con tamaño de chunk automático."""
+    # Tamaño de chunk automático (aprox. 10 páginas por núcleo)
+    if chunk_size is None:
+        cpu_count = os.cpu_count() or 1
+        chunk_size = max(10, total_pages // (cpu_count * 2))
+
+    return [
+        (start, min(start + chunk_size, total_pages))
+        for start in range(0, total_pages, chunk_size)
+    ]
+
+class TextView:
+    """
+    Vista de un tramo [start, end) del texto de un documento.
+    No copia el texto hasta que se lee con str() o .text.
+    """
+    __slots__ = ("document", "start", "end")
+
+    def __init__(self, document: "Document", start: int, end: int):
+        self.document = document
+        self.start = start
+        self.end = end
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __str__(self) -> str:
+        return self.document.text[self.start:self.end]
+
+    @property
+    def text(self) -> str:
+        return str(self)
+
+    def __repr__(self) -> str:
+        return f"TextView({self.start}, {self.end})"
+
+class Document:
+    """
+    Texto extraído de un PDF guardado una sola vez, con la tabla de
+    desplazamientos donde empieza cada página.
+    """
+
+    def __init__(self, text: str, page_starts: array, source: str = None, chunk_size: int = None):
+        self.text = text
+        self.page_starts = page_starts
+        self.source = source
+        self.chunk_size = chunk_size
+        # Texto limpio compartido por todas las búsquedas (ver normalizer.normalize_document)
+        self.normalized = None
+        # Índice posicional opcional (ver inverted_index.build_index)
+        self.index = None
+        # Palabras tokenizadas para la búsqueda flexible (ver normalizer.build_proximity_index)
+        self.proximity = None
+        # Frecuencias de palabras para el mapa de calor (ver term_frequency.build_term_table)
+        self.term_table = None
+        # Índice de trigramas del vocabulario para la búsqueda tolerante a errores (ver fuzzy.build_fuzzy_index)
+        self.fuzzy = None
+
+    @classmethod
+    def from_pages(cls, pages: List[str], source: str = None, chunk_size: int = None) -> "Document":
+        """Construye el documento a partir del texto de cada página."""
+        page_starts = array('q')
+        offset = 0
+        for page in pages:
+            page_starts.append(offset)
+            offset += len(page) + len(PAGE_SEPARATOR)
+        return cls(PAGE_SEPARATOR.join(pages), page_starts, source, chunk_size)
+
+    @property
+    def num_pages(self) -> int:
+        return len(self.page_starts)
+
+    def page_bounds(self, page_num: int) -> Tuple[int, int]:
+        """Devuelve (inicio, fin) de la página en el texto, sin el separador."""
+        start = self.page_starts[page_num]
+        if page_num + 1 < len(self.page_starts):
+            end = self.page_starts[page_num + 1] - len(PAGE_SEPARATOR)
+        else:
+            end = len(self.text)
+        return start, end
+
+    def page(self, page_num: int) -> TextView:
+        """Vista del texto de una página."""
+        return TextView(self, *self.page_bounds(page_num))
+
+    def pages_range(self, start_page: int, end_page: int) -> TextView:
+        """Vista del texto de las páginas [start_page, end_page)."""
+        if start_page >= end_page:
+            return TextView(self, 0, 0)
+        return TextView(self, self.page_bounds(start_page)[0], self.page_bounds(end_page - 1)[1])
+
+    def page_of(self, offset: int) -> int:
+        """Página que contiene el desplazamiento dado (búsqueda binaria)."""
+        return max(0, bisect_right(self.page_starts, offset) - 1)
+
+    def iter_pages(self) -> Iterator[Tuple[int, TextView]]:
+        """Itera (número_página, vista) sobre todas las páginas."""
+        for page_num in range(self.num_pages):
+            yield page_num, self.page(page_num)
+
+    def chunk_ranges(self, chunk_size: int = None) -> List[Tuple[int, int]]:
+        return chunk_ranges(self.num_pages, chunk_size or self.chunk_size)
+
+    def chunks(self, chunk_size: int = None) -> List[Tuple[int, int, str]]:
+        """Chunks (inicio, fin, texto) de páginas, en el formato de process_chunk_search."""
+        return [
+            (start, end, str(self.pages_range(start, end)))
+            for start, end in self.chunk_ranges(chunk_size)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.text)
@@ -0,0 +1,246 @@
+"""
+Búsqueda tolerante a errores (OCR, guiones de fin de línea): cada palabra de
+la frase admite un número acotado de ediciones (distancia de Levenshtein).
+
+El índice trabaja sobre el vocabulario del documento y no sobre el texto: un
+índice de trigramas propone los términos parecidos a cada palabra, solo esos
+se verifican con la distancia de edición, y después se buscan sus
+posiciones en los ids de palabras ya tokenizados (ver proximity.WordTokens).
+"""
+import numpy as np
+from bisect import bisect_right
+from typing import List, Tuple, Dict, Set
+from document import Document
+from normalizer import build_proximity_index
+from search_engine import clean_text
+from proximity import WORD_PATTERN, flexible_context
+from match_set import MatchSet
+from tracing import span
+from query_cache import cached_search
+
+# Relleno de los trigramas: marca el inicio y el fin de la palabra
+PAD = "$$"
+# Largo mínimo de cada trozo de una palabra cortada ("drac ula")
+MIN_FRAGMENT = 2
+
+def trigrams(word: str) -> Set[str]:
+    padded = PAD + word + PAD
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def auto_distance(word: str) -> int:
+    """Ediciones permitidas según el largo: 0 hasta 2 letras, 1 hasta 5 y 2 desde 6."""
+    if len(word) <= 2:
+        return 0
+    return 1 if len(word) <= 5 else 2
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Distancia de Levenshtein entre a y b, o limit + 1 si la supera (corte temprano)."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+def prefix_distance(fragment: str, word: str, limit: int) -> int:
+    """Menor distancia de edición entre fragment y algún prefijo de word (acotada como edit_distance)."""
+    previous = list(range(len(word) + 1))
+    for i, char_a in enumerate(fragment, 1):
+        current = [i]
+        for j, char_b in enumerate(word, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(min(previous), limit + 1)
+
+class FuzzyIndex:
+    """
+    Índice de trigramas del vocabulario de un Document (texto limpio en
+    minúsculas). Cada trigrama apunta a los ids de las palabras que lo
+    contienen; los ids son los mismos que usa el índice de proximidad.
+    """
+
+    def __init__(self, proximity):
+        self.proximity = proximity
+        self.tokens = tokens = proximity.tokens
+        self.words = [None] * len(tokens.vocabulary)
+        for word, word_id in tokens.vocabulary.items():
+            self.words[word_id] = word
+        self.lengths = np.array([len(word) for word in self.words], dtype=np.int32)
+
+        postings: Dict[str, List[int]] = {}
+        for word_id, word in enumerate(self.words):
+            for gram in trigrams(word):
+                postings.setdefault(gram, []).append(word_id)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def _by_gram(self, gram: str) -> np.ndarray:
+        return self.postings.get(gram, np.empty(0, dtype=np.int32))
+
+    def similar_terms(self, word: str, max_distance: int) -> Dict[int, int]:
+        """
+        Ids del vocabulario a distancia <= max_distance de word, con su
+        distancia. Filtro de conteo: cada edición destruye a lo sumo 3
+        trigramas distintos de word, así que un término a distancia k
+        comparte al menos len(trigramas(word)) - 3k de ellos.
+        """
+        if max_distance == 0:
+            word_id = self.tokens.vocabulary.get(word)
+            return {} if word_id is None else {word_id: 0}
+
+        grams = trigrams(word)
+        threshold = len(grams) - 3 * max_distance
+        if threshold > 0:
+            lists = [self._by_gram(gram) for gram in grams]
+            counts = np.bincount(np.concatenate(lists), minlength=len(self.words))
+            candidates = np.flatnonzero(counts >= threshold)
+        else:
+            # Palabra corta: el filtro no descarta nada y se usa solo el largo
+            candidates = np.arange(len(self.words))
+        candidates = candidates[np.abs(self.lengths[candidates] - len(word)) <= max_distance]
+
+        similar = {}
+        for word_id in candidates.tolist():
+            distance = edit_distance(self.words[word_id], word, max_distance)
+            if distance <= max_distance:
+                similar[word_id] = distance
+        return similar
+
+    def split_positions(self, word: str, max_distance: int, similar: Dict[int, int] = None) -> np.ndarray:
+        """
+        Ordinales i donde las palabras i e i + 1 unidas están a distancia
+        <= max_distance de word (palabras cortadas por un guion de fin de
+        línea u OCR, como "drac ula"). El primer trozo debe empezar con la
+        primera letra de word y el segundo terminar con la última, y ninguno
+        puede ser por sí solo un término parecido (similar): "do dracula" no
+        es un corte de "dracula".
+        """
+        if similar is None:
+            similar = self.similar_terms(word, max_distance)
+        if len(word) < 2 * MIN_FRAGMENT:
+            return np.empty(0, dtype=np.int64)
+        longest = len(word) - MIN_FRAGMENT + max_distance
+
+        def fragments(gram: str, reference: str, reverse: bool) -> np.ndarray:
+            ids = self._by_gram(gram)
+            ids = ids[(self.lengths[ids] >= MIN_FRAGMENT) & (self.lengths[ids] <= longest)]
+            return np.array([
+                word_id for word_id in ids.tolist()
+                if prefix_distance(self.words[word_id][::-1] if reverse else self.words[word_id],
+                                   reference, max_distance) <= max_distance
+            ], dtype=np.int32)
+
+        excluded = np.fromiter(similar, dtype=np.int32)
+        heads = np.setdiff1d(fragments(PAD + word[0], word, reverse=False), excluded)
+        tails = np.setdiff1d(fragments(word[-1] + PAD, word[::-1], reverse=True), excluded)
+        if len(heads) == 0 or len(tails) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        ids = self.tokens.ids
+        positions = np.flatnonzero(np.isin(ids[:-1], heads) & np.isin(ids[1:], tails))
+        # Verificar cada par distinto una sola vez
+        accepted: Dict[Tuple[int, int], bool] = {}
+        keep = []
+        for position in positions.tolist():
+            pair = (int(ids[position]), int(ids[position + 1]))
+            if pair not in accepted:
+                joined = self.words[pair[0]] + self.words[pair[1]]
+                accepted[pair] = edit_distance(joined, word, max_distance) <= max_distance
+            if accepted[pair]:
+                keep.append(position)
+        return np.array(keep, dtype=np.int64)
+
+    def phrase_spans(self, words: List[str], distances: List[int]) -> List[Tuple[int, int]]:
+        """
+        (primera_palabra, última_palabra) de cada aparición de la frase con
+        sus palabras consecutivas, cada una a su distancia permitida (o
+        cortada en dos). De izquierda a derecha y sin solapamiento.
+        """
+        ids = self.tokens.ids
+        n = len(ids)
+        starts = np.empty(0, dtype=np.int64)
+        current = np.empty(0, dtype=np.int64)
+        for j, (word, max_distance) in enumerate(zip(words, distances)):
+            terms = self.similar_terms(word, max_distance)
+            similar = np.fromiter(terms, dtype=np.int32)
+            splits = self.split_positions(word, max_distance, terms)
+            if j == 0:
+                single = np.flatnonzero(np.isin(ids, similar))
+                starts = np.concatenate((single, splits))
+                current = np.concatenate((single + 1, splits + 2))
+                continue
+            # Estados (inicio, siguiente palabra): avanzar una palabra o un par cortado
+            valid = current < n
+            starts, current = starts[valid], current[valid]
+            single = np.isin(ids[current], similar)
+            split = np.isin(current, splits)
+            starts = np.concatenate((starts[single], starts[split]))
+            current = np.concatenate((current[single] + 1, current[split] + 2))
+
+        spans = []
+        next_free = 0
+        for start, end in sorted(zip(starts.tolist(), current.tolist())):
+            if start < next_free:
+                continue
+            spans.append((start, end - 1))
+            next_free = end
+        return spans
+
+    def search(self, phrase: str, max_distance: int = None) -> Tuple[int, MatchSet]:
+        """
+        Coincidencias de la frase con hasta max_distance ediciones por palabra
+        (por defecto, según el largo de cada palabra; ver auto_distance),
+        incluidas las exactas, con 50 caracteres de contexto como la búsqueda
+        flexible. max_distance limita la distancia automática.
+        """
+        proximity = self.proximity
+        total_words = sum(proximity.chunk_words)
+        all_matches = MatchSet(flexible=True)
+        doc_id = all_matches.add_source(self.tokens.text)
+
+        words = WORD_PATTERN.findall(clean_text(phrase.lower()))
+        if not words:
+            return total_words, all_matches
+        distances = [
+            auto_distance(word) if max_distance is None else min(max_distance, auto_distance(word))
+            for word in words
+        ]
+
+        chunk_starts = [start for start, _ in proximity.chunk_bounds]
+        for first, last in self.phrase_spans(words, distances):
+            match_start = int(self.tokens.starts[first])
+            match_end = int(self.tokens.ends[last])
+            chunk = max(0, bisect_right(chunk_starts, match_start) - 1)
+            chunk_start, chunk_end = proximity.chunk_bounds[chunk]
+            if match_end > chunk_end:
+                # Las búsquedas no cruzan límites de chunk
+                continue
+            start_pos, end_pos, flags = flexible_context(match_start, match_end, chunk_start, chunk_end)
+            all_matches.add(doc_id, start_pos, end_pos, [match_start - start_pos],
+                            match_start, match_end - match_start,
+                            proximity.page_of(match_start), proximity.chunk_ranges[chunk], flags)
+        return total_words, all_matches
+
+def build_fuzzy_index(document: Document) -> FuzzyIndex:
+    """Construye el índice de trigramas del documento y lo deja asociado a él."""
+    if document.proximity is None:
+        build_proximity_index(document)
+    document.fuzzy = FuzzyIndex(document.proximity)
+    return document.fuzzy
+
+def fuzzy_search(document: Document, phrase: str, max_distance: int = None) -> Tuple[int, MatchSet]:
+    """Búsqueda tolerante a errores; el índice se construye en la primera consulta."""
+    with span("fuzzy_search", "search", phrase=phrase, max_distance=max_distance) as search_span:
+        if document.fuzzy is None:
+            with span("build_fuzzy_index", "preparation"):
+                build_fuzzy_index(document)
+        (total_words, matches), cached = cached_search(document, ("fuzzy", phrase, max_distance),
+                                                       document.fuzzy.search, phrase, max_distance)
+        search_span.set(words=total_words, matches=len(matches), cached=cached)
+    return total_words, matches
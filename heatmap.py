@@ -1,11 +1,17 @@
-import matplotlib.pyplot as plt
 import numpy as np
-import re
-from collections import Counter
 import os
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Union
+from document import Document
+from term_frequency import build_term_table
+from match_set import MatchSet
+from tracing import span
 
-def generate_word_frequency_heatmap(pages: List[Tuple[int, str]], 
+def _pyplot():
+    """Importa matplotlib solo al dibujar (es la dependencia más lenta de cargar)."""
+    import matplotlib.pyplot as plt
+    return plt
+
+def generate_word_frequency_heatmap(pages: Union[Document, List[Tuple[int, str]]], 
                                  top_n: int = 20, 
                                  output_file: str = "word_heatmap.png",
                                  min_length: int = 4):
@@ -13,21 +19,20 @@ def generate_word_frequency_heatmap(pages: List[Tuple[int, str]],
     Genera un mapa de calor de palabras frecuentes (longitud >= min_length)
     
     Args:
-        pages: Lista de (número_página, texto)
+        pages: Document o lista de (número_página, texto)
         top_n: Top N palabras a mostrar
         output_file: Archivo de salida
         min_length: Longitud mínima de palabras a considerar
     """
-    # 1. Extraer y filtrar palabras
-    all_text = ' '.join([page[1] for page in pages]).lower()
-    words = [
-        word for word in re.findall(r'\b\w+\b', all_text)
-        if len(word) >= min_length and not word.isnumeric()
-    ]
+    # 1. Tabla de frecuencias (se calcula una vez por Document y se reutiliza)
+    if isinstance(pages, Document) and pages.term_table is not None:
+        table = pages.term_table
+    else:
+        with span("term_table", "heatmap"):
+            table = build_term_table(pages)
     
-    # 2. Contar frecuencias
-    word_counts = Counter(words)
-    top_words = word_counts.most_common(top_n)
+    # 2. Filtrar y elegir las más frecuentes
+    top_words = table.top_terms(top_n, min_length)
     
     if not top_words:
         print("No se encontraron palabras que cumplan los criterios")
@@ -37,23 +42,25 @@ def generate_word_frequency_heatmap(pages: List[Tuple[int, str]],
     words, counts = zip(*top_words)  # Separar palabras y conteos
     
     # 4. Crear visualización
-    plt.figure(figsize=(14, 6))
-    plt.imshow([counts], cmap='YlOrRd', aspect='auto')
-    
-    # 5. Personalización
-    plt.colorbar(label='Frecuencia')
-    plt.xticks(np.arange(len(words)), words, rotation=45, ha='right')
-    plt.yticks([])
-    plt.title(f'Top {top_n} Palabras Más Frecuentes (≥{min_length} letras)')
-    
-    # 6. Añadir valores
-    for i, count in enumerate(counts):
-        plt.text(i, 0, str(count), ha='center', va='center', 
-                color='white' if count > max(counts)*0.7 else 'black')
-    
-    plt.tight_layout()
-    plt.savefig(output_file, dpi=120, bbox_inches='tight')
-    plt.close()
+    with span("word_heatmap_render", "heatmap", terms=len(words), top_n=top_n, output_file=output_file):
+        plt = _pyplot()
+        plt.figure(figsize=(14, 6))
+        plt.imshow([counts], cmap='YlOrRd', aspect='auto')
+    
+        # 5. Personalización
+        plt.colorbar(label='Frecuencia')
+        plt.xticks(np.arange(len(words)), words, rotation=45, ha='right')
+        plt.yticks([])
+        plt.title(f'Top {top_n} Palabras Más Frecuentes (≥{min_length} letras)')
+    
+        # 6. Añadir valores
+        for i, count in enumerate(counts):
+            plt.text(i, 0, str(count), ha='center', va='center', 
+                    color='white' if count > max(counts)*0.7 else 'black')
+    
+        plt.tight_layout()
+        plt.savefig(output_file, dpi=120, bbox_inches='tight')
+        plt.close()
     
     return os.path.abspath(output_file)
 
@@ -67,12 +74,16 @@ def generate_pdf_frequency_heatmap(search_results: List[Dict[str, Any]],
         output_file: Archivo de salida para el heatmap
     """
     # Procesar datos para el heatmap
-    pdf_counts = {}
-    for result in search_results:
-        pdf_name = result['pdf_name']
-        if pdf_name not in pdf_counts:
-            pdf_counts[pdf_name] = 0
-        pdf_counts[pdf_name] += result['count']
+    if isinstance(search_results, MatchSet):
+        # Conteos directos de los arreglos, sin construir las coincidencias
+        pdf_counts = search_results.counts_by_document()
+    else:
+        pdf_counts = {}
+        for result in search_results:
+            pdf_name = result['pdf_name']
+            if pdf_name not in pdf_counts:
+                pdf_counts[pdf_name] = 0
+            pdf_counts[pdf_name] += result['count']
     
     if not pdf_counts:
         print("No hay datos para generar el heatmap")
@@ -84,22 +95,24 @@ def generate_pdf_frequency_heatmap(search_results: List[Dict[str, Any]],
     counts_matrix = [counts]  # Matriz 1xN para el heatmap
     
     # Crear visualización (manteniendo el mismo estilo)
-    plt.figure(figsize=(14, 6))
-    heatmap = plt.imshow(counts_matrix, cmap='YlOrRd', aspect='auto')
-    
-    # Personalización (igual que tu heatmap actual)
-    plt.colorbar(heatmap, label='Número de coincidencias')
-    plt.xticks(np.arange(len(pdf_names)), pdf_names, rotation=45, ha='right')
-    plt.yticks([])
-    plt.title('Coincidencias de frases aproximadas por PDF')
-    
-    # Añadir valores en las celdas
-    for i, count in enumerate(counts):
-        plt.text(i, 0, str(count), ha='center', va='center', 
-                color='white' if count > max(counts)*0.7 else 'black')
-    
-    plt.tight_layout()
-    plt.savefig(output_file, dpi=120, bbox_inches='tight')
-    plt.close()
+    with span("pdf_heatmap_render", "heatmap", files=len(pdf_names), output_file=output_file):
+        plt = _pyplot()
+        plt.figure(figsize=(14, 6))
+        heatmap = plt.imshow(counts_matrix, cmap='YlOrRd', aspect='auto')
+    
+        # Personalización (igual que tu heatmap actual)
+        plt.colorbar(heatmap, label='Número de coincidencias')
+        plt.xticks(np.arange(len(pdf_names)), pdf_names, rotation=45, ha='right')
+        plt.yticks([])
+        plt.title('Coincidencias de frases aproximadas por PDF')
+    
+        # Añadir valores en las celdas
+        for i, count in enumerate(counts):
+            plt.text(i, 0, str(count), ha='center', va='center', 
+                    color='white' if count > max(counts)*0.7 else 'black')
+    
+        plt.tight_layout()
+        plt.savefig(output_file, dpi=120, bbox_inches='tight')
+        plt.close()
     
     return os.path.abspath(output_file)
\ No newline at end of file
@@ -0,0 +1,127 @@
+import re
+import numpy as np
+from bisect import bisect_left, bisect_right
+from typing import List, Tuple, Dict
+from document import Document
+from search_engine import clean_text, sentence_spans, phrase_pattern
+from match_set import MatchSet
+from normalizer import normalize_document
+from search_limits import SearchLimits, mark_truncated
+
+# Mismos caracteres que conserva clean_text: palabras y signos de puntuación sueltos
+TOKEN_PATTERN = re.compile(r'\w+|[.,;!?]')
+
+class PositionalIndex:
+    """
+    Índice invertido posicional sobre el texto limpio de un Document.
+    Cada token (en minúsculas) apunta a un arreglo compacto con sus posiciones
+    (ordinal del token); las frases exactas se resuelven intersectando listas.
+    El texto, los límites de chunk y los fines de oración provienen del
+    documento normalizado, que se comparte con las demás búsquedas.
+    """
+
+    def __init__(self, document: Document):
+        self.document = document
+        normalized = normalize_document(document)
+        self.chunk_ranges = normalized.chunk_ranges
+        self.text = normalized.text
+        self.chunk_bounds = normalized.chunk_bounds
+        self.chunk_words = normalized.chunk_words
+        self.total_words = normalized.total_words
+        self.sentence_ends = normalized.sentence_ends
+        self.page_of = normalized.page_of
+
+        # Tokenización única: ids enteros y desplazamiento de cada token
+        vocabulary: Dict[str, int] = {}
+        token_ids = []
+        token_starts = []
+        for match in TOKEN_PATTERN.finditer(self.text):
+            token = match.group().casefold()
+            token_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+            token_starts.append(match.start())
+
+        self.vocabulary = vocabulary
+        self.token_starts = np.array(token_starts, dtype=np.int64)
+        self.token_ids = ids = np.array(token_ids, dtype=np.int32)
+
+        # Listas de posiciones: vistas de un único arreglo ordenado por token
+        order = np.argsort(ids, kind='stable').astype(np.int64)
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(ids, minlength=len(vocabulary)))))
+        self._order = order
+        self._bounds = bounds
+
+    def postings(self, token: str) -> np.ndarray:
+        """Posiciones (ordinales) donde aparece el token."""
+        token_id = self.vocabulary.get(token.casefold())
+        if token_id is None:
+            return np.empty(0, dtype=np.int64)
+        return self._order[self._bounds[token_id]:self._bounds[token_id + 1]]
+
+    def phrase_candidates(self, clean_phrase: str) -> np.ndarray:
+        """
+        Desplazamientos en el texto limpio donde la secuencia de tokens de la
+        frase aparece de forma consecutiva (antes de verificar con la regex).
+        """
+        tokens = TOKEN_PATTERN.findall(clean_phrase)
+        if not tokens:
+            return np.empty(0, dtype=np.int64)
+
+        lists = [self.postings(token) for token in tokens]
+        # Empezar por la lista más corta para reducir las intersecciones
+        rarest = min(range(len(lists)), key=lambda i: len(lists[i]))
+        candidates = lists[rarest] - rarest
+        for i, posting in enumerate(lists):
+            if i == rarest or len(candidates) == 0:
+                continue
+            candidates = np.intersect1d(candidates, posting - i, assume_unique=True)
+
+        return self.token_starts[candidates[candidates >= 0]]
+
+    def search(self, phrase: str, limits: SearchLimits = None) -> Tuple[int, MatchSet]:
+        """
+        Búsqueda exacta equivalente a concurrent_search sobre el Document.
+        Solo se leen las oraciones que contienen candidatos, y las
+        coincidencias se guardan como desplazamientos sobre el texto.
+        Los límites se revisan antes de cada chunk con candidatos; si la
+        búsqueda se corta, solo cuentan las palabras hasta el último chunk
+        verificado.
+        """
+        all_matches = MatchSet()
+        all_matches.add_source(self.text)
+        clean_phrase = ' '.join(clean_text(phrase).split())
+        if not clean_phrase:
+            return self.total_words, all_matches
+
+        pattern = phrase_pattern(clean_phrase)
+        candidates = self.phrase_candidates(clean_phrase).tolist()
+
+        chunk_starts = [start for start, _ in self.chunk_bounds]
+        i = 0
+        searched = 0  # chunks hasta el último con candidatos ya verificado
+        while i < len(candidates):
+            reason = limits.stop_reason(len(all_matches)) if limits is not None else None
+            if reason is not None:
+                return sum(self.chunk_words[:searched]), mark_truncated(all_matches, reason, limits)
+            chunk = bisect_right(chunk_starts, candidates[i]) - 1
+            chunk_start, chunk_end = self.chunk_bounds[chunk]
+            j = bisect_left(candidates, chunk_end, i)
+            self._chunk_matches(all_matches, chunk, pattern, candidates[i:j])
+            searched = chunk + 1
+            i = max(j, i + 1)
+
+        return self.total_words, mark_truncated(all_matches, None, limits)
+
+    def _chunk_matches(self, matches: MatchSet, chunk: int, pattern: re.Pattern,
+                       candidates: List[int]):
+        """Verifica los candidatos de un chunk y agrega sus oraciones a matches."""
+        chunk_start, chunk_end = self.chunk_bounds[chunk]
+        pages = self.chunk_ranges[chunk]
+        for sentence_start, sentence_end, positions in sentence_spans(
+                self.text, chunk_start, chunk_end, pattern, candidates, self.sentence_ends):
+            matches.add(0, sentence_start, sentence_end, positions,
+                        page=self.page_of(sentence_start + positions[0]), pages=pages)
+
+def build_index(document: Document) -> PositionalIndex:
+    """Construye el índice del documento y lo deja asociado a él."""
+    document.index = PositionalIndex(document)
+    return document.index
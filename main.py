@@ -1,39 +1,52 @@
-from text_extractor import extract_text_in_chunks
-from search_engine import concurrent_search, flexible_search
+from corpus import load_document
+from search_engine import concurrent_search, flexible_search, DEFAULT_MAX_INTERMEDIATE
 from user import get_user_choice, get_search_phrase, get_pdf_path
-from heatmap import generate_word_frequency_heatmap
-from multi_pdf_searcher import process_multi_pdf_flexible_search
-from user import get_user_choice, get_search_phrase, get_pdf_path, get_multiple_pdf_paths
+from multi_phrase import multi_phrase_search
+from match_set import total_count
+from tracing import traced_action
+from query_cache import QUERY_CACHE
+from search_limits import CancelToken, truncation
+from user import get_user_choice, get_search_phrase, get_pdf_path, get_multiple_pdf_paths, get_multiple_phrases, get_max_intermediate, get_max_distance
 
 import os
 import time
+from collections import Counter
 
-from pdf_reporter import create_exact_search_pdf_report
+def report_truncation(matches):
+    if truncation(matches) is not None:
+        print(f"Búsqueda interrumpida ({truncation(matches)}): se reportan {len(matches)} coincidencias parciales")
 
-def process_exact_search(page_chunks, pages):
+def process_exact_search(document):
     phrase = get_search_phrase("Ingrese la frase exacta que desea buscar: ")
-    print(f"\nBuscando frase exacta: '{phrase}'...")
+    print(f"\nBuscando frase exacta: '{phrase}'... (Ctrl+C para detener)")
     start_time = time.time()
-    total_words, matches = concurrent_search(page_chunks, phrase)
+    # Ctrl+C detiene la búsqueda y se reporta lo encontrado hasta ese momento
+    cancel = CancelToken()
+    with cancel.on_interrupt():
+        total_words, matches = concurrent_search(document, phrase, cancel=cancel)
+    report_truncation(matches)
     
     print("Generando reporte PDF...")
+    from pdf_reporter import create_exact_search_pdf_report
     report_file = create_exact_search_pdf_report(total_words, matches, phrase)
     
     print("\n=== RESULTADOS ===")
     print(f"Tiempo: {time.time() - start_time:.2f}s")
     print(f"Palabras analizadas: {total_words:,}")
-    print(f"Ocurrencias de '{phrase}': {sum(m['count'] for m in matches)}")
+    print(f"Ocurrencias de '{phrase}': {total_count(matches)}")
+    print(QUERY_CACHE.summary())
     print(f"Reporte PDF generado: {os.path.abspath(report_file)}")
     
     # Abrir el PDF automáticamente si es posible
     if report_file and os.path.exists(report_file):
         os.system(f'xdg-open "{report_file}"')
 
-def process_heatmap(pages):
+def process_heatmap(document):
     print("\nGenerando mapa de calor...")
     start_time = time.time()
+    from heatmap import generate_word_frequency_heatmap
     heatmap_file = generate_word_frequency_heatmap(
-        pages, 
+        document, 
         top_n=15,
         min_length=4
     )
@@ -45,52 +58,124 @@ def process_heatmap(pages):
     if heatmap_file and os.path.exists(heatmap_file):
         os.system(f'xdg-open "{heatmap_file}"')
 
-from pdf_reporter import create_flexible_pdf_report
+def process_flexible_search(document):
+    max_intermediate = get_max_intermediate(DEFAULT_MAX_INTERMEDIATE)
+    phrase = get_search_phrase(f"Ingrese la frase que desea buscar (puede tener hasta {max_intermediate} palabras intermedias entre términos): ")
+    print(f"\nBuscando frase flexible: '{phrase}'... (Ctrl+C para detener)")
+    start_time = time.time()
+    cancel = CancelToken()
+    with cancel.on_interrupt():
+        total_words, matches = flexible_search(document, phrase, max_intermediate, cancel=cancel)
+    report_truncation(matches)
+    
+    print("Generando reporte PDF...")
+    from pdf_reporter import create_flexible_pdf_report
+    report_file = create_flexible_pdf_report(total_words, matches, phrase, max_intermediate=max_intermediate)
+    
+    print("\n=== RESULTADOS ===")
+    print(f"Tiempo: {time.time() - start_time:.2f}s")
+    print(f"Palabras analizadas: {total_words:,}")
+    print(f"Ocurrencias flexibles de '{phrase}': {total_count(matches)}")
+    print(QUERY_CACHE.summary())
+    print(f"Reporte PDF generado: {os.path.abspath(report_file)}")
+    
+    if report_file and os.path.exists(report_file):
+        os.system(f'xdg-open "{report_file}"')
+
+def process_multi_phrase_search(document):
+    phrases = get_multiple_phrases()
+    print(f"\nBuscando {len(phrases)} frases exactas en una sola pasada...")
+    start_time = time.time()
+    total_words, results = multi_phrase_search(document, phrases)
+    
+    print("Generando reporte PDF...")
+    from pdf_reporter import create_multi_phrase_pdf_report
+    report_file = create_multi_phrase_pdf_report(total_words, results)
+    
+    print("\n=== RESULTADOS ===")
+    print(f"Tiempo: {time.time() - start_time:.2f}s")
+    print(f"Palabras analizadas: {total_words:,}")
+    for phrase, matches in results.items():
+        print(f"Ocurrencias de '{phrase}': {total_count(matches)}")
+    print(f"Reporte PDF generado: {os.path.abspath(report_file)}")
+    
+    if report_file and os.path.exists(report_file):
+        os.system(f'xdg-open "{report_file}"')
 
-def process_flexible_search(page_chunks, pages):
-    phrase = get_search_phrase("Ingrese la frase que desea buscar (puede tener hasta 3 palabras intermedias entre términos): ")
-    print(f"\nBuscando frase flexible: '{phrase}'...")
+def process_fuzzy_search(document):
+    max_distance = get_max_distance()
+    phrase = get_search_phrase("Ingrese la frase que desea buscar (se toleran errores de OCR y palabras cortadas): ")
+    print(f"\nBuscando frase tolerante a errores: '{phrase}'...")
     start_time = time.time()
-    total_words, matches = flexible_search(page_chunks, phrase)
+    from fuzzy import fuzzy_search
+    total_words, matches = fuzzy_search(document, phrase, max_distance)
     
     print("Generando reporte PDF...")
-    report_file = create_flexible_pdf_report(total_words, matches, phrase)
+    from pdf_reporter import create_fuzzy_pdf_report
+    report_file = create_fuzzy_pdf_report(total_words, matches, phrase, max_distance=max_distance)
     
     print("\n=== RESULTADOS ===")
     print(f"Tiempo: {time.time() - start_time:.2f}s")
     print(f"Palabras analizadas: {total_words:,}")
-    print(f"Ocurrencias flexibles de '{phrase}': {sum(m['count'] for m in matches)}")
+    print(f"Ocurrencias aproximadas de '{phrase}': {total_count(matches)}")
+    for variant, count in Counter(match['original'] for match in matches).most_common(10):
+        print(f"  '{variant}': {count}")
+    print(QUERY_CACHE.summary())
     print(f"Reporte PDF generado: {os.path.abspath(report_file)}")
     
     if report_file and os.path.exists(report_file):
         os.system(f'xdg-open "{report_file}"')
 
 
+# Las dependencias pesadas (matplotlib, reportlab, PyPDF2) se importan dentro
+# de la opción que las usa, para que el programa arranque rápido.
+
 def main():
     pdf_path = get_pdf_path()
     
     # Extraer texto una sola vez al inicio
     print("\n=== Procesando libro (esto puede tomar unos segundos)... ===")
-    page_chunks = extract_text_in_chunks(pdf_path)
-    pages = [(chunk[0], chunk[2]) for chunk in page_chunks]
+    with traced_action("load_document"):
+        document = load_document(pdf_path, backend="process")
     print("=== Libro procesado y listo para búsquedas ===")
     
     while True:
         choice = get_user_choice()
         
         if choice == "1":
-            process_exact_search(page_chunks, pages)
+            with traced_action("exact_search"):
+                process_exact_search(document)
         elif choice == "2":
-            process_flexible_search(page_chunks, pages)
+            with traced_action("flexible_search"):
+                process_flexible_search(document)
         elif choice == "3":
-            process_heatmap(pages)
+            with traced_action("heatmap"):
+                process_heatmap(document)
         elif choice == "4":
             pdf_paths = get_multiple_pdf_paths()
-            process_multi_pdf_flexible_search(pdf_paths)
+            from multi_pdf_searcher import process_multi_pdf_flexible_search
+            with traced_action("multi_pdf_flexible_search"):
+                process_multi_pdf_flexible_search(pdf_paths)
         elif choice == "5":
+            with traced_action("multi_phrase_search"):
+                process_multi_phrase_search(document)
+        elif choice == "6":
+            pdf_paths = get_multiple_pdf_paths()
+            from multi_pdf_searcher import process_multi_pdf_phrase_search
+            with traced_action("multi_pdf_phrase_search"):
+                process_multi_pdf_phrase_search(pdf_paths)
+        elif choice == "7":
+            with traced_action("fuzzy_search"):
+                process_fuzzy_search(document)
+        elif choice == "8":
+            pdf_paths = get_multiple_pdf_paths()
+            from multi_pdf_searcher import process_multi_pdf_ranked_search
+            with traced_action("multi_pdf_ranked_search"):
+                process_multi_pdf_ranked_search(pdf_paths)
+        elif choice == "9":
             print("\nSaliendo del programa...")
             break
         else:
-            print("\nOpción no válida. Por favor, seleccione 1-5.")
+            print("\nOpción no válida. Por favor, seleccione 1-9.")
 if __name__ == "__main__":
     main()
\ No newline at end of file
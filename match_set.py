@@ -0,0 +1,249 @@
+import copy
+from array import array
+from collections.abc import Sequence
+from typing import List, Dict, Any, Iterable, Iterator, Tuple, Union
+
+# Banderas de contexto recortado (búsqueda flexible): "..." antes y/o después
+ELLIPSIS_BEFORE = 1
+ELLIPSIS_AFTER = 2
+
+class _Source:
+    """
+    Texto al que apuntan los desplazamientos de las coincidencias de un documento.
+    Si no hay un texto compartido (p. ej. en búsquedas por streaming) los
+    contextos se acumulan en un búfer propio del documento.
+    """
+    __slots__ = ("text", "name", "path", "_parts", "_length")
+
+    def __init__(self, text: str = None, name: str = None, path: str = None):
+        self.text = text
+        self.name = name
+        self.path = path
+        self._parts: List[str] = None if text is not None else []
+        self._length = 0
+
+    def append(self, text: str) -> int:
+        """Agrega texto al búfer y devuelve su desplazamiento."""
+        offset = self._length
+        self._parts.append(text)
+        self._length += len(text)
+        self.text = None
+        return offset
+
+    def get_text(self) -> str:
+        if self.text is None:
+            self.text = ''.join(self._parts)
+            self._parts = [self.text]
+        return self.text
+
+class MatchSet(Sequence):
+    """
+    Coincidencias guardadas como arreglos paralelos tipados: documento,
+    desplazamientos del contexto y de la coincidencia, página y rango de
+    páginas del chunk. Los contextos apuntan al texto del documento, y los
+    diccionarios de siempre ('paragraph', 'count', 'positions', 'page', ...)
+    solo se crean al leer cada coincidencia.
+
+    flexible indica el formato de búsqueda flexible (con 'original' y contexto
+    con "..."); si no, el de búsqueda exacta (oración completa). truncated es
+    la razón por la que una búsqueda devolvió resultados parciales (ver
+    search_limits), o None si están completos.
+    """
+
+    def __init__(self, flexible: bool = False):
+        self.flexible = flexible
+        self.truncated: str = None
+        self.sources: List[_Source] = []
+        self.doc_ids = array('i')
+        self.context_starts = array('q')
+        self.context_ends = array('q')
+        self.match_starts = array('q')
+        self.match_lengths = array('i')
+        self.pages = array('i')
+        self.first_pages = array('i')
+        self.last_pages = array('i')
+        self.flags = array('b')
+        self.position_index = array('q', [0])
+        self.positions = array('i')
+
+    # --- Construcción ---
+
+    def add_source(self, text: str = None, name: str = None, path: str = None) -> int:
+        """Registra un documento; text es el texto al que apuntarán los desplazamientos."""
+        self.sources.append(_Source(text, name, path))
+        return len(self.sources) - 1
+
+    def add(self, doc_id: int, context_start: int, context_end: int, positions: List[int],
+            match_start: int = None, match_length: int = 0, page: int = -1,
+            pages: Tuple[int, int] = None, flags: int = 0):
+        """
+        Agrega una coincidencia cuyo contexto es text[context_start:context_end]
+        del documento; positions son relativas al inicio del contexto.
+        """
+        self.doc_ids.append(doc_id)
+        self.context_starts.append(context_start)
+        self.context_ends.append(context_end)
+        self.match_starts.append(context_start + positions[0] if match_start is None else match_start)
+        self.match_lengths.append(match_length)
+        self.pages.append(-1 if page is None else page)
+        first_page, last_page = pages if pages is not None else (-1, -1)
+        self.first_pages.append(first_page)
+        self.last_pages.append(last_page)
+        self.flags.append(flags)
+        self.positions.extend(positions)
+        self.position_index.append(len(self.positions))
+
+    def add_match(self, doc_id: int, match: Dict[str, Any]):
+        """
+        Agrega una coincidencia ya construida como diccionario, copiando su
+        contexto al búfer del documento (que no debe tener texto compartido).
+        """
+        source = self.sources[doc_id]
+        context_start = source.append(match['paragraph'])
+        context_end = context_start + len(match['paragraph'])
+        match_start, match_length = context_start, 0
+        if self.flexible:
+            match_length = len(match['original'])
+            match_start = source.append(match['original'])
+        pages = match.get('pages')
+        self.add(doc_id, context_start, context_end, match['positions'], match_start, match_length,
+                 match.get('page', -1), pages)
+
+    def extend(self, other: Union["MatchSet", Iterable[Dict[str, Any]]]):
+        """Agrega las coincidencias de otro MatchSet (o de diccionarios sueltos)."""
+        if not isinstance(other, MatchSet):
+            doc_id = self.add_source()
+            for match in other:
+                self.add_match(doc_id, match)
+            return
+
+        base = len(self.sources)
+        self.sources.extend(other.sources)
+        position_base = len(self.positions)
+        self.doc_ids.extend(doc_id + base for doc_id in other.doc_ids)
+        self.context_starts.extend(other.context_starts)
+        self.context_ends.extend(other.context_ends)
+        self.match_starts.extend(other.match_starts)
+        self.match_lengths.extend(other.match_lengths)
+        self.pages.extend(other.pages)
+        self.first_pages.extend(other.first_pages)
+        self.last_pages.extend(other.last_pages)
+        self.flags.extend(other.flags)
+        self.positions.extend(other.positions)
+        self.position_index.extend(index + position_base for index in other.position_index[1:])
+
+    def named(self, name: str, path: str = None) -> "MatchSet":
+        """
+        Copia con todas las fuentes asociadas al archivo name/path, sin
+        modificar esta (que puede estar compartida, p. ej. en la caché de
+        consultas). La copia comparte los arreglos y los textos.
+        """
+        named = copy.copy(self)
+        named.sources = [_Source(source.get_text(), name, path) for source in self.sources]
+        return named
+
+    def truncate(self, count: int):
+        """Conserva solo las primeras count coincidencias."""
+        if count >= len(self):
+            return
+        del self.positions[self.position_index[count]:]
+        del self.position_index[count + 1:]
+        for values in (self.doc_ids, self.context_starts, self.context_ends, self.match_starts,
+                       self.match_lengths, self.pages, self.first_pages, self.last_pages, self.flags):
+            del values[count:]
+
+    # --- Lectura ---
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("índice de coincidencia fuera de rango")
+        return self.match(index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self.match(i)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (MatchSet, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def match_count(self, index: int) -> int:
+        """'count' de una coincidencia."""
+        return self.position_index[index + 1] - self.position_index[index]
+
+    def total_count(self) -> int:
+        """Ocurrencias totales (suma de 'count') sin construir diccionarios."""
+        return len(self.positions)
+
+    def source(self, index: int) -> _Source:
+        return self.sources[self.doc_ids[index]]
+
+    def match(self, index: int) -> Dict[str, Any]:
+        """Construye el diccionario de la coincidencia (mismo formato que antes)."""
+        source = self.source(index)
+        text = source.get_text()
+        context = text[self.context_starts[index]:self.context_ends[index]]
+        flags = self.flags[index]
+        if flags & ELLIPSIS_BEFORE:
+            context = "..." + context
+        if flags & ELLIPSIS_AFTER:
+            context = context + "..."
+
+        match = {'paragraph': context}
+        if self.flexible:
+            match_start = self.match_starts[index]
+            match['original'] = text[match_start:match_start + self.match_lengths[index]]
+        match['count'] = self.match_count(index)
+        match['positions'] = self.positions[self.position_index[index]:self.position_index[index + 1]].tolist()
+
+        first_page, last_page = self.first_pages[index], self.last_pages[index]
+        if first_page >= 0:
+            match['page_range'] = f"{first_page}-{last_page}"
+            match['pages'] = (first_page, last_page)
+        if self.pages[index] >= 0:
+            match['page'] = self.pages[index]
+        if source.name is not None:
+            match['pdf_name'] = source.name
+            match['pdf_path'] = source.path
+        return match
+
+    def counts_by_document(self) -> Dict[str, int]:
+        """Ocurrencias por nombre de documento, sin construir diccionarios."""
+        counts: Dict[str, int] = {}
+        for i, doc_id in enumerate(self.doc_ids):
+            name = self.sources[doc_id].name
+            counts[name] = counts.get(name, 0) + self.match_count(i)
+        return counts
+
+    def by_document(self) -> Iterator[Tuple[str, Iterator[Dict[str, Any]]]]:
+        """Agrupa las coincidencias por documento, en orden de primera aparición."""
+        groups: Dict[str, List[int]] = {}
+        for i, doc_id in enumerate(self.doc_ids):
+            groups.setdefault(self.sources[doc_id].name, []).append(i)
+        for name, indices in groups.items():
+            yield name, (self.match(i) for i in indices)
+
+    def nbytes(self) -> int:
+        """Memoria de los arreglos (sin contar los textos compartidos)."""
+        arrays = (self.doc_ids, self.context_starts, self.context_ends, self.match_starts,
+                  self.match_lengths, self.pages, self.first_pages, self.last_pages, self.flags,
+                  self.position_index, self.positions)
+        return sum(len(values) * values.itemsize for values in arrays)
+
+    def __repr__(self) -> str:
+        kind = "flexible" if self.flexible else "exacta"
+        return f"MatchSet({len(self)} coincidencias, búsqueda {kind}, {len(self.sources)} documentos)"
+
+def total_count(matches: Iterable[Dict[str, Any]]) -> int:
+    """Suma de 'count' de una lista de coincidencias o de un MatchSet."""
+    if isinstance(matches, MatchSet):
+        return matches.total_count()
+    return sum(m['count'] for m in matches)
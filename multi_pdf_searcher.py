@@ -1,65 +1,41 @@
-from text_extractor import extract_text_in_chunks
-from search_engine import flexible_search
-from pdf_reporter import create_multi_pdf_flexible_report
+from search_engine import DEFAULT_MAX_INTERMEDIATE
+from pdf_reporter import create_multi_pdf_flexible_report, create_multi_phrase_pdf_report, create_ranked_pdf_report
 import os
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any, Tuple
-from text_extractor import get_optimal_workers
+from typing import List
+from shard_index import ShardedCorpus
+from ranking import ranked_search, DEFAULT_TOP_K
+from match_set import MatchSet, total_count
 from heatmap import generate_pdf_frequency_heatmap
+from user import get_multiple_phrases, get_max_intermediate
 
+# Índice de la sesión: los fragmentos que quedan residentes en memoria se
+# reutilizan en las búsquedas siguientes
+_corpus: ShardedCorpus = None
 
-def process_single_pdf_flexible(pdf_path: str, phrase: str) -> Tuple[str, int, List[Dict[str, Any]]]:
-    """Procesa un solo PDF con búsqueda flexible y devuelve resultados"""
-    if not os.path.exists(pdf_path):
-        print(f"\nEl archivo {pdf_path} no existe, omitiendo...")
-        return (pdf_path, 0, [])
-    
-    try:
-        print(f"\nProcesando: {os.path.basename(pdf_path)}...")
-        page_chunks = extract_text_in_chunks(pdf_path)
-        pdf_words, matches = flexible_search(page_chunks, phrase)
-        
-        # Añadir información del archivo a cada coincidencia
-        for match in matches:
-            match['pdf_name'] = os.path.basename(pdf_path)
-            match['pdf_path'] = pdf_path
-        
-        print(f"Procesado: {os.path.basename(pdf_path)} - {len(matches)} coincidencias flexibles")
-        return (pdf_path, pdf_words, matches)
-        
-    except Exception as e:
-        print(f"Error procesando {pdf_path}: {str(e)}")
-        return (pdf_path, 0, [])
+def session_corpus() -> ShardedCorpus:
+    global _corpus
+    if _corpus is None:
+        _corpus = ShardedCorpus()
+    return _corpus
 
 
 def process_multi_pdf_flexible_search(pdf_paths: List[str]):
-    phrase = input("Ingrese la frase que desea buscar (puede tener hasta 3 palabras intermedias): ")
+    max_intermediate = get_max_intermediate(DEFAULT_MAX_INTERMEDIATE)
+    phrase = input(f"Ingrese la frase que desea buscar (puede tener hasta {max_intermediate} palabras intermedias): ")
     print(f"\nBuscando frase flexible: '{phrase}' en {len(pdf_paths)} archivos PDF...")
     
     start_time = time.time()
-    all_results = []
-    total_words = 0
-    
-    # Configurar concurrencia para múltiples PDFs
-    max_workers = min(get_optimal_workers(), len(pdf_paths)) if len(pdf_paths) > 1 else 1
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Enviar todos los PDFs a procesar concurrentemente
-        futures = {
-            executor.submit(process_single_pdf_flexible, pdf_path, phrase): pdf_path 
-            for pdf_path in pdf_paths
-        }
-        
-        for future in as_completed(futures):
-            pdf_path, pdf_words, matches = future.result()
-            total_words += pdf_words
-            all_results.extend(matches)
+    # Solo se procesan los PDFs nuevos o modificados; el resto se lee del índice
+    corpus = session_corpus()
+    corpus.sync(pdf_paths)
+    total_words, all_results = corpus.flexible_search(phrase, max_intermediate, pdf_paths)
     
     # Generar reportes si hay resultados
     if all_results:
         print("\nGenerando reporte PDF consolidado...")
-        report_file = create_multi_pdf_flexible_report(total_words, all_results, phrase)
+        report_file = create_multi_pdf_flexible_report(total_words, all_results, phrase,
+                                                       max_intermediate=max_intermediate)
         
         print("\nGenerando mapa de calor...")
         heatmap_file = generate_pdf_frequency_heatmap(all_results)
@@ -67,7 +43,7 @@ def process_multi_pdf_flexible_search(pdf_paths: List[str]):
         print("\n=== RESULTADOS FINALES ===")
         print(f"Tiempo total: {time.time() - start_time:.2f}s")
         print(f"Total de palabras analizadas: {total_words:,}")
-        print(f"Total de ocurrencias flexibles de '{phrase}': {sum(m['count'] for m in all_results)}")
+        print(f"Total de ocurrencias flexibles de '{phrase}': {all_results.total_count()}")
         print(f"Reporte PDF generado: {os.path.abspath(report_file)}")
         print(f"Mapa de calor generado: {os.path.abspath(heatmap_file)}")
         
@@ -77,4 +53,69 @@ def process_multi_pdf_flexible_search(pdf_paths: List[str]):
         if heatmap_file and os.path.exists(heatmap_file):
             os.system(f'xdg-open "{heatmap_file}"')
     else:
-        print("\nNo se encontraron coincidencias flexibles en ninguno de los archivos PDF")
\ No newline at end of file
+        print("\nNo se encontraron coincidencias flexibles en ninguno de los archivos PDF")
+
+
+def process_multi_pdf_ranked_search(pdf_paths: List[str], k: int = DEFAULT_TOP_K):
+    max_intermediate = get_max_intermediate(DEFAULT_MAX_INTERMEDIATE)
+    phrase = input(f"Ingrese la frase que desea buscar (puede tener hasta {max_intermediate} palabras intermedias): ")
+    print(f"\nBuscando los {k} mejores resultados de '{phrase}' en {len(pdf_paths)} archivos PDF...")
+    
+    start_time = time.time()
+    corpus = session_corpus()
+    corpus.sync(pdf_paths)
+    # Solo se conservan los k mejores pasajes; los documentos que no pueden
+    # superarlos no se llegan a cargar
+    total_words, results, scores = ranked_search(corpus, phrase, k, max_intermediate, pdf_paths)
+    
+    if results:
+        print("\nGenerando reporte PDF...")
+        report_file = create_ranked_pdf_report(total_words, results, scores, phrase,
+                                               max_intermediate=max_intermediate)
+        
+        print("\n=== MEJORES RESULTADOS ===")
+        for number, (match, score) in enumerate(zip(results, scores), start=1):
+            print(f"{number:>3}. [{score:.2f}] {match['pdf_name']}, página {match['page'] + 1}: {match['original']}")
+        print(f"Tiempo total: {time.time() - start_time:.2f}s")
+        print(f"Total de palabras analizadas: {total_words:,}")
+        print(f"Reporte PDF generado: {os.path.abspath(report_file)}")
+        
+        if report_file and os.path.exists(report_file):
+            os.system(f'xdg-open "{report_file}"')
+    else:
+        print("\nNo se encontraron coincidencias en ninguno de los archivos PDF")
+
+
+def process_multi_pdf_phrase_search(pdf_paths: List[str]):
+    phrases = get_multiple_phrases()
+    print(f"\nBuscando {len(phrases)} frases exactas en {len(pdf_paths)} archivos PDF...")
+    
+    start_time = time.time()
+    corpus = session_corpus()
+    corpus.sync(pdf_paths)
+    total_words, all_results = corpus.phrase_search(phrases, pdf_paths)
+    
+    all_matches = MatchSet()
+    for matches in all_results.values():
+        all_matches.extend(matches)
+    if all_matches:
+        print("\nGenerando reporte PDF consolidado...")
+        report_file = create_multi_phrase_pdf_report(total_words, all_results, "multi_pdf_phrase_search_report.pdf")
+        
+        print("\nGenerando mapa de calor...")
+        heatmap_file = generate_pdf_frequency_heatmap(all_matches)
+        
+        print("\n=== RESULTADOS FINALES ===")
+        print(f"Tiempo total: {time.time() - start_time:.2f}s")
+        print(f"Total de palabras analizadas: {total_words:,}")
+        for phrase, matches in all_results.items():
+            print(f"Ocurrencias de '{phrase}': {total_count(matches)}")
+        print(f"Reporte PDF generado: {os.path.abspath(report_file)}")
+        print(f"Mapa de calor generado: {os.path.abspath(heatmap_file)}")
+        
+        if report_file and os.path.exists(report_file):
+            os.system(f'xdg-open "{report_file}"')
+        if heatmap_file and os.path.exists(heatmap_file):
+            os.system(f'xdg-open "{heatmap_file}"')
+    else:
+        print("\nNo se encontraron coincidencias exactas en ninguno de los archivos PDF")
\ No newline at end of file
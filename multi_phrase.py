@@ -0,0 +1,172 @@
+import numpy as np
+from collections import deque
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Any, Hashable, Sequence, Iterator
+from text_extractor import get_optimal_workers
+from document import Document
+from search_engine import (Chunks, clean_text, clean_pages, match_candidates, page_at_offset, sentence_ends,
+                           search_chunk_traced, phrase_pattern)
+from inverted_index import TOKEN_PATTERN
+
+class AhoCorasick:
+    """
+    Autómata de Aho–Corasick sobre secuencias de símbolos (aquí, tokens).
+    Encuentra todas las ocurrencias de todos los patrones en una sola pasada.
+    """
+
+    def __init__(self, patterns: List[Sequence[Hashable]]):
+        self.patterns = patterns
+        self.goto: List[Dict[Hashable, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for symbol in pattern:
+                next_state = self.goto[state].get(symbol)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][symbol] = next_state
+                state = next_state
+            if pattern:
+                self.output[state].append(index)
+
+        # Enlaces de fallo por recorrido en anchura
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for symbol, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and symbol not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(symbol, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def iter_matches(self, symbols: Iterator[Hashable]) -> Iterator[Tuple[int, int]]:
+        """Genera (índice_del_último_símbolo, índice_del_patrón) por cada ocurrencia."""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for i, symbol in enumerate(symbols):
+            while state and symbol not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(symbol, 0)
+            for index in output[state]:
+                yield i, index
+
+class PhraseSet:
+    """Frases exactas compiladas en un único autómata de tokens."""
+
+    def __init__(self, phrases: List[str]):
+        # Frases únicas, conservando el orden en que se ingresaron
+        self.phrases = list(dict.fromkeys(phrases))
+        clean_phrases = [' '.join(clean_text(phrase).split()) for phrase in self.phrases]
+        self.patterns = [
+            phrase_pattern(clean_phrase) if clean_phrase else None
+            for clean_phrase in clean_phrases
+        ]
+        token_sequences = [
+            tuple(token.casefold() for token in TOKEN_PATTERN.findall(clean_phrase))
+            for clean_phrase in clean_phrases
+        ]
+        self.lengths = [len(tokens) for tokens in token_sequences]
+        self.automaton = AhoCorasick(token_sequences)
+
+    def scan(self, text: str, start: int, end: int,
+             ends: np.ndarray = None) -> List[List[Tuple[int, Dict[str, Any]]]]:
+        """
+        Recorre text[start:end] una sola vez y devuelve, para cada frase,
+        sus coincidencias (desplazamiento, coincidencia) agrupadas por oración.
+        """
+        tokens = list(TOKEN_PATTERN.finditer(text, start, end))
+        candidates: List[List[int]] = [[] for _ in self.phrases]
+        symbols = (token.group().casefold() for token in tokens)
+        for last, index in self.automaton.iter_matches(symbols):
+            candidates[index].append(tokens[last - self.lengths[index] + 1].start())
+
+        if ends is None and any(candidates):
+            ends = sentence_ends(text, start, end)
+        return [
+            match_candidates(text, start, end, pattern, positions, ends) if positions else []
+            for pattern, positions in zip(self.patterns, candidates)
+        ]
+
+def _tag_matches(found: List[Tuple[int, Dict[str, Any]]], start_page: int, end_page: int,
+                 page_of=None) -> List[Dict[str, Any]]:
+    matches = []
+    for position, match in found:
+        match['page_range'] = f"{start_page}-{end_page}"
+        match['pages'] = (start_page, end_page)
+        if page_of is not None:
+            match['page'] = page_of(position)
+        matches.append(match)
+    return matches
+
+def process_chunk_multi_search(chunk: Tuple[int, int, str],
+                               phrase_set: PhraseSet) -> Tuple[int, List[List[Dict[str, Any]]]]:
+    """Busca todas las frases en un chunk (inicio, fin, texto) con una sola pasada."""
+    start_page, end_page, text = chunk
+    cleaned_text = clean_text(text)
+    word_count = len(cleaned_text.split())
+    found = phrase_set.scan(cleaned_text, 0, len(cleaned_text))
+    return word_count, [_tag_matches(matches, start_page, end_page) for matches in found]
+
+def process_document_multi_search(document: Document, chunk: int, start_page: int, end_page: int,
+                                  phrase_set: PhraseSet) -> Tuple[int, List[List[Dict[str, Any]]]]:
+    """Busca todas las frases en un rango de páginas de un Document, con página exacta."""
+    normalized = document.normalized
+    if normalized is not None:
+        # Reutilizar el texto ya normalizado del documento
+        chunk_start, chunk_end = normalized.chunk_bounds[chunk]
+        found = phrase_set.scan(normalized.text, chunk_start, chunk_end, normalized.sentence_ends)
+        return normalized.chunk_words[chunk], [
+            _tag_matches(matches, start_page, end_page, normalized.page_of) for matches in found
+        ]
+
+    cleaned_text, offsets, page_nums = clean_pages(document, start_page, end_page)
+    word_count = len(cleaned_text.split())
+    found = phrase_set.scan(cleaned_text, 0, len(cleaned_text))
+    page_of = partial(page_at_offset, offsets, page_nums)
+    return word_count, [_tag_matches(matches, start_page, end_page, page_of) for matches in found]
+
+def multi_phrase_search(page_chunks: Chunks, phrases: List[str],
+                        max_workers: int = None) -> Tuple[int, Dict[str, List[Dict[str, Any]]]]:
+    """
+    Búsqueda exacta de varias frases recorriendo cada chunk una sola vez.
+    Devuelve (total_palabras, {frase: coincidencias}); las coincidencias tienen
+    el mismo formato que concurrent_search.
+    Con max_workers=1 los chunks se recorren en el hilo actual, sin crear un pool.
+    """
+    phrase_set = PhraseSet(phrases)
+    total_words = 0
+    results: Dict[str, List[Dict[str, Any]]] = {phrase: [] for phrase in phrase_set.phrases}
+
+    if isinstance(page_chunks, Document):
+        tasks = [
+            (process_document_multi_search, start, end, len(page_chunks.pages_range(start, end)),
+             page_chunks, i, start, end, phrase_set)
+            for i, (start, end) in enumerate(page_chunks.chunk_ranges())
+        ]
+    else:
+        tasks = [(process_chunk_multi_search, chunk[0], chunk[1], len(chunk[2]), chunk, phrase_set)
+                 for chunk in page_chunks]
+
+    max_workers = max_workers or get_optimal_workers()
+
+    if max_workers == 1:
+        outputs = [search_chunk_traced(*task) for task in tasks]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(search_chunk_traced, *task) for task in tasks]
+            outputs = [future.result() for future in futures]
+
+    for chunk_words, chunk_matches in outputs:
+        total_words += chunk_words
+        for phrase, matches in zip(phrase_set.phrases, chunk_matches):
+            results[phrase].extend(matches)
+
+    return total_words, results
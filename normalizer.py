@@ -0,0 +1,133 @@
+import re
+from array import array
+from bisect import bisect_right
+from typing import List, Tuple, Dict
+from document import Document
+from search_engine import clean_text, cleaned_bounds, sentence_ends
+from proximity import ProximityIndex
+
+# Tramos de caracteres que clean_text conserva sin modificar
+KEPT_RUN = re.compile(r'[\w.,;!?]+')
+WHITESPACE = re.compile(r'\s')
+
+def clean_with_offsets(text: str) -> Tuple[str, List[int], List[int]]:
+    """
+    Igual que clean_text, pero devuelve además la tabla de tramos:
+    (texto_limpio, inicios_en_texto_limpio, inicios_en_texto_original).
+    """
+    parts = []
+    cleaned_starts = []
+    original_starts = []
+    position = 0
+    previous_end = None
+    for run in KEPT_RUN.finditer(text):
+        # Entre dos tramos hay un espacio solo si el original tenía algún blanco
+        if previous_end is not None and WHITESPACE.search(text, previous_end, run.start()):
+            parts.append(' ')
+            position += 1
+        cleaned_starts.append(position)
+        original_starts.append(run.start())
+        parts.append(run.group())
+        position += len(run.group())
+        previous_end = run.end()
+    return ''.join(parts), cleaned_starts, original_starts
+
+class NormalizedDocument:
+    """
+    Etapa de normalización de un Document, ejecutada una sola vez al cargarlo:
+    texto limpio (como clean_text) y texto limpio en minúsculas (como la
+    búsqueda flexible), conteos de palabras por página y por chunk, fines de
+    oración y correspondencia con los desplazamientos del texto original.
+    Las búsquedas exacta, flexible y el mapa de calor comparten estos datos.
+    """
+
+    def __init__(self, document: Document):
+        self.document = document
+        self.chunk_ranges = document.chunk_ranges()
+
+        cleaned_parts, lower_parts = [], []
+        self.page_offsets, self.page_nums = [], []
+        self.lower_offsets, self.lower_nums = [], []
+        self.page_words = array('l')
+        position = lower_position = 0
+
+        for page_num, view in document.iter_pages():
+            page_text = str(view)
+            cleaned = clean_text(page_text)
+            lower = clean_text(page_text.lower())
+            self.page_words.append(len(cleaned.split()))
+            if cleaned:
+                if cleaned_parts:
+                    position += 1
+                self.page_offsets.append(position)
+                self.page_nums.append(page_num)
+                cleaned_parts.append(cleaned)
+                position += len(cleaned)
+            if lower:
+                if lower_parts:
+                    lower_position += 1
+                self.lower_offsets.append(lower_position)
+                self.lower_nums.append(page_num)
+                lower_parts.append(lower)
+                lower_position += len(lower)
+
+        self.text = ' '.join(cleaned_parts)
+        self.lower = ' '.join(lower_parts)
+        del cleaned_parts, lower_parts
+
+        self.chunk_bounds = [
+            cleaned_bounds(self.page_offsets, self.page_nums, len(self.text), start, end)
+            for start, end in self.chunk_ranges
+        ]
+        self.lower_chunk_bounds = [
+            cleaned_bounds(self.lower_offsets, self.lower_nums, len(self.lower), start, end)
+            for start, end in self.chunk_ranges
+        ]
+        self.chunk_words = [sum(self.page_words[start:end]) for start, end in self.chunk_ranges]
+        self.lower_chunk_words = [len(self.lower[s:e].split()) for s, e in self.lower_chunk_bounds]
+        self.total_words = sum(self.page_words)
+
+        # Tablas de tramos por página (para to_original), calculadas bajo demanda
+        self._segments: Dict[int, Tuple[List[int], List[int]]] = {}
+
+        # Fines de oración del texto limpio (búsqueda exacta)
+        self.sentence_ends = sentence_ends(self.text)
+
+    def page_of(self, position: int) -> int:
+        """Página de un desplazamiento del texto limpio."""
+        return self.page_nums[max(0, bisect_right(self.page_offsets, position) - 1)]
+
+    def lower_page_of(self, position: int) -> int:
+        """Página de un desplazamiento del texto limpio en minúsculas."""
+        return self.lower_nums[max(0, bisect_right(self.lower_offsets, position) - 1)]
+
+    def to_original(self, position: int) -> int:
+        """
+        Desplazamiento en document.text que corresponde a una posición del
+        texto limpio. La tabla de tramos se calcula por página al consultarla.
+        """
+        index = max(0, bisect_right(self.page_offsets, position) - 1)
+        page_num = self.page_nums[index]
+        cleaned_starts, original_starts = self._page_segments(page_num)
+
+        local = position - self.page_offsets[index]
+        segment = max(0, bisect_right(cleaned_starts, local) - 1)
+        page_start = self.document.page_bounds(page_num)[0]
+        return page_start + original_starts[segment] + (local - cleaned_starts[segment])
+
+    def _page_segments(self, page_num: int) -> Tuple[List[int], List[int]]:
+        if page_num not in self._segments:
+            _, cleaned_starts, original_starts = clean_with_offsets(str(self.document.page(page_num)))
+            self._segments[page_num] = (cleaned_starts, original_starts)
+        return self._segments[page_num]
+
+def normalize_document(document: Document) -> NormalizedDocument:
+    """Normaliza el documento una sola vez y deja el resultado asociado a él."""
+    if document.normalized is None:
+        document.normalized = NormalizedDocument(document)
+    return document.normalized
+
+def build_proximity_index(document: Document) -> ProximityIndex:
+    """Tokeniza una sola vez el texto limpio en minúsculas del documento."""
+    document.proximity = ProximityIndex(normalize_document(document))
+    return document.proximity
@@ -0,0 +1,176 @@
+import os
+import json
+import zlib
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+# Directorio y límite de tamaño configurables por variables de entorno
+CACHE_DIR = os.environ.get(
+    "PDF_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "analisis_de_datos")
+)
+MAX_CACHE_BYTES = int(os.environ.get("PDF_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+CACHE_MAGIC = b"PDFTXT1\n"
+CACHE_SUFFIX = ".cache"
+HASH_BLOCK_SIZE = 1024 * 1024
+# Huellas memorizadas como máximo (las usadas hace más tiempo se descartan)
+MAX_FINGERPRINTS = int(os.environ.get("PDF_CACHE_MAX_FINGERPRINTS", 256))
+
+# Huellas ya calculadas en esta sesión (LRU): (ruta, tamaño, mtime) -> huella
+_fingerprint_memo: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_fingerprint_lock = threading.Lock()
+
+def _path_key(pdf_path: str) -> str:
+    """Prefijo estable derivado de la ruta absoluta del PDF."""
+    return hashlib.sha1(os.path.abspath(pdf_path).encode("utf-8")).hexdigest()[:16]
+
+def pdf_fingerprint(pdf_path: str) -> str:
+    """
+    Calcula la huella del PDF a partir de ruta, tamaño, mtime y hash del contenido.
+    El hash del contenido se memoriza mientras tamaño y mtime no cambien.
+    """
+    abs_path = os.path.abspath(pdf_path)
+    stat = os.stat(abs_path)
+    memo_key = (abs_path, stat.st_size, stat.st_mtime_ns)
+    with _fingerprint_lock:
+        fingerprint = _fingerprint_memo.get(memo_key)
+        if fingerprint is not None:
+            _fingerprint_memo.move_to_end(memo_key)
+            return fingerprint
+
+    content_hash = hashlib.sha256()
+    with open(abs_path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            content_hash.update(block)
+
+    key = f"{abs_path}|{stat.st_size}|{stat.st_mtime_ns}|{content_hash.hexdigest()}"
+    fingerprint = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    with _fingerprint_lock:
+        # Una versión anterior del mismo archivo ya no se volverá a pedir
+        for stale in [k for k in _fingerprint_memo if k[0] == abs_path]:
+            del _fingerprint_memo[stale]
+        _fingerprint_memo[memo_key] = fingerprint
+        while len(_fingerprint_memo) > MAX_FINGERPRINTS:
+            _fingerprint_memo.popitem(last=False)
+    return fingerprint
+
+def _cache_file(pdf_path: str, fingerprint: str) -> str:
+    return os.path.join(CACHE_DIR, f"{_path_key(pdf_path)}-{fingerprint[:32]}{CACHE_SUFFIX}")
+
+def _entries_for_path(pdf_path: str) -> List[str]:
+    """Lista los archivos de caché asociados a una ruta (cualquier versión)."""
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    prefix = _path_key(pdf_path) + "-"
+    return [
+        os.path.join(CACHE_DIR, name)
+        for name in os.listdir(CACHE_DIR)
+        if name.startswith(prefix) and name.endswith(CACHE_SUFFIX)
+    ]
+
+def load_cached_pages(pdf_path: str) -> Optional[List[str]]:
+    """Devuelve el texto por página guardado en caché o None si no existe/es inválido."""
+    try:
+        cache_file = _cache_file(pdf_path, pdf_fingerprint(pdf_path))
+        with open(cache_file, 'rb') as file:
+            data = file.read()
+    except OSError:
+        return None
+
+    if not data.startswith(CACHE_MAGIC):
+        return None
+    try:
+        pages = json.loads(zlib.decompress(data[len(CACHE_MAGIC):]).decode("utf-8"))
+    except (zlib.error, ValueError) as e:
+        print(f"Caché corrupta para {pdf_path}, se descarta: {str(e)}")
+        _remove(cache_file)
+        return None
+
+    # Marcar como usado recientemente (política LRU por mtime del archivo de caché)
+    try:
+        os.utime(cache_file, None)
+    except OSError:
+        pass
+    return pages
+
+def store_cached_pages(pdf_path: str, pages: List[str]) -> Optional[str]:
+    """Guarda el texto por página comprimido y aplica el límite de tamaño de la caché."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        cache_file = _cache_file(pdf_path, pdf_fingerprint(pdf_path))
+        payload = CACHE_MAGIC + zlib.compress(
+            json.dumps(pages, ensure_ascii=False).encode("utf-8"), 6
+        )
+
+        # Escritura atómica para no dejar entradas a medias
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as file:
+            file.write(payload)
+        os.replace(tmp_path, cache_file)
+    except OSError as e:
+        print(f"No se pudo guardar la caché de {pdf_path}: {str(e)}")
+        return None
+
+    # Eliminar versiones anteriores del mismo PDF
+    for entry in _entries_for_path(pdf_path):
+        if entry != cache_file:
+            _remove(entry)
+
+    enforce_cache_limit()
+    return cache_file
+
+def invalidate_cache(pdf_path: str) -> int:
+    """Elimina todas las entradas de caché de un PDF. Devuelve cuántas se borraron."""
+    removed = 0
+    for entry in _entries_for_path(pdf_path):
+        removed += _remove(entry)
+    return removed
+
+def clear_cache() -> int:
+    """Vacía por completo la caché de extracción."""
+    if not os.path.isdir(CACHE_DIR):
+        return 0
+    removed = 0
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith(CACHE_SUFFIX):
+            removed += _remove(os.path.join(CACHE_DIR, name))
+    return removed
+
+def enforce_cache_limit(max_bytes: int = None) -> int:
+    """Expulsa las entradas usadas hace más tiempo hasta respetar el tamaño máximo."""
+    if max_bytes is None:
+        max_bytes = MAX_CACHE_BYTES
+    if not os.path.isdir(CACHE_DIR):
+        return 0
+
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if not name.endswith(CACHE_SUFFIX):
+            continue
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if _remove(path):
+            total -= size
+            removed += 1
+    return removed
+
+def _remove(path: str) -> int:
+    try:
+        os.remove(path)
+        return 1
+    except OSError:
+        return 0
@@ -1,239 +1,445 @@
+import os
+import re
+import time
+from functools import lru_cache
+from xml.sax.saxutils import escape
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, Spacer, Frame, Table, TableStyle, Flowable
+from reportlab.pdfgen.canvas import Canvas
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_JUSTIFY
 from reportlab.lib import colors
-from typing import List, Dict, Any
+from collections.abc import Sequence
+from typing import List, Dict, Any, Iterable, Tuple
+from match_set import MatchSet, total_count
+from tracing import TRACER
 
-def create_exact_search_pdf_report(total_words: int, 
-                                 matches: List[Dict[str, Any]], 
+# Máximo de coincidencias con detalle por reporte; el resto solo entra en el resumen
+MAX_REPORT_DETAILS = int(os.environ.get("REPORT_MAX_DETAILS", 1000))
+
+HIGHLIGHT_MARKUP = '<font backColor="yellow">{}</font>'
+FOUND_MARKUP = '<font color="red" backColor="lightgrey">{}</font>'
+
+@lru_cache(maxsize=1)
+def report_styles() -> Dict[str, ParagraphStyle]:
+    """Estilos de los reportes, creados una sola vez por proceso."""
+    styles = getSampleStyleSheet()
+    return {
+        'title': styles['Heading1'],
+        'heading': styles['Heading2'],
+        'body': styles['BodyText'],
+        'italic': styles['Italic'],
+        # Una coincidencia = un párrafo; el espacio entre coincidencias va en el estilo
+        'match': ParagraphStyle('Match', parent=styles['BodyText'], leading=14, spaceAfter=12),
+        'table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ]),
+    }
+
+def format_page_info(match: Dict[str, Any]) -> str:
+    """Página exacta (1-based) si se conoce; si no, el rango del chunk."""
+    if 'page' in match:
+        return str(match['page'] + 1)
+    return str(match.get('page_range', 'N/A'))
+
+class StreamingReport:
+    """
+    Escribe los elementos del reporte directamente en el canvas, página por
+    página, en lugar de acumular toda la historia para SimpleDocTemplate.build.
+    La memoria no crece con el número de coincidencias.
+    """
+
+    def __init__(self, output_file: str, pagesize=letter, margin: float = inch):
+        self.output_file = output_file
+        self.pagesize = pagesize
+        self.margin = margin
+        self.canvas = Canvas(output_file, pagesize=pagesize, pageCompression=1)
+        self.start_time = time.perf_counter()
+        self.span = TRACER.begin("report_build", "report", output_file=output_file)
+        self._new_frame()
+
+    def _new_frame(self):
+        width, height = self.pagesize
+        self.frame = Frame(self.margin, self.margin, width - 2 * self.margin, height - 2 * self.margin)
+        self.page_has_content = False
+
+    def _next_page(self):
+        self.canvas.showPage()
+        self._new_frame()
+
+    def add(self, flowable: Flowable):
+        """Dibuja un elemento, dividiéndolo entre páginas si no cabe."""
+        pending = [flowable]
+        while pending:
+            current = pending.pop(0)
+            if self.frame.add(current, self.canvas, trySplit=1):
+                self.page_has_content = True
+                continue
+
+            parts = self.frame.split(current, self.canvas)
+            if len(parts) > 1 and self.frame.add(parts[0], self.canvas, trySplit=1):
+                self.page_has_content = True
+                pending[:0] = parts[1:]
+                self._next_page()
+                continue
+
+            if not self.page_has_content:
+                # Ni siquiera cabe en una página vacía
+                if not isinstance(current, Spacer):
+                    print("Elemento demasiado grande para una página del reporte; se omite")
+                continue
+
+            self._next_page()
+            pending.insert(0, current)
+
+    def paragraph(self, markup: str, style: str = 'body'):
+        self.add(Paragraph(markup, report_styles()[style]))
+
+    def spacer(self, height: float):
+        self.add(Spacer(1, height))
+
+    def close(self) -> Dict[str, float]:
+        """Guarda el PDF e informa la velocidad de generación."""
+        pages = self.canvas.getPageNumber()
+        self.canvas.save()
+        elapsed = time.perf_counter() - self.start_time
+        stats = {
+            'pages': pages,
+            'seconds': elapsed,
+            'pages_per_second': pages / elapsed if elapsed > 0 else float(pages),
+        }
+        print(f"Reporte generado: {pages} páginas en {elapsed:.2f}s "
+              f"({stats['pages_per_second']:.1f} páginas/s)")
+        self.span.set(pages=pages, bytes=os.path.getsize(self.output_file))
+        TRACER.finish(self.span)
+        return stats
+
+class MatchSummary:
+    """Conteo de coincidencias por grupo (archivo o frase) y página, para la tabla final."""
+
+    def __init__(self):
+        self.counts: Dict[Tuple[str, str], int] = {}
+        self.total = 0
+        self.matches = 0
+
+    def add(self, match: Dict[str, Any], group: str = ""):
+        key = (group, format_page_info(match))
+        self.counts[key] = self.counts.get(key, 0) + match['count']
+        self.total += match['count']
+        self.matches += 1
+
+    def table(self, group_label: str = None) -> Table:
+        # Grupos en orden de aparición y, dentro de cada uno, páginas en orden numérico
+        group_order = {group: i for i, group in enumerate(dict.fromkeys(g for g, _ in self.counts))}
+
+        def page_key(item):
+            (group, page), _ = item
+            return (group_order[group], int(page) if page.isdigit() else float('inf'), page)
+
+        header = ([group_label] if group_label else []) + ["Página(s)", "Coincidencias"]
+        rows = [header]
+        for (group, page), count in sorted(self.counts.items(), key=page_key):
+            rows.append(([group] if group_label else []) + [page, str(count)])
+        table = Table(rows, repeatRows=1, hAlign='LEFT')
+        table.setStyle(report_styles()['table'])
+        return table
+
+def highlight(text: str, target: str, all_occurrences: bool = True) -> str:
+    """Texto escapado para Paragraph con target resaltado (sin distinguir mayúsculas)."""
+    if not target:
+        return escape(text)
+    parts = []
+    last = 0
+    for found in re.finditer(re.escape(target), text, flags=re.IGNORECASE):
+        parts.append(escape(text[last:found.start()]))
+        parts.append(HIGHLIGHT_MARKUP.format(escape(found.group())))
+        last = found.end()
+        if not all_occurrences:
+            break
+    parts.append(escape(text[last:]))
+    return ''.join(parts)
+
+def match_markup(number: int, match: Dict[str, Any], phrase: str = None,
+                 flexible: bool = False, show_file: bool = False) -> str:
+    """Encabezado, frase encontrada y contexto resaltado de una coincidencia, en un solo párrafo."""
+    header = f"<b>Coincidencia #{number}</b>"
+    if show_file and 'pdf_name' in match:
+        header += f" | <b>Archivo:</b> {escape(match['pdf_name'])}"
+    header += f" | <b>Página(s):</b> {escape(format_page_info(match))}"
+
+    lines = [header]
+    paragraph = match.get('paragraph', '')
+    if flexible:
+        matched_text = match.get('original', '')
+        lines.append(f"<b>Frase encontrada:</b> {FOUND_MARKUP.format(escape(matched_text))}")
+        if paragraph:
+            lines.append(f"<b>Contexto:</b> {highlight(paragraph, matched_text, all_occurrences=False)}")
+    elif paragraph:
+        lines.append(f"<b>Contexto:</b> {highlight(paragraph, phrase)}")
+    return '<br/>'.join(lines)
+
+def _write_details(report: StreamingReport, matches: Iterable[Dict[str, Any]], summary: MatchSummary,
+                   max_details: int, group: str = "", **markup_options) -> int:
+    """Escribe el detalle (hasta max_details) y cuenta todas las coincidencias en el resumen."""
+    detailed = 0
+    for number, match in enumerate(matches, start=1):
+        summary.add(match, group)
+        if detailed < max_details:
+            report.paragraph(match_markup(number, match, **markup_options), 'match')
+            detailed += 1
+    return detailed
+
+def _write_summary(report: StreamingReport, summary: MatchSummary, detailed: int, group_label: str = None):
+    report.spacer(12)
+    report.paragraph("<b>RESUMEN DE COINCIDENCIAS</b>", 'heading')
+    report.paragraph(f"<b>Total de coincidencias:</b> {summary.total}")
+    if detailed < summary.matches:
+        report.paragraph(f"<i>Se muestra el detalle de {detailed} de {summary.matches} coincidencias; "
+                         f"la tabla incluye todas.</i>", 'italic')
+    report.spacer(6)
+    report.add(summary.table(group_label))
+
+def _total_count(matches) -> str:
+    """Total para el encabezado, si se conoce sin consumir las coincidencias."""
+    if isinstance(matches, Sequence):
+        return str(total_count(matches))
+    return "ver resumen"
+
+def create_exact_search_pdf_report(total_words: int,
+                                 matches: Iterable[Dict[str, Any]],
                                  phrase: str,
-                                 output_file: str = "exact_search_report.pdf") -> str:
+                                 output_file: str = "exact_search_report.pdf",
+                                 max_details: int = None) -> str:
     """
     Genera un reporte PDF para búsqueda exacta con el mismo estilo que los otros reportes.
     """
-    doc = SimpleDocTemplate(output_file, pagesize=letter)
-    styles = getSampleStyleSheet()
-    
-    # Estilos personalizados (consistentes con los otros reportes)
-    highlight_style = ParagraphStyle(
-        'Highlight',
-        parent=styles['BodyText'],
-        backColor=colors.yellow,
-        borderPadding=(2, 2, 2, 2),
-        leading=14
-    )
-    
-    story = []
-    
-    # Título
-    story.append(Paragraph("REPORTE DE BÚSQUEDA EXACTA", styles['Heading1']))
-    story.append(Spacer(1, 12))
-    
-    # Información general
-    story.append(Paragraph(f"<b>Frase buscada:</b> {phrase}", styles['BodyText']))
-    story.append(Paragraph(f"<b>Total de palabras analizadas:</b> {total_words:,}", styles['BodyText']))
-    story.append(Paragraph(f"<b>Total de coincidencias:</b> {sum(m['count'] for m in matches)}", styles['BodyText']))
-    story.append(Spacer(1, 24))
-    
-    # Detalle de coincidencias
-    if not matches:
-        story.append(Paragraph("No se encontraron coincidencias exactas.", styles['BodyText']))
+    max_details = MAX_REPORT_DETAILS if max_details is None else max_details
+    report = StreamingReport(output_file)
+    summary = MatchSummary()
+
+    report.paragraph("REPORTE DE BÚSQUEDA EXACTA", 'title')
+    report.spacer(12)
+    report.paragraph(f"<b>Frase buscada:</b> {escape(phrase)}")
+    report.paragraph(f"<b>Total de palabras analizadas:</b> {total_words:,}")
+    report.paragraph(f"<b>Total de coincidencias:</b> {_total_count(matches)}")
+    report.spacer(24)
+
+    report.paragraph("<b>DETALLE DE COINCIDENCIAS</b>", 'heading')
+    report.spacer(12)
+    detailed = _write_details(report, matches, summary, max_details, phrase=phrase)
+    if not summary.matches:
+        report.paragraph("No se encontraron coincidencias exactas.")
     else:
-        story.append(Paragraph("<b>DETALLE DE COINCIDENCIAS</b>", styles['Heading2']))
-        story.append(Spacer(1, 12))
-        
-        for i, match in enumerate(matches, start=1):
-            story.append(Paragraph(f"<b>Coincidencia #{i}</b>", styles['BodyText']))
-            page_info = match.get('page_range', match.get('page', 'N/A'))
-            story.append(Paragraph(f"<b>Página(s):</b> {page_info}", styles['BodyText']))
-            story.append(Spacer(1, 6))
-            
-            # Mostrar contexto con frase resaltada
-            paragraph = match.get('paragraph', '')
-            if paragraph:
-                story.append(Paragraph("<b>Contexto:</b>", styles['BodyText']))
-                # Resaltar todas las ocurrencias de la frase
-                parts = paragraph.split(phrase)
-                for j, part in enumerate(parts):
-                    story.append(Paragraph(part, styles['BodyText']))
-                    if j < len(parts) - 1:
-                        story.append(Paragraph(phrase, highlight_style))
-            
-            story.append(Spacer(1, 12))
-    
-    doc.build(story)
+        _write_summary(report, summary, detailed)
+
+    report.close()
     return output_file
 
-def create_flexible_pdf_report(total_words: int, 
-                             matches: List[Dict[str, Any]], 
+def create_flexible_pdf_report(total_words: int,
+                             matches: Iterable[Dict[str, Any]],
                              phrase: str,
-                             output_file: str = "flexible_search_report.pdf") -> str:
+                             output_file: str = "flexible_search_report.pdf",
+                             max_intermediate: int = 2,
+                             max_details: int = None) -> str:
     """
     Genera un reporte PDF con las frases flexibles encontradas, resaltando las coincidencias.
     """
-    doc = SimpleDocTemplate(output_file, pagesize=letter)
-    styles = getSampleStyleSheet()
-    
-    # Estilos personalizados
-    highlight_style = ParagraphStyle(
-        'Highlight',
-        parent=styles['BodyText'],
-        backColor=colors.yellow,
-        borderPadding=(2, 2, 2, 2),
-        leading=14
-    )
-    
-    phrase_style = ParagraphStyle(
-        'PhraseStyle',
-        parent=styles['BodyText'],
-        textColor=colors.red,
-        backColor=colors.lightgrey,
-        borderPadding=(2, 2, 2, 2)
-    )
-    
-    story = []
-    
-    # Título
-    story.append(Paragraph("REPORTE DE BÚSQUEDA FLEXIBLE", styles['Heading1']))
-    story.append(Spacer(1, 12))
-    
-    # Información general
-    story.append(Paragraph(f"<b>Frase buscada:</b> {phrase}", styles['BodyText']))
-    story.append(Paragraph(f"<b>Total de palabras analizadas:</b> {total_words:,}", styles['BodyText']))
-    story.append(Paragraph(f"<b>Total de coincidencias:</b> {sum(m['count'] for m in matches)}", styles['BodyText']))
-    story.append(Paragraph("<i>(Coincidencias con hasta 3 palabras intermedias entre términos)</i>", styles['Italic']))
-    story.append(Spacer(1, 24))
-    
-    # Detalle de coincidencias
-    if not matches:
-        story.append(Paragraph("No se encontraron coincidencias.", styles['BodyText']))
+    max_details = MAX_REPORT_DETAILS if max_details is None else max_details
+    report = StreamingReport(output_file)
+    summary = MatchSummary()
+
+    report.paragraph("REPORTE DE BÚSQUEDA FLEXIBLE", 'title')
+    report.spacer(12)
+    report.paragraph(f"<b>Frase buscada:</b> {escape(phrase)}")
+    report.paragraph(f"<b>Total de palabras analizadas:</b> {total_words:,}")
+    report.paragraph(f"<b>Total de coincidencias:</b> {_total_count(matches)}")
+    report.paragraph(f"<i>(Coincidencias con hasta {max_intermediate} palabras intermedias entre términos)</i>", 'italic')
+    report.spacer(24)
+
+    report.paragraph("<b>DETALLE DE COINCIDENCIAS</b>", 'heading')
+    report.spacer(12)
+    detailed = _write_details(report, matches, summary, max_details, flexible=True)
+    if not summary.matches:
+        report.paragraph("No se encontraron coincidencias.")
+    else:
+        _write_summary(report, summary, detailed)
+
+    report.close()
+    return output_file
+
+def create_fuzzy_pdf_report(total_words: int,
+                            matches: Iterable[Dict[str, Any]],
+                            phrase: str,
+                            output_file: str = "fuzzy_search_report.pdf",
+                            max_distance: int = None,
+                            max_details: int = None) -> str:
+    """
+    Genera un reporte PDF con las coincidencias de la búsqueda tolerante a
+    errores, resaltando el texto encontrado (que puede diferir de la frase).
+    """
+    max_details = MAX_REPORT_DETAILS if max_details is None else max_details
+    report = StreamingReport(output_file)
+    summary = MatchSummary()
+
+    report.paragraph("REPORTE DE BÚSQUEDA TOLERANTE A ERRORES", 'title')
+    report.spacer(12)
+    report.paragraph(f"<b>Frase buscada:</b> {escape(phrase)}")
+    report.paragraph(f"<b>Total de palabras analizadas:</b> {total_words:,}")
+    report.paragraph(f"<b>Total de coincidencias:</b> {_total_count(matches)}")
+    limit = "según el largo de cada palabra" if max_distance is None else f"hasta {max_distance} por palabra"
+    report.paragraph(f"<i>(Ediciones permitidas: {limit}; incluye palabras cortadas en dos)</i>", 'italic')
+    report.spacer(24)
+
+    report.paragraph("<b>DETALLE DE COINCIDENCIAS</b>", 'heading')
+    report.spacer(12)
+    detailed = _write_details(report, matches, summary, max_details, flexible=True)
+    if not summary.matches:
+        report.paragraph("No se encontraron coincidencias.")
     else:
-        story.append(Paragraph("<b>DETALLE DE COINCIDENCIAS</b>", styles['Heading2']))
-        story.append(Spacer(1, 12))
-        
-        for i, match in enumerate(matches, start=1):
-            # Encabezado de coincidencia
-            story.append(Paragraph(f"<b>Coincidencia #{i}</b>", styles['BodyText']))
-            page_info = match.get('page_range', match.get('page', 'N/A'))
-            story.append(Paragraph(f"<b>Página(s):</b> {page_info}", styles['BodyText']))
-            story.append(Spacer(1, 6))
-            
-            # Mostrar frase original encontrada
-            matched_text = match.get('original', '')
-            story.append(Paragraph("<b>Frase encontrada:</b>", styles['BodyText']))
-            story.append(Paragraph(matched_text, phrase_style))
-            story.append(Spacer(1, 6))
-            
-            # Mostrar contexto
-            paragraph = match.get('paragraph', '')
-            if paragraph:
-                story.append(Paragraph("<b>Contexto:</b>", styles['BodyText']))
-                # Resaltar la coincidencia en el contexto
-                start_idx = paragraph.lower().find(matched_text.lower())
-                if start_idx != -1:
-                    before = paragraph[:start_idx]
-                    during = paragraph[start_idx:start_idx+len(matched_text)]
-                    after = paragraph[start_idx+len(matched_text):]
-                    
-                    story.append(Paragraph(before, styles['BodyText']))
-                    story.append(Paragraph(during, highlight_style))
-                    story.append(Paragraph(after, styles['BodyText']))
-                else:
-                    story.append(Paragraph(paragraph, styles['BodyText']))
-            
-            story.append(Spacer(1, 24))
-    
-    doc.build(story)
+        _write_summary(report, summary, detailed)
+
+    report.close()
     return output_file
 
-def create_multi_pdf_flexible_report(total_words: int, 
-                                   matches: List[Dict[str, Any]], 
+def _group_by_pdf(matches: Iterable[Dict[str, Any]]) -> Iterable[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Agrupa por archivo conservando el orden de aparición. Las búsquedas entregan
+    las coincidencias de cada archivo juntas, así que normalmente no se reordena.
+    """
+    if isinstance(matches, MatchSet):
+        yield from matches.by_document()
+        return
+    if not isinstance(matches, Sequence):
+        # Iterador: se asume que ya viene agrupado por archivo
+        group, current = None, []
+        for match in matches:
+            if current and match['pdf_name'] != group:
+                yield group, current
+                current = []
+            group = match['pdf_name']
+            current.append(match)
+        if current:
+            yield group, current
+        return
+
+    positions: Dict[str, List[int]] = {}
+    for i, match in enumerate(matches):
+        positions.setdefault(match['pdf_name'], []).append(i)
+    for pdf_name, indices in positions.items():
+        yield pdf_name, (matches[i] for i in indices)
+
+def create_multi_pdf_flexible_report(total_words: int,
+                                   matches: Iterable[Dict[str, Any]],
                                    phrase: str,
-                                   output_file: str = "multi_pdf_flexible_search_report.pdf") -> str:
+                                   output_file: str = "multi_pdf_flexible_search_report.pdf",
+                                   max_intermediate: int = 2,
+                                   max_details: int = None) -> str:
     """
     Genera un reporte PDF consolidado para búsqueda flexible en múltiples PDFs.
     """
-    doc = SimpleDocTemplate(output_file, pagesize=letter)
-    styles = getSampleStyleSheet()
-    
-    # Estilos personalizados
-    highlight_style = ParagraphStyle(
-        'Highlight',
-        parent=styles['BodyText'],
-        backColor=colors.yellow,
-        borderPadding=(2, 2, 2, 2),
-        leading=14
-    )
-    
-    phrase_style = ParagraphStyle(
-        'PhraseStyle',
-        parent=styles['BodyText'],
-        textColor=colors.red,
-        backColor=colors.lightgrey,
-        borderPadding=(2, 2, 2, 2)
-    )
-    
-    story = []
-    
-    # Título
-    story.append(Paragraph("REPORTE DE BÚSQUEDA FLEXIBLE EN MÚLTIPLES PDFs", styles['Heading1']))
-    story.append(Spacer(1, 12))
-    
-    # Información general
-    story.append(Paragraph(f"<b>Frase buscada:</b> {phrase}", styles['BodyText']))
-    story.append(Paragraph(f"<b>Total de archivos analizados:</b> {len({m['pdf_path'] for m in matches})}", styles['BodyText']))
-    story.append(Paragraph(f"<b>Total de palabras analizadas:</b> {total_words:,}", styles['BodyText']))
-    story.append(Paragraph(f"<b>Total de coincidencias:</b> {sum(m['count'] for m in matches)}", styles['BodyText']))
-    story.append(Paragraph("<i>(Coincidencias con hasta 3 palabras intermedias entre términos)</i>", styles['Italic']))
-    story.append(Spacer(1, 24))
-    
-    # Detalle de coincidencias por archivo
-    if not matches:
-        story.append(Paragraph("No se encontraron coincidencias flexibles en ninguno de los archivos.", styles['BodyText']))
+    max_details = MAX_REPORT_DETAILS if max_details is None else max_details
+    report = StreamingReport(output_file)
+    summary = MatchSummary()
+
+    report.paragraph("REPORTE DE BÚSQUEDA FLEXIBLE EN MÚLTIPLES PDFs", 'title')
+    report.spacer(12)
+    report.paragraph(f"<b>Frase buscada:</b> {escape(phrase)}")
+    if isinstance(matches, MatchSet):
+        report.paragraph(f"<b>Total de archivos analizados:</b> {len({s.path for s in matches.sources})}")
+    elif isinstance(matches, Sequence):
+        report.paragraph(f"<b>Total de archivos analizados:</b> {len({m['pdf_path'] for m in matches})}")
+    report.paragraph(f"<b>Total de palabras analizadas:</b> {total_words:,}")
+    report.paragraph(f"<b>Total de coincidencias:</b> {_total_count(matches)}")
+    report.paragraph(f"<i>(Coincidencias con hasta {max_intermediate} palabras intermedias entre términos)</i>", 'italic')
+    report.spacer(24)
+
+    detailed = 0
+    for pdf_name, pdf_matches in _group_by_pdf(matches):
+        report.paragraph(f"<b>Archivo:</b> {escape(pdf_name)}", 'heading')
+        report.spacer(12)
+        detailed += _write_details(report, pdf_matches, summary, max_details - detailed,
+                                   group=pdf_name, flexible=True)
+        report.spacer(12)
+
+    if not summary.matches:
+        report.paragraph("No se encontraron coincidencias flexibles en ninguno de los archivos.")
     else:
-        # Agrupar coincidencias por archivo PDF
-        pdfs = {}
-        for match in matches:
-            pdf_name = match['pdf_name']
-            if pdf_name not in pdfs:
-                pdfs[pdf_name] = []
-            pdfs[pdf_name].append(match)
-        
-        for pdf_name, pdf_matches in pdfs.items():
-            story.append(Paragraph(f"<b>Archivo:</b> {pdf_name}", styles['Heading2']))
-            story.append(Spacer(1, 12))
-            
-            for i, match in enumerate(pdf_matches, start=1):
-                story.append(Paragraph(f"<b>Coincidencia #{i}</b>", styles['BodyText']))
-                story.append(Paragraph(f"<b>Página(s):</b> {match.get('page_range', 'N/A')}", styles['BodyText']))
-                story.append(Spacer(1, 6))
-                
-                # Mostrar frase encontrada
-                matched_text = match.get('original', '')
-                story.append(Paragraph("<b>Frase encontrada:</b>", styles['BodyText']))
-                story.append(Paragraph(matched_text, phrase_style))
-                story.append(Spacer(1, 6))
-                
-                # Mostrar contexto con frase resaltada
-                paragraph = match.get('paragraph', '')
-                if paragraph:
-                    story.append(Paragraph("<b>Contexto:</b>", styles['BodyText']))
-                    start_idx = paragraph.lower().find(matched_text.lower())
-                    if start_idx != -1:
-                        before = paragraph[:start_idx]
-                        during = paragraph[start_idx:start_idx+len(matched_text)]
-                        after = paragraph[start_idx+len(matched_text):]
-                        
-                        story.append(Paragraph(before, styles['BodyText']))
-                        story.append(Paragraph(during, highlight_style))
-                        story.append(Paragraph(after, styles['BodyText']))
-                    else:
-                        story.append(Paragraph(paragraph, styles['BodyText']))
-                
-                story.append(Spacer(1, 12))
-            
-            story.append(Spacer(1, 24))
-    
-    doc.build(story)
-    return output_file
\ No newline at end of file
+        _write_summary(report, summary, detailed, group_label="Archivo")
+
+    report.close()
+    return output_file
+
+def create_ranked_pdf_report(total_words: int,
+                             matches: Iterable[Dict[str, Any]],
+                             scores: List[float],
+                             phrase: str,
+                             output_file: str = "multi_pdf_ranked_search_report.pdf",
+                             max_intermediate: int = 2) -> str:
+    """
+    Genera un reporte PDF con los mejores pasajes de una búsqueda con ranking
+    en múltiples PDFs, en orden de relevancia y con su puntaje.
+    """
+    report = StreamingReport(output_file)
+    summary = MatchSummary()
+
+    report.paragraph("REPORTE DE MEJORES RESULTADOS EN MÚLTIPLES PDFs", 'title')
+    report.spacer(12)
+    report.paragraph(f"<b>Frase buscada:</b> {escape(phrase)}")
+    report.paragraph(f"<b>Total de palabras analizadas:</b> {total_words:,}")
+    report.paragraph(f"<b>Resultados mostrados:</b> {len(scores)}")
+    report.paragraph(f"<i>(Pasajes ordenados por relevancia: BM25 y cercanía de los términos, "
+                     f"con hasta {max_intermediate} palabras intermedias)</i>", 'italic')
+    report.spacer(24)
+
+    for number, (match, score) in enumerate(zip(matches, scores), start=1):
+        summary.add(match, match.get('pdf_name', ""))
+        markup = match_markup(number, match, flexible=True, show_file=True)
+        report.paragraph(f"{markup}<br/><b>Puntaje:</b> {score:.2f}", 'match')
+
+    if not summary.matches:
+        report.paragraph("No se encontraron coincidencias en ninguno de los archivos.")
+    else:
+        _write_summary(report, summary, summary.matches, group_label="Archivo")
+
+    report.close()
+    return output_file
+
+def create_multi_phrase_pdf_report(total_words: int,
+                                   results: Dict[str, List[Dict[str, Any]]],
+                                   output_file: str = "multi_phrase_search_report.pdf",
+                                   max_details: int = None) -> str:
+    """
+    Genera un reporte PDF para la búsqueda exacta de varias frases a la vez:
+    un resumen con el conteo de cada frase y el detalle de sus coincidencias.
+    """
+    max_details = MAX_REPORT_DETAILS if max_details is None else max_details
+    report = StreamingReport(output_file)
+    summary = MatchSummary()
+
+    report.paragraph("REPORTE DE BÚSQUEDA DE VARIAS FRASES", 'title')
+    report.spacer(12)
+    report.paragraph(f"<b>Total de palabras analizadas:</b> {total_words:,}")
+    report.paragraph(f"<b>Frases buscadas:</b> {len(results)}")
+    for phrase, matches in results.items():
+        report.paragraph(f"<b>{escape(phrase)}:</b> {_total_count(matches)} coincidencias")
+    report.spacer(24)
+
+    detailed = 0
+    for phrase, matches in results.items():
+        report.paragraph(f"<b>Frase:</b> {escape(phrase)}", 'heading')
+        report.spacer(12)
+        before = summary.matches
+        detailed += _write_details(report, matches, summary, max_details - detailed,
+                                   group=phrase, phrase=phrase, show_file=True)
+        if summary.matches == before:
+            report.paragraph("No se encontraron coincidencias exactas.")
+        report.spacer(12)
+
+    if summary.matches:
+        _write_summary(report, summary, detailed, group_label="Frase")
+
+    report.close()
+    return output_file
@@ -0,0 +1,189 @@
+import re
+import numpy as np
+from typing import List, Tuple, Dict, Any
+from match_set import MatchSet, ELLIPSIS_BEFORE, ELLIPSIS_AFTER
+from search_limits import SearchLimits, mark_truncated
+
+WORD_PATTERN = re.compile(r'\w+')
+
+class WordTokens:
+    """
+    Palabras de un texto limpio y en minúsculas convertidas a ids enteros,
+    con el desplazamiento de inicio y fin de cada una.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        vocabulary: Dict[str, int] = {}
+        ids = []
+        spans = []
+        for match in WORD_PATTERN.finditer(text):
+            ids.append(vocabulary.setdefault(match.group(), len(vocabulary)))
+            spans.append(match.span())
+
+        self.vocabulary = vocabulary
+        self.ids = np.array(ids, dtype=np.int32)
+        spans = np.array(spans, dtype=np.int64).reshape(-1, 2)
+        self.starts = spans[:, 0]
+        self.ends = spans[:, 1]
+
+    def token_range(self, start: int, end: int) -> Tuple[int, int]:
+        """Rango de ordinales de las palabras contenidas en text[start:end]."""
+        return (int(np.searchsorted(self.starts, start, side='left')),
+                int(np.searchsorted(self.ends, end, side='right')))
+
+def phrase_word_ids(tokens: WordTokens, phrase_words: List[str]) -> List[int]:
+    """Ids de las palabras de la frase; -1 si alguna no aparece en el texto."""
+    return [tokens.vocabulary.get(word, -1) for word in phrase_words]
+
+def supports_phrase(phrase_words: List[str]) -> bool:
+    """El motor lineal solo aplica a frases formadas por palabras simples (\\w+)."""
+    return all(WORD_PATTERN.fullmatch(word) for word in phrase_words)
+
+def proximity_spans(ids: np.ndarray, phrase_ids: List[int],
+                    max_intermediate: int) -> List[Tuple[int, int]]:
+    """
+    Encuentra secuencias ordenadas de las palabras de la frase con entre 1 y
+    max_intermediate palabras intermedias entre cada par, en tiempo lineal.
+
+    Devuelve (primer_token, último_token) de cada coincidencia, con la misma
+    elección que haría la regex equivalente: coincidencias de izquierda a
+    derecha, sin solapamiento y con los huecos más largos posibles primero.
+    """
+    n = len(ids)
+    if n == 0 or not phrase_ids or any(word_id < 0 for word_id in phrase_ids):
+        return []
+
+    # reach[j][i]: la frase desde la palabra j puede completarse con la palabra j en i
+    reach = [None] * len(phrase_ids)
+    reach[-1] = ids == phrase_ids[-1]
+    for j in range(len(phrase_ids) - 2, -1, -1):
+        following = np.zeros(n, dtype=bool)
+        for gap in range(1, max_intermediate + 1):
+            shift = gap + 1
+            if shift < n:
+                following[:n - shift] |= reach[j + 1][shift:]
+        reach[j] = (ids == phrase_ids[j]) & following
+
+    spans = []
+    next_free = 0
+    for first in np.flatnonzero(reach[0]).tolist():
+        if first < next_free:
+            continue
+        position = first
+        for j in range(1, len(phrase_ids)):
+            for gap in range(max_intermediate, 0, -1):
+                candidate = position + gap + 1
+                if candidate < n and reach[j][candidate]:
+                    position = candidate
+                    break
+        spans.append((first, position))
+        next_free = position + 1
+    return spans
+
+def flexible_context(match_start: int, match_end: int,
+                     context_start: int, context_end: int) -> Tuple[int, int, int]:
+    """
+    Límites del contexto de una coincidencia flexible (50 caracteres a cada
+    lado, recortado a [context_start, context_end)) y banderas de "..." si se
+    recorta.
+    """
+    start_pos = max(context_start, match_start - 50)  # 50 caracteres antes
+    end_pos = min(context_end, match_end + 50)  # 50 caracteres después
+    flags = 0
+    if start_pos > context_start:
+        flags |= ELLIPSIS_BEFORE
+    if end_pos < context_end:
+        flags |= ELLIPSIS_AFTER
+    return start_pos, end_pos, flags
+
+def flexible_match(text: str, match_start: int, match_end: int,
+                   context_start: int, context_end: int) -> Dict[str, Any]:
+    """
+    Coincidencia flexible con 50 caracteres de contexto a cada lado, recortado
+    a text[context_start:context_end] y marcado con "..." si se recorta.
+    """
+    start_pos, end_pos, flags = flexible_context(match_start, match_end, context_start, context_end)
+    context = text[start_pos:end_pos]
+    if flags & ELLIPSIS_BEFORE:
+        context = "..." + context
+    if flags & ELLIPSIS_AFTER:
+        context = context + "..."
+
+    return {
+        'paragraph': context,
+        'original': text[match_start:match_end],
+        'count': 1,
+        'positions': [match_start - start_pos]
+    }
+
+def proximity_hits(tokens: WordTokens, start: int, end: int, phrase: str,
+                   phrase_words: List[str], max_intermediate: int) -> List[Tuple[int, int]]:
+    """(inicio, fin) de las coincidencias flexibles dentro de tokens.text[start:end]."""
+    low, high = tokens.token_range(start, end)
+    phrase_ids = phrase_word_ids(tokens, phrase_words)
+
+    hits = []
+    for first, last in proximity_spans(tokens.ids[low:high], phrase_ids, max_intermediate):
+        match_start = int(tokens.starts[low + first])
+        match_end = int(tokens.ends[low + last])
+        # Verificar que no sea coincidencia exacta
+        if tokens.text[match_start:match_end].lower() == phrase.lower():
+            continue
+        hits.append((match_start, match_end))
+    return hits
+
+def proximity_matches(tokens: WordTokens, start: int, end: int, phrase: str,
+                      phrase_words: List[str], max_intermediate: int) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Coincidencias flexibles dentro de tokens.text[start:end] con el mismo
+    formato que find_flexible_matches (contexto de 50 caracteres a cada lado).
+    """
+    return [
+        (match_start, flexible_match(tokens.text, match_start, match_end, start, end))
+        for match_start, match_end in proximity_hits(tokens, start, end, phrase,
+                                                     phrase_words, max_intermediate)
+    ]
+
+class ProximityIndex:
+    """
+    Texto limpio en minúsculas de un Document tokenizado una sola vez, con los
+    límites de cada chunk, para búsquedas flexibles sin volver a limpiar.
+    Se construye a partir del documento normalizado (ver normalizer).
+    """
+
+    def __init__(self, normalized):
+        self.tokens = WordTokens(normalized.lower)
+        self.chunk_ranges = normalized.chunk_ranges
+        self.chunk_bounds = normalized.lower_chunk_bounds
+        self.chunk_words = normalized.lower_chunk_words
+        self.page_of = normalized.lower_page_of
+
+    def search(self, phrase: str, max_intermediate: int, limits: SearchLimits = None) -> Tuple[int, MatchSet]:
+        """
+        Búsqueda flexible equivalente a flexible_search sobre el Document.
+        Las coincidencias se guardan como desplazamientos sobre el texto.
+        Los límites se revisan antes de cada chunk; si la búsqueda se corta,
+        solo cuentan las palabras de los chunks anteriores.
+        """
+        phrase_words = [w.lower() for w in phrase.split()]
+        total_words = sum(self.chunk_words)
+        all_matches = MatchSet(flexible=True)
+        doc_id = all_matches.add_source(self.tokens.text)
+        if len(phrase_words) < 2:
+            print("La frase debe contener al menos dos palabras.")
+            return total_words, all_matches
+
+        reason = None
+        for chunk, (pages, (start, end)) in enumerate(zip(self.chunk_ranges, self.chunk_bounds)):
+            reason = limits.stop_reason(len(all_matches)) if limits is not None else None
+            if reason is not None:
+                total_words = sum(self.chunk_words[:chunk])
+                break
+            for match_start, match_end in proximity_hits(self.tokens, start, end, phrase,
+                                                         phrase_words, max_intermediate):
+                start_pos, end_pos, flags = flexible_context(match_start, match_end, start, end)
+                all_matches.add(doc_id, start_pos, end_pos, [match_start - start_pos],
+                                match_start, match_end - match_start,
+                                self.page_of(match_start), pages, flags)
+        return total_words, mark_truncated(all_matches, reason, limits)
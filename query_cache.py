@@ -0,0 +1,154 @@
+"""
+Caché de resultados de búsquedas: repetir una consulta (por ejemplo, para
+volver a generar un reporte) devuelve el resultado anterior sin recorrer el
+documento otra vez.
+
+La clave es (huella del documento, modo, frase, parámetros de la consulta),
+incluido el backend si se pidió uno explícito (que recorre el texto aunque
+haya índice, ver search_engine.concurrent_search). La huella depende del
+texto y de la división en chunks, así que un documento recargado con el
+mismo contenido reutiliza sus resultados. La caché es LRU y está
+acotada por número de entradas y por memoria:
+
+    PDF_QUERY_CACHE_ENTRIES=128   entradas como máximo (0 la desactiva)
+    PDF_QUERY_CACHE_MB=64         memoria estimada de los resultados
+
+Los resultados se comparten entre quienes repiten la consulta: no deben
+modificarse. Los resultados truncados por límites de la búsqueda (ver
+search_limits) no se guardan.
+"""
+import hashlib
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Any, Tuple, Hashable, Callable
+from document import Document
+from match_set import MatchSet
+from search_limits import truncation
+
+QUERY_CACHE_ENTRIES = int(os.environ.get("PDF_QUERY_CACHE_ENTRIES", 128))
+QUERY_CACHE_MB = float(os.environ.get("PDF_QUERY_CACHE_MB", 64))
+
+def result_size(result: Tuple[int, Any]) -> int:
+    """
+    Memoria estimada de un resultado (total_palabras, coincidencias). De un
+    MatchSet cuentan sus arreglos: el texto es el del documento, que ya está
+    en memoria.
+    """
+    matches = result[1]
+    if isinstance(matches, MatchSet):
+        return matches.nbytes()
+    return sys.getsizeof(matches) + sum(
+        sys.getsizeof(match) + sum(sys.getsizeof(value) for value in match.values())
+        for match in matches
+    )
+
+class QueryCache:
+    """LRU de resultados acotada por entradas y bytes, con estadísticas de aciertos."""
+
+    def __init__(self, max_entries: int = QUERY_CACHE_ENTRIES, max_bytes: int = int(QUERY_CACHE_MB * 1024 * 1024)):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: Hashable) -> Any:
+        """Resultado guardado (y marcado como reciente), o None si no está."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        size = result_size(value)
+        if not self.enabled or size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def discard(self, fingerprint: str):
+        """Quita los resultados de un documento (por huella)."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == fingerprint]:
+                self.bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"Caché de consultas: {stats['hits']} aciertos, {stats['misses']} fallos "
+                f"({stats['hit_rate']:.0%}), {stats['entries']} resultados, {stats['bytes'] / 1e6:.1f} MB")
+
+QUERY_CACHE = QueryCache()
+
+# Huella de cada documento vivo; al liberarse el documento se quitan sus
+# resultados, que mantendrían su texto en memoria
+_fingerprints: "weakref.WeakKeyDictionary[Document, str]" = weakref.WeakKeyDictionary()
+_fingerprints_lock = threading.Lock()
+
+def document_fingerprint(document: Document) -> str:
+    """Huella del texto del documento y de su división en chunks (calculada una vez)."""
+    with _fingerprints_lock:
+        fingerprint = _fingerprints.get(document)
+        if fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(document.text.encode("utf-8", "surrogatepass"))
+            digest.update(repr(document.chunk_ranges()).encode("ascii"))
+            fingerprint = _fingerprints[document] = digest.hexdigest()
+            weakref.finalize(document, QUERY_CACHE.discard, fingerprint)
+        return fingerprint
+
+def cached_search(document: Any, query: Tuple[Hashable, ...], function: Callable, *args) -> Tuple[Any, bool]:
+    """
+    Resultado de function(*args) para la consulta query (modo, frase, ...)
+    sobre el documento, desde la caché si ya se calculó. Devuelve
+    (resultado, acierto). Solo se guardan consultas sobre un Document.
+    """
+    if not isinstance(document, Document) or not QUERY_CACHE.enabled:
+        return function(*args), False
+    key = (document_fingerprint(document),) + tuple(query)
+    result = QUERY_CACHE.get(key)
+    if result is not None:
+        return result, True
+    result = function(*args)
+    # Un resultado parcial (búsqueda cortada por sus límites) no se reutiliza
+    if truncation(result[1]) is None:
+        QUERY_CACHE.put(key, result)
+    return result, False
@@ -0,0 +1,198 @@
+"""
+Búsqueda con ranking en múltiples PDFs: en lugar de todas las coincidencias,
+los k pasajes más relevantes.
+
+Cada pasaje (la frase en orden, con hasta max_intermediate palabras entre
+términos) recibe un puntaje BM25 de los términos en una ventana alrededor del
+pasaje, un bono de proximidad (1 si la frase aparece exacta) y una fracción
+del BM25 del documento completo. Se conservan los k mejores en un heap
+acotado. Los documentos se recorren de mayor a menor cota superior (calculada
+con las frecuencias del índice, sin cargar el documento) y la búsqueda
+termina cuando ninguna cota restante puede entrar en el top k.
+"""
+import heapq
+import math
+import os
+import numpy as np
+from bisect import bisect_right
+from typing import List, Tuple, Dict
+from search_engine import clean_text, DEFAULT_MAX_INTERMEDIATE
+from proximity import WORD_PATTERN, flexible_context
+from match_set import MatchSet
+from tracing import span
+
+DEFAULT_TOP_K = int(os.environ.get("PDF_RANK_TOP_K", 20))
+
+# Parámetros de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Palabras a cada lado del pasaje que cuentan para su BM25
+PASSAGE_WINDOW = 10
+# Peso del bono de proximidad y del BM25 del documento en el puntaje del pasaje
+PROXIMITY_WEIGHT = 2.0
+DOCUMENT_WEIGHT = 0.5
+
+def query_terms(phrase: str) -> List[str]:
+    """Palabras de la frase como las tokeniza la búsqueda flexible."""
+    return WORD_PATTERN.findall(clean_text(phrase.lower()))
+
+def idf(documents: int, frequency: int) -> float:
+    return math.log(1 + (documents - frequency + 0.5) / (frequency + 0.5))
+
+def saturation(tf, length, average_length: float):
+    """Término de frecuencia de BM25 (funciona con escalares y arreglos)."""
+    return tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length))
+
+class QueryStats:
+    """Estadísticas de la consulta sobre la colección: idf por término y largo medio."""
+
+    def __init__(self, terms: List[str], counts: Dict[str, Dict[str, int]], lengths: Dict[str, int],
+                 max_intermediate: int):
+        self.phrase_terms = terms
+        self.terms = list(dict.fromkeys(terms))
+        self.phrase_length = len(terms)
+        self.max_intermediate = max_intermediate
+        documents = len(counts)
+        self.idf = {
+            term: idf(documents, sum(1 for document in counts.values() if document.get(term)))
+            for term in self.terms
+        }
+        self.average_length = max(1.0, sum(lengths.values()) / max(1, documents))
+        # Largo de ventana de un pasaje exacto lejos de los bordes del documento
+        self.average_window = 2 * PASSAGE_WINDOW + self.phrase_length
+
+    def document_score(self, counts: Dict[str, int], length: int) -> float:
+        return sum(
+            self.idf[term] * saturation(counts.get(term, 0), length, self.average_length)
+            for term in self.terms
+        )
+
+    def upper_bound(self, counts: Dict[str, int], length: int) -> float:
+        """
+        Cota superior del puntaje de cualquier pasaje del documento: en la
+        ventana no puede haber más ocurrencias que en el documento ni que
+        palabras en la ventana, y la ventana solo se recorta en un borde del
+        documento (queda al menos la frase y PASSAGE_WINDOW palabras de un lado).
+        """
+        widest = self.average_window + self.max_intermediate * (self.phrase_length - 1)
+        narrowest = min(length, self.phrase_length + PASSAGE_WINDOW)
+        passage = sum(
+            self.idf[term] * saturation(min(counts.get(term, 0), widest), narrowest, self.average_window)
+            for term in self.terms
+        )
+        return passage + PROXIMITY_WEIGHT + DOCUMENT_WEIGHT * self.document_score(counts, length)
+
+def phrase_passages(ids: np.ndarray, term_ids: List[int], max_intermediate: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (primera_palabra, última_palabra) de cada pasaje: para cada aparición del
+    primer término, la aparición más cercana de cada término siguiente con
+    hasta max_intermediate palabras entre medio. Sin solapamiento.
+    """
+    positions = [np.flatnonzero(ids == term_id) for term_id in term_ids]
+    starts = current = positions[0]
+    for following in positions[1:]:
+        index = np.searchsorted(following, current + 1)
+        valid = index < len(following)
+        starts, current, index = starts[valid], current[valid], index[valid]
+        found = following[index]
+        near = found - current - 1 <= max_intermediate
+        starts, current = starts[near], found[near]
+
+    keep = []
+    next_free = 0
+    for i, start in enumerate(starts.tolist()):
+        if start >= next_free:
+            keep.append(i)
+            next_free = int(current[i]) + 1
+    return starts[keep], current[keep]
+
+def score_passages(document, stats: QueryStats, document_score: float) -> List[Tuple[float, int, int]]:
+    """(puntaje, inicio, fin) de los pasajes del documento, en caracteres del texto en minúsculas."""
+    tokens = document.proximity.tokens
+    term_ids = [tokens.vocabulary.get(term, -1) for term in stats.phrase_terms]
+    if any(term_id < 0 for term_id in term_ids):
+        return []
+    first, last = phrase_passages(tokens.ids, term_ids, stats.max_intermediate)
+    if len(first) == 0:
+        return []
+
+    low = np.maximum(first - PASSAGE_WINDOW, 0)
+    high = np.minimum(last + PASSAGE_WINDOW, len(tokens.ids) - 1)
+    window = high - low + 1
+    passage = np.zeros(len(first))
+    for term in stats.terms:
+        positions = np.flatnonzero(tokens.ids == tokens.vocabulary[term])
+        tf = np.searchsorted(positions, high, side='right') - np.searchsorted(positions, low, side='left')
+        passage += stats.idf[term] * saturation(tf, window, stats.average_window)
+    proximity = stats.phrase_length / (last - first + 1)
+    scores = passage + PROXIMITY_WEIGHT * proximity + DOCUMENT_WEIGHT * document_score
+
+    return list(zip(scores.tolist(), tokens.starts[first].tolist(), tokens.ends[last].tolist()))
+
+def ranked_search(corpus, phrase: str, k: int = DEFAULT_TOP_K,
+                  max_intermediate: int = DEFAULT_MAX_INTERMEDIATE,
+                  pdf_paths: List[str] = None) -> Tuple[int, MatchSet, List[float]]:
+    """
+    Los k pasajes más relevantes de la frase en los documentos de un
+    ShardedCorpus (o en los de pdf_paths). Devuelve (palabras_totales,
+    coincidencias en orden de relevancia, puntajes); las coincidencias tienen
+    el formato de la búsqueda flexible.
+    """
+    targets = corpus.targets(pdf_paths)
+    total_words = sum(corpus.documents[path]["words"] for path in targets)
+    results = MatchSet(flexible=True)
+    terms = query_terms(phrase)
+    if not terms or k <= 0:
+        return total_words, results, []
+
+    with span("ranked_search", "search", phrase=phrase, k=k, documents=len(targets)) as search_span:
+        counts = {path: corpus.terms(path) for path in targets}
+        lengths = {path: corpus.documents[path]["tokens"] for path in targets}
+        stats = QueryStats(terms, counts, lengths, max_intermediate)
+
+        # Solo pueden tener pasajes los documentos con todos los términos
+        candidates = [path for path in targets if all(counts[path].get(term) for term in stats.terms)]
+        bounds = {path: stats.upper_bound(counts[path], lengths[path]) for path in candidates}
+        candidates.sort(key=bounds.get, reverse=True)
+
+        heap: List[Tuple[float, int, str, int, int]] = []
+        sequence = 0
+        searched = 0
+        for path in candidates:
+            if len(heap) == k and bounds[path] <= heap[0][0]:
+                # Los demás documentos tienen cotas aún menores
+                break
+            searched += 1
+            document = corpus.document(path)
+            document_score = stats.document_score(counts[path], lengths[path])
+            for score, match_start, match_end in score_passages(document, stats, document_score):
+                # Con igual puntaje se queda el pasaje encontrado primero
+                entry = (score, -sequence, path, match_start, match_end)
+                sequence += 1
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+        print(f"Ranking: {searched} documentos buscados, {len(candidates) - searched} descartados por cota, "
+              f"{len(targets) - len(candidates)} sin todos los términos")
+        search_span.set(searched=searched, pruned=len(candidates) - searched,
+                        without_terms=len(targets) - len(candidates), results=len(heap))
+
+        scores = []
+        doc_ids: Dict[str, int] = {}
+        for score, _, path, match_start, match_end in sorted(heap, reverse=True):
+            document = corpus.document(path)
+            proximity = document.proximity
+            if path not in doc_ids:
+                doc_ids[path] = results.add_source(proximity.tokens.text, os.path.basename(path), path)
+            chunk_starts = [start for start, _ in proximity.chunk_bounds]
+            chunk = max(0, bisect_right(chunk_starts, match_start) - 1)
+            chunk_start, chunk_end = proximity.chunk_bounds[chunk]
+            start_pos, end_pos, flags = flexible_context(match_start, match_end, chunk_start,
+                                                         max(chunk_end, match_end))
+            results.add(doc_ids[path], start_pos, end_pos, [match_start - start_pos],
+                        match_start, match_end - match_start,
+                        proximity.page_of(match_start), proximity.chunk_ranges[chunk], flags)
+            scores.append(score)
+    return total_words, results, scores
@@ -0,0 +1,76 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Iterator, List, Tuple, Any
+from text_extractor import get_optimal_workers, get_optimal_processes
+from tracing import span
+
+# Ejecución por defecto de las búsquedas en múltiples PDFs: "thread" o "process"
+SCHEDULER_MODE = os.environ.get("PDF_SCHEDULER_MODE", "thread")
+
+def file_size(pdf_path: str) -> int:
+    try:
+        return os.path.getsize(pdf_path)
+    except OSError:
+        return 0
+
+def run_traced(function: Callable, pdf_path: str, *args) -> Any:
+    """Tarea del planificador: un archivo completo dentro de un span de la traza."""
+    with span("pdf_task", "scheduler", function=function.__name__, file=os.path.basename(pdf_path),
+              bytes=file_size(pdf_path)):
+        return function(pdf_path, *args)
+
+class PdfScheduler:
+    """
+    Planificador único para una búsqueda en múltiples PDFs.
+
+    Todo el trabajo (extracción y búsqueda de cada archivo) comparte un solo
+    presupuesto de max_workers: cada tarea procesa su archivo en serie, sin
+    crear pools propios, así que nunca hay más de max_workers hilos o procesos
+    trabajando. Los archivos más grandes se planifican primero para que el
+    último en terminar no sea uno grande que empezó tarde.
+    """
+
+    def __init__(self, max_workers: int = None, mode: str = None):
+        self.mode = mode or SCHEDULER_MODE
+        if self.mode not in ("thread", "process"):
+            raise ValueError(f"Modo de ejecución desconocido: {self.mode}")
+        if max_workers is None:
+            max_workers = get_optimal_workers() if self.mode == "thread" else get_optimal_processes()
+        self.max_workers = max(1, max_workers)
+
+    def order(self, pdf_paths: List[str]) -> List[str]:
+        """Archivos únicos, del más grande al más pequeño."""
+        return sorted(dict.fromkeys(pdf_paths), key=file_size, reverse=True)
+
+    def run(self, function: Callable, pdf_paths: List[str], *args) -> Iterator[Tuple[str, Any]]:
+        """
+        Ejecuta function(pdf_path, *args) para cada archivo y genera
+        (pdf_path, resultado) a medida que terminan. Con el modo "process",
+        function debe estar definida a nivel de módulo.
+        """
+        pending = deque(self.order(pdf_paths))
+        if not pending:
+            return
+        workers = min(self.max_workers, len(pending))
+        print(f"Planificador: {workers} {'hilos' if self.mode == 'thread' else 'procesos'} "
+              f"para {len(pending)} archivos (más grandes primero)")
+
+        executor_class = ThreadPoolExecutor if self.mode == "thread" else ProcessPoolExecutor
+        with executor_class(max_workers=workers) as executor:
+            running = {}
+            while pending or running:
+                # Solo hay max_workers tareas enviadas a la vez: el resto espera
+                # en la cola por prioridad y no en la cola interna del pool
+                while pending and len(running) < workers:
+                    pdf_path = pending.popleft()
+                    running[executor.submit(run_traced, function, pdf_path, *args)] = pdf_path
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pdf_path = running.pop(future)
+                    try:
+                        yield pdf_path, future.result()
+                    except Exception as e:
+                        print(f"Error procesando {pdf_path}: {str(e)}")
+                        yield pdf_path, None
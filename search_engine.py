@@ -1,7 +1,26 @@
+import os
 import re
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Tuple, Dict, Any
+import numpy as np
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, BrokenExecutor
+from typing import List, Tuple, Dict, Any, Union
 from text_extractor import get_optimal_workers
+from document import Document
+from proximity import WordTokens, proximity_matches, supports_phrase
+from tracing import span
+from query_cache import cached_search
+from search_limits import SearchLimits, CancelToken, gather_chunks, mark_truncated, truncation
+
+Chunks = Union[Document, List[Tuple[int, int, str]]]
+
+# Palabras intermedias permitidas por defecto entre términos en la búsqueda flexible
+DEFAULT_MAX_INTERMEDIATE = 2
+
+# Workers de las búsquedas que recorren el texto (documentos sin índice, o
+# con backend explícito): "thread" o "process" (estos leen el texto
+# normalizado desde memoria compartida, ver shared_corpus)
+SEARCH_BACKEND = os.environ.get("PDF_SEARCH_BACKEND", "thread")
 
 def clean_text(text: str) -> str:
     """Limpia el texto eliminando caracteres especiales y espacios redundantes"""
@@ -9,41 +28,188 @@ def clean_text(text: str) -> str:
     text = re.sub(r'\s+', ' ', text).strip()
     return text
 
-def find_phrase_in_chunk(text: str, phrase: str) -> List[Dict[str, Any]]:
+# Fin de oración: un punto seguido de espacio/salto de línea o al final del texto
+SENTENCE_END = re.compile(r'\.(?=[ \n\r]|\Z)')
+
+def sentence_ends(text: str, start: int = 0, end: int = None) -> np.ndarray:
     """
-    Busca coincidencias exactas de la frase en un chunk de texto.
-    Devuelve las oraciones que contienen la frase con sus posiciones.
+    Desplazamientos (exclusivos) donde termina cada oración de text[start:end],
+    calculados con una sola pasada de regex.
     """
-    clean_phrase = ' '.join(clean_text(phrase).split())
-    if not clean_phrase:
-        return []
+    if end is None:
+        end = len(text)
+    return np.fromiter((m.end() for m in SENTENCE_END.finditer(text, start, end)), dtype=np.int64)
 
-    pattern = re.compile(r'\b' + re.escape(clean_phrase) + r'\b', flags=re.IGNORECASE)
+def split_sentences(text: str) -> List[Tuple[int, str]]:
+    """
+    Divide el texto en oraciones terminadas en punto.
+    Devuelve (desplazamiento, oración) para cada oración no vacía.
+    """
     sentences = []
     current_start = 0
-    
-    for i, char in enumerate(text):
-        if char == '.' and (i == len(text)-1 or text[i+1] in (' ', '\n', '\r')):
-            sentence = text[current_start:i+1].strip()
-            if sentence:
-                sentences.append(sentence)
-            current_start = i + 1
 
-    if not sentences:
-        sentences = [text.strip()] if text.strip() else []
+    for end in sentence_ends(text).tolist():
+        raw = text[current_start:end]
+        sentence = raw.strip()
+        if sentence:
+            sentences.append((current_start + len(raw) - len(raw.lstrip()), sentence))
+        current_start = end
+
+    if not sentences and text.strip():
+        sentences = [(len(text) - len(text.lstrip()), text.strip())]
+    return sentences
+
+# Patrones compilados que se conservan entre consultas (y entre chunks de una consulta)
+PATTERN_CACHE_SIZE = 256
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def phrase_pattern(clean_phrase: str) -> re.Pattern:
+    """Regex de una frase exacta ya limpia, compilada una sola vez por frase."""
+    return re.compile(r'\b' + re.escape(clean_phrase) + r'\b', flags=re.IGNORECASE)
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def flexible_pattern(phrase_words: Tuple[str, ...], max_intermediate: int) -> re.Pattern:
+    """Regex de la búsqueda flexible (hasta max_intermediate palabras entre términos)."""
+    pattern_parts = []
+    for i, word in enumerate(phrase_words):
+        if i > 0:
+            pattern_parts.append(r'(?:\W+\w+){1,' + str(max_intermediate) + r'}\W+')
+        pattern_parts.append(re.escape(word))
+    return re.compile(r'\b' + ''.join(pattern_parts) + r'\b', flags=re.IGNORECASE)
+
+def find_phrase_matches(text: str, phrase: str) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Igual que find_phrase_in_chunk, pero devuelve también el desplazamiento
+    de la primera ocurrencia de cada coincidencia dentro de text.
+    """
+    clean_phrase = ' '.join(clean_text(phrase).split())
+    if not clean_phrase:
+        return []
+
+    pattern = phrase_pattern(clean_phrase)
 
     matches = []
-    for sentence in sentences:
+    for sentence_start, sentence in split_sentences(text):
         found = list(pattern.finditer(sentence))
         if found:
-            matches.append({
+            matches.append((sentence_start + found[0].start(), {
                 'paragraph': sentence,
                 'count': len(found),
                 'positions': [m.start() for m in found]
-            })
-    
+            }))
+
     return matches
 
+def find_phrase_in_chunk(text: str, phrase: str) -> List[Dict[str, Any]]:
+    """
+    Busca coincidencias exactas de la frase en un chunk de texto.
+    Devuelve las oraciones que contienen la frase con sus posiciones.
+    """
+    return [match for _, match in find_phrase_matches(text, phrase)]
+
+def sentence_spans(text: str, start: int, end: int, pattern: re.Pattern,
+                   candidates: List[int], ends: np.ndarray = None) -> List[Tuple[int, int, List[int]]]:
+    """
+    Verifica posiciones candidatas (ordenadas) del chunk text[start:end] con la
+    regex de la frase y las agrupa por oración. Devuelve, por cada oración con
+    coincidencias, (inicio_oración, fin_oración, posiciones_relativas).
+
+    ends son los fines de oración de text precalculados con sentence_ends; así
+    cada candidato se ubica en su oración por búsqueda binaria y el costo
+    depende del número de candidatos, no del largo del texto.
+    """
+    if ends is None:
+        ends = sentence_ends(text, start, end)
+    # Fines de oración que caen dentro del chunk
+    chunk_ends = ends[np.searchsorted(ends, start, side='right'):np.searchsorted(ends, end, side='right')]
+    sentence_of = np.searchsorted(chunk_ends, candidates, side='right').tolist()
+
+    grouped: Dict[int, List[int]] = {}
+    spans: Dict[int, Tuple[int, str]] = {}
+    last_end = -1
+    for position, s in zip(candidates, sentence_of):
+        if len(chunk_ends) == 0:
+            # Sin oraciones, el chunk completo cuenta como una
+            raw_start, raw_end = start, end
+        elif s >= len(chunk_ends):
+            # Texto después del último punto: find_phrase_in_chunk lo descarta
+            continue
+        else:
+            raw_start = int(chunk_ends[s - 1]) if s > 0 else start
+            raw_end = int(chunk_ends[s])
+
+        if s not in spans:
+            raw = text[raw_start:raw_end]
+            spans[s] = (raw_start + len(raw) - len(raw.lstrip()), raw.strip())
+        sentence_start, sentence = spans[s]
+        sentence_end = sentence_start + len(sentence)
+        # Fuera de la oración o solapada con la coincidencia anterior (como finditer)
+        if position < sentence_start or position >= sentence_end or position < last_end:
+            continue
+        found = pattern.match(text, position, sentence_end)
+        if found:
+            grouped.setdefault(s, []).append(position - sentence_start)
+            last_end = found.end()
+
+    return [
+        (spans[s][0], spans[s][0] + len(spans[s][1]), positions)
+        for s, positions in grouped.items()
+    ]
+
+def match_candidates(text: str, start: int, end: int, pattern: re.Pattern,
+                     candidates: List[int], ends: np.ndarray = None) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Igual que sentence_spans, con el mismo resultado que find_phrase_matches
+    sobre el chunk: (desplazamiento, coincidencia) por oración.
+    """
+    return [
+        (sentence_start + positions[0], {
+            'paragraph': text[sentence_start:sentence_end],
+            'count': len(positions),
+            'positions': positions
+        })
+        for sentence_start, sentence_end, positions in sentence_spans(text, start, end, pattern,
+                                                                      candidates, ends)
+    ]
+
+def clean_pages(document: Document, start_page: int, end_page: int,
+                lower: bool = False) -> Tuple[str, List[int], List[int]]:
+    """
+    Limpia un rango de páginas del documento página a página.
+    Devuelve (texto_limpio, desplazamientos_de_página, números_de_página); el
+    texto es idéntico a clean_text() del rango completo.
+    """
+    parts = []
+    offsets = []
+    page_nums = []
+    position = 0
+    for page_num in range(start_page, end_page):
+        page_text = str(document.page(page_num))
+        cleaned = clean_text(page_text.lower() if lower else page_text)
+        if not cleaned:
+            continue
+        if parts:
+            position += 1
+        offsets.append(position)
+        page_nums.append(page_num)
+        parts.append(cleaned)
+        position += len(cleaned)
+    return ' '.join(parts), offsets, page_nums
+
+def cleaned_bounds(offsets: List[int], page_nums: List[int], text_length: int,
+                   start_page: int, end_page: int) -> Tuple[int, int]:
+    """Rango [inicio, fin) del texto limpio (de clean_pages) que ocupa un rango de páginas."""
+    first = bisect_left(page_nums, start_page)
+    last = bisect_left(page_nums, end_page)
+    if first >= last:
+        position = offsets[first] if first < len(offsets) else text_length
+        return position, position
+    end = offsets[last] - 1 if last < len(offsets) else text_length
+    return offsets[first], end
+
+def page_at_offset(offsets: List[int], page_nums: List[int], position: int) -> int:
+    return page_nums[max(0, bisect_right(offsets, position) - 1)]
+
 def process_chunk_search(chunk: Tuple[int, int, str], phrase: str) -> Tuple[int, List[Dict[str, Any]]]:
     """
     Procesa un chunk de páginas (inicio, fin, texto).
@@ -61,47 +227,161 @@ def process_chunk_search(chunk: Tuple[int, int, str], phrase: str) -> Tuple[int,
     
     return word_count, matches
 
-def concurrent_search(page_chunks: List[Tuple[int, int, str]], phrase: str) -> Tuple[int, List[Dict[str, Any]]] :
-    total_words = 0
-    all_matches = []
-    
-    max_workers = get_optimal_workers()  
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [
-            executor.submit(process_chunk_search, chunk, phrase)
-            for chunk in page_chunks
+def process_document_chunk(document: Document, start_page: int, end_page: int,
+                           phrase: str) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Igual que process_chunk_search para un rango de páginas de un Document,
+    añadiendo la página exacta ('page') de cada coincidencia.
+    """
+    normalized = document.normalized
+    if normalized is not None:
+        # Reutilizar el texto ya normalizado del documento
+        start, end = cleaned_bounds(normalized.page_offsets, normalized.page_nums,
+                                    len(normalized.text), start_page, end_page)
+        cleaned_text = normalized.text[start:end]
+        word_count = sum(normalized.page_words[start_page:end_page])
+        page_of = lambda position: normalized.page_of(start + position)
+    else:
+        cleaned_text, offsets, page_nums = clean_pages(document, start_page, end_page)
+        word_count = len(cleaned_text.split())
+        page_of = lambda position: page_at_offset(offsets, page_nums, position)
+
+    matches = []
+    for position, match in find_phrase_matches(cleaned_text, phrase):
+        match['page_range'] = f"{start_page}-{end_page}"
+        match['pages'] = (start_page, end_page)
+        match['page'] = page_of(position)
+        matches.append(match)
+
+    return word_count, matches
+
+def search_chunk_traced(function, start_page: int, end_page: int, chars: int,
+                        *args) -> Tuple[int, List[Dict[str, Any]]]:
+    """Ejecuta la búsqueda de un chunk dentro de un span de la traza."""
+    with span("search_chunk", "search", function=function.__name__, start_page=start_page,
+              end_page=end_page, pages=end_page - start_page, chars=chars) as chunk_span:
+        word_count, matches = function(*args)
+        # La búsqueda de varias frases devuelve una lista de coincidencias por frase
+        found = sum(map(len, matches)) if matches and isinstance(matches[0], list) else len(matches)
+        chunk_span.set(words=word_count, matches=found)
+    return word_count, matches
+
+def _chunk_tasks(page_chunks: Chunks, document_function, chunk_function, *args) -> List[tuple]:
+    """Argumentos de search_chunk_traced para cada chunk del Document o de la lista."""
+    if isinstance(page_chunks, Document):
+        return [
+            (document_function, start, end, len(page_chunks.pages_range(start, end)),
+             page_chunks, start, end) + args
+            for start, end in page_chunks.chunk_ranges()
         ]
-        
-        for future in futures:
-            chunk_words, chunk_matches = future.result()
-            total_words += chunk_words
-            all_matches.extend(chunk_matches)
-    
-    return total_words, all_matches
+    return [
+        (chunk_function, chunk[0], chunk[1], len(chunk[2]), chunk) + args
+        for chunk in page_chunks
+    ]
 
-def find_flexible_phrase(text: str, phrase: str, max_intermediate: int = 2) -> List[Dict[str, Any]]:
+def _process_search(page_chunks: Chunks, backend: str, limits: SearchLimits, function_name: str, *args):
     """
-    Busca frases flexibles con hasta 2 palabras intermedias entre cada palabra de la frase,
-    excluyendo las coincidencias exactas.
+    Búsqueda por chunks en el pool de procesos de shared_corpus, si se pidió
+    ese backend y el documento está normalizado. Devuelve None para seguir
+    con los hilos (también si el pool de procesos falla).
+    """
+    backend = backend or SEARCH_BACKEND
+    if backend not in ("thread", "process"):
+        raise ValueError(f"Backend de búsqueda desconocido: {backend}")
+    if backend != "process" or not isinstance(page_chunks, Document) or page_chunks.normalized is None:
+        return None
+
+    import shared_corpus
+    try:
+        return shared_corpus.process_search(page_chunks, getattr(shared_corpus, function_name), *args,
+                                            limits=limits)
+    except BrokenExecutor as e:
+        print(f"Error en el pool de procesos, se usan hilos: {str(e)}")
+        return None
+
+def _thread_search(tasks: List[tuple], limits: SearchLimits) -> Tuple[int, List[Dict[str, Any]]]:
+    """Ejecuta las tareas de _chunk_tasks en un pool de hilos, respetando los límites."""
+    max_workers = get_optimal_workers()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        total_words, all_matches, reason = gather_chunks(executor, search_chunk_traced, tasks,
+                                                         max_workers, limits)
+    finally:
+        # Tras un corte no se espera a los chunks en curso
+        executor.shutdown(wait=False, cancel_futures=True)
+    return total_words, mark_truncated(all_matches, reason, limits)
+
+def _limited_search(page_chunks: Chunks, query: tuple, limits: SearchLimits, function, *args):
+    """
+    (resultado, acierto_de_caché) de una búsqueda con límites. Si la búsqueda
+    ya está cancelada o vencida no se busca ni se lee la caché: el resultado
+    es vacío y truncado. Un resultado truncado no se guarda en la caché, y con
+    max_results no se lee de ella (el resultado guardado puede tener más
+    coincidencias que el máximo).
+    """
+    reason = limits.stop_reason()
+    if reason is not None:
+        return (0, mark_truncated([], reason, limits)), False
+    if limits.max_results is not None:
+        return function(*args), False
+    return cached_search(page_chunks, query, function, *args)
+
+def concurrent_search(page_chunks: Chunks, phrase: str, backend: str = None, max_results: int = None,
+                      deadline: float = None, cancel: CancelToken = None) -> Tuple[int, List[Dict[str, Any]]] :
+    """
+    Búsqueda concurrente de la frase exacta. max_results, deadline (instante
+    de time.monotonic()) y cancel limitan la búsqueda: al alcanzarse uno se
+    devuelven las coincidencias encontradas hasta ese momento, con la razón
+    en su atributo truncated (ver search_limits).
+
+    Sin backend, un Document con índice se busca en el índice y uno sin
+    índice se recorre con SEARCH_BACKEND. Con backend ("thread" o "process")
+    el texto se recorre siempre con esos workers, aunque haya índice.
+    """
+    limits = SearchLimits(max_results, deadline, cancel)
+    with span("exact_search", "search", phrase=phrase) as search_span:
+        (total_words, matches), cached = _limited_search(page_chunks, ("exact", phrase, backend), limits,
+                                                         _concurrent_search, page_chunks, phrase,
+                                                         backend, limits)
+        search_span.set(words=total_words, matches=len(matches), cached=cached,
+                        truncated=truncation(matches),
+                        indexed=backend is None and isinstance(page_chunks, Document)
+                        and page_chunks.index is not None)
+    return total_words, matches
+
+def _concurrent_search(page_chunks: Chunks, phrase: str, backend: str = None,
+                       limits: SearchLimits = None) -> Tuple[int, List[Dict[str, Any]]]:
+    # Con índice construido la búsqueda no vuelve a recorrer el texto, salvo
+    # que se pidan workers explícitamente
+    if backend is None and isinstance(page_chunks, Document) and page_chunks.index is not None:
+        return page_chunks.index.search(phrase, limits)
+
+    result = _process_search(page_chunks, backend, limits, "exact_shared_chunk", phrase)
+    if result is not None:
+        return result
+
+    return _thread_search(_chunk_tasks(page_chunks, process_document_chunk, process_chunk_search, phrase),
+                          limits)
+
+def find_flexible_matches(cleaned_text: str, phrase: str,
+                          max_intermediate: int = DEFAULT_MAX_INTERMEDIATE) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Busca frases flexibles sobre un texto ya limpio y en minúsculas.
+    Devuelve (desplazamiento, coincidencia) para cada resultado.
     """
-    cleaned_text = clean_text(text.lower())
     phrase_words = [w.lower() for w in phrase.split()]
     
     if len(phrase_words) < 2:
         print("La frase debe contener al menos dos palabras.")
         return []
     
-    # Construir patrón regex flexible que excluya coincidencias exactas
-    pattern_parts = []
-    for i, word in enumerate(phrase_words):
-        if i > 0:
-            pattern_parts.append(r'(?:\W+\w+){1,' + str(max_intermediate) + r'}\W+')
-        pattern_parts.append(re.escape(word))
+    # Motor lineal sobre ids de palabras (sin backtracking) cuando es aplicable
+    if supports_phrase(phrase_words):
+        tokens = WordTokens(cleaned_text)
+        return proximity_matches(tokens, 0, len(cleaned_text), phrase, phrase_words, max_intermediate)
     
-    # Unir el patrón completo
-    full_pattern = r'\b' + ''.join(pattern_parts) + r'\b'
-    pattern = re.compile(full_pattern, flags=re.IGNORECASE)
+    # Patrón regex flexible; las coincidencias exactas se excluyen abajo
+    pattern = flexible_pattern(tuple(phrase_words), max_intermediate)
     
     # Buscar coincidencias con contexto
     matches = []
@@ -118,20 +398,30 @@ def find_flexible_phrase(text: str, phrase: str, max_intermediate: int = 2) -> L
             if end_pos < len(cleaned_text):
                 context = context + "..."
             
-            matches.append({
+            matches.append((match.start(), {
                 'paragraph': context,
                 'original': matched_text,
                 'count': 1,
                 'positions': [match.start() - start_pos]
-            })
+            }))
     
     return matches
 
-def process_flexible_search(chunk: Tuple[int, int, str], phrase: str) -> Tuple[int, List[Dict[str, Any]]]:
+def find_flexible_phrase(text: str, phrase: str,
+                         max_intermediate: int = DEFAULT_MAX_INTERMEDIATE) -> List[Dict[str, Any]]:
+    """
+    Busca frases flexibles con hasta max_intermediate palabras intermedias entre
+    cada palabra de la frase, excluyendo las coincidencias exactas.
+    """
+    cleaned_text = clean_text(text.lower())
+    return [match for _, match in find_flexible_matches(cleaned_text, phrase, max_intermediate)]
+
+def process_flexible_search(chunk: Tuple[int, int, str], phrase: str,
+                            max_intermediate: int = DEFAULT_MAX_INTERMEDIATE) -> Tuple[int, List[Dict[str, Any]]]:
     """Procesa un chunk para búsqueda flexible"""
     start_page, end_page, text = chunk
     word_count = len(clean_text(text).split())
-    matches = find_flexible_phrase(text, phrase)
+    matches = find_flexible_phrase(text, phrase, max_intermediate)
     
     for match in matches:
         match['page_range'] = f"{start_page}-{end_page}"
@@ -139,22 +429,59 @@ def process_flexible_search(chunk: Tuple[int, int, str], phrase: str) -> Tuple[i
     
     return word_count, matches
 
-def flexible_search(page_chunks: List[Tuple[int, int, str]], phrase: str) -> Tuple[int, List[Dict[str, Any]]]:
-    """Búsqueda concurrente flexible"""
-    total_words = 0
-    all_matches = []
-    
-    max_workers = get_optimal_workers()
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [
-            executor.submit(process_flexible_search, chunk, phrase)
-            for chunk in page_chunks
-        ]
-        
-        for future in futures:
-            chunk_words, chunk_matches = future.result()
-            total_words += chunk_words
-            all_matches.extend(chunk_matches)
-    
-    return total_words, all_matches
\ No newline at end of file
+def process_document_flexible(document: Document, start_page: int, end_page: int, phrase: str,
+                              max_intermediate: int = DEFAULT_MAX_INTERMEDIATE) -> Tuple[int, List[Dict[str, Any]]]:
+    """Búsqueda flexible en un rango de páginas de un Document, con página exacta"""
+    normalized = document.normalized
+    if normalized is not None:
+        start, end = cleaned_bounds(normalized.lower_offsets, normalized.lower_nums,
+                                    len(normalized.lower), start_page, end_page)
+        cleaned_text = normalized.lower[start:end]
+        page_of = lambda position: normalized.lower_page_of(start + position)
+    else:
+        cleaned_text, offsets, page_nums = clean_pages(document, start_page, end_page, lower=True)
+        page_of = lambda position: page_at_offset(offsets, page_nums, position)
+    word_count = len(cleaned_text.split())
+
+    matches = []
+    for position, match in find_flexible_matches(cleaned_text, phrase, max_intermediate):
+        match['page_range'] = f"{start_page}-{end_page}"
+        match['pages'] = (start_page, end_page)
+        match['page'] = page_of(position)
+        matches.append(match)
+
+    return word_count, matches
+
+def flexible_search(page_chunks: Chunks, phrase: str,
+                    max_intermediate: int = DEFAULT_MAX_INTERMEDIATE,
+                    backend: str = None, max_results: int = None, deadline: float = None,
+                    cancel: CancelToken = None) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Búsqueda concurrente flexible, con los mismos límites y la misma elección
+    entre índice y backend que concurrent_search
+    """
+    limits = SearchLimits(max_results, deadline, cancel)
+    with span("flexible_search", "search", phrase=phrase, max_intermediate=max_intermediate) as search_span:
+        query = ("flexible", phrase, max_intermediate, backend)
+        (total_words, matches), cached = _limited_search(page_chunks, query, limits, _flexible_search,
+                                                         page_chunks, phrase, max_intermediate, backend, limits)
+        search_span.set(words=total_words, matches=len(matches), cached=cached,
+                        truncated=truncation(matches),
+                        indexed=backend is None and isinstance(page_chunks, Document)
+                        and page_chunks.proximity is not None)
+    return total_words, matches
+
+def _flexible_search(page_chunks: Chunks, phrase: str, max_intermediate: int,
+                     backend: str = None, limits: SearchLimits = None) -> Tuple[int, List[Dict[str, Any]]]:
+    # Con el documento ya tokenizado no se vuelve a limpiar el texto, salvo
+    # que se pidan workers explícitamente
+    if (backend is None and isinstance(page_chunks, Document) and page_chunks.proximity is not None
+            and supports_phrase([w.lower() for w in phrase.split()])):
+        return page_chunks.proximity.search(phrase, max_intermediate, limits)
+
+    result = _process_search(page_chunks, backend, limits, "flexible_shared_chunk", phrase, max_intermediate)
+    if result is not None:
+        return result
+
+    return _thread_search(_chunk_tasks(page_chunks, process_document_flexible, process_flexible_search,
+                                       phrase, max_intermediate), limits)
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""
+Límites de una búsqueda: máximo de resultados, plazo y cancelación
+cooperativa.
+
+Las búsquedas por chunks revisan los límites entre un chunk y el siguiente:
+al alcanzarse uno no se programan más chunks, se cancelan los pendientes y
+se devuelven las coincidencias de los chunks ya terminados (en orden),
+marcadas con la razón del corte en el atributo truncated. Un chunk que ya
+se está procesando no se interrumpe.
+
+El plazo es un instante de time.monotonic() (ver deadline_after), así se
+puede repartir un mismo plazo entre varias búsquedas.
+"""
+import signal
+import threading
+import time
+from concurrent.futures import Executor, Future, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from typing import List, Tuple, Dict, Any, Callable, Optional
+from match_set import MatchSet
+
+# Razones por las que un resultado queda truncado
+MAX_RESULTS = "max_results"
+DEADLINE = "deadline"
+CANCELLED = "cancelled"
+
+# Cada cuánto se revisa el token de cancelación mientras se esperan chunks
+CANCEL_POLL_SECONDS = 0.1
+# Chunks programados a la vez por worker cuando hay límites
+CHUNKS_PER_WORKER = 2
+
+class CancelToken:
+    """Señal de cancelación compartida entre quien busca y quien quiere abortar."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @contextmanager
+    def on_interrupt(self):
+        """
+        Durante el bloque, Ctrl+C cancela la búsqueda (que devuelve lo
+        encontrado hasta ese momento) en lugar de interrumpir el programa.
+        Solo tiene efecto en el hilo principal.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            yield self
+            return
+        previous = signal.signal(signal.SIGINT, lambda signum, frame: self.cancel())
+        try:
+            yield self
+        finally:
+            signal.signal(signal.SIGINT, previous)
+
+def deadline_after(seconds: float) -> float:
+    """Plazo que vence dentro de seconds segundos."""
+    return time.monotonic() + seconds
+
+class PartialMatches(list):
+    """Lista de coincidencias (búsqueda sin MatchSet) con la razón del truncamiento."""
+    truncated: str = None
+
+class SearchLimits:
+    """Límites de una búsqueda; sin ninguno, la búsqueda es completa."""
+
+    def __init__(self, max_results: int = None, deadline: float = None, cancel: CancelToken = None):
+        self.max_results = max_results
+        self.deadline = deadline
+        self.cancel = cancel
+
+    @property
+    def active(self) -> bool:
+        return self.max_results is not None or self.deadline is not None or self.cancel is not None
+
+    def stop_reason(self, found: int = 0) -> Optional[str]:
+        """Razón para dejar de buscar con found coincidencias, o None para seguir."""
+        if self.cancel is not None and self.cancel.cancelled:
+            return CANCELLED
+        if self.max_results is not None and found >= self.max_results:
+            return MAX_RESULTS
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return DEADLINE
+        return None
+
+    def wait_timeout(self) -> Optional[float]:
+        """Cuánto esperar un chunk antes de volver a revisar los límites."""
+        timeout = None
+        if self.deadline is not None:
+            timeout = max(0.0, self.deadline - time.monotonic())
+        if self.cancel is not None:
+            timeout = CANCEL_POLL_SECONDS if timeout is None else min(timeout, CANCEL_POLL_SECONDS)
+        return timeout
+
+def truncation(matches) -> Optional[str]:
+    """Razón por la que un resultado quedó truncado, o None si está completo."""
+    return getattr(matches, "truncated", None)
+
+def mark_truncated(matches, reason: Optional[str], limits: SearchLimits = None):
+    """
+    Recorta las coincidencias a limits.max_results y las marca con la razón
+    del corte. Devuelve las mismas coincidencias si no hubo corte.
+
+    El total de palabras que acompaña a un resultado truncado es, en todas
+    las búsquedas (con índice, hilos o procesos), el de los chunks recorridos
+    hasta el corte, no el del documento completo (0 si se cortó antes de
+    empezar). Con max_results es el de los chunks hasta el que alcanzó el
+    máximo, inclusive.
+    """
+    if limits is not None and limits.max_results is not None and len(matches) > limits.max_results:
+        if isinstance(matches, MatchSet):
+            matches.truncate(limits.max_results)
+        else:
+            del matches[limits.max_results:]
+        reason = reason or MAX_RESULTS
+    if reason is None:
+        return matches
+    if not isinstance(matches, MatchSet):
+        matches = PartialMatches(matches)
+    matches.truncated = reason
+    return matches
+
+def gather_chunks(executor: Executor, function: Callable, tasks: List[tuple], workers: int,
+                  limits: SearchLimits = None) -> Tuple[int, List[Dict[str, Any]], Optional[str]]:
+    """
+    Ejecuta function(*task) para cada chunk en el executor y junta
+    (palabras, coincidencias) en el orden de los chunks. Devuelve
+    (total_palabras, coincidencias, razón_del_corte).
+
+    Sin límites se programan todos los chunks de una vez. Con límites se
+    mantienen como máximo CHUNKS_PER_WORKER * workers en curso; al cortar se
+    cancelan los que no empezaron y se descartan los terminados después de un
+    chunk que falta, para que el resultado parcial sea un prefijo del completo.
+    """
+    total_words = 0
+    all_matches = []
+    if limits is None or not limits.active:
+        futures = [executor.submit(function, *task) for task in tasks]
+        for future in futures:
+            chunk_words, chunk_matches = future.result()
+            total_words += chunk_words
+            all_matches.extend(chunk_matches)
+        return total_words, all_matches, None
+
+    window = max(1, CHUNKS_PER_WORKER * workers)
+    pending: Dict[Future, int] = {}
+    finished: Dict[int, Tuple[int, List[Dict[str, Any]]]] = {}
+    submitted = 0
+    next_chunk = 0
+    reason = None
+    try:
+        while next_chunk < len(tasks):
+            reason = limits.stop_reason(len(all_matches))
+            if reason is not None:
+                break
+            while submitted < len(tasks) and len(pending) < window:
+                pending[executor.submit(function, *tasks[submitted])] = submitted
+                submitted += 1
+
+            done, _ = wait(pending, timeout=limits.wait_timeout(), return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[pending.pop(future)] = future.result()
+            while next_chunk in finished and not (limits.max_results is not None
+                                                  and len(all_matches) >= limits.max_results):
+                chunk_words, chunk_matches = finished.pop(next_chunk)
+                total_words += chunk_words
+                all_matches.extend(chunk_matches)
+                next_chunk += 1
+    finally:
+        for future in pending:
+            future.cancel()
+    return total_words, all_matches, reason
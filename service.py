@@ -0,0 +1,331 @@
+"""
+Servicio local de búsqueda: mantiene los documentos cargados en memoria y
+atiende consultas concurrentes de varios clientes por HTTP (localhost o
+socket Unix). El bucle de eventos de asyncio solo recibe y responde; la
+extracción y las búsquedas se ejecutan en un pool de workers.
+
+Endpoints (JSON):
+    GET  /health                     -> {"status": "ok"}
+    GET  /stats                      -> documentos cargados, métricas de consultas y de la caché
+    POST /load    {"path": ...}      -> {"name": ...}
+    POST /unload  {"name": ...}      -> {"unloaded": true|false}
+    POST /search  {"mode": ..., "phrase": ..., "pdf": ...}  -> {"results": [...]}
+                  (con "max_results" y "timeout_ms" opcionales; ver corpus.run_query)
+
+Uso:
+    python service.py --port 8765 [--preload libro.pdf ...]
+    python service.py --unix /tmp/busqueda.sock
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
+from corpus import Corpus, run_query
+from query_cache import QUERY_CACHE
+from text_extractor import get_optimal_workers
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Tamaño máximo del cuerpo de una petición
+MAX_BODY_BYTES = 1 << 20
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class ServiceStats:
+    """Contadores de peticiones y latencias por endpoint."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.latency_ms: Dict[str, float] = {}
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, latency_ms: float, ok: bool):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.latency_ms[endpoint] = self.latency_ms.get(endpoint, 0.0) + latency_ms
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "uptime_s": round(time.time() - self.started, 3),
+                "in_flight": self.in_flight,
+                "endpoints": {
+                    endpoint: {
+                        "requests": count,
+                        "errors": self.errors.get(endpoint, 0),
+                        "mean_latency_ms": round(self.latency_ms[endpoint] / count, 3),
+                    }
+                    for endpoint, count in self.requests.items()
+                },
+            }
+
+class SearchService:
+    """
+    Corpus residente servido por HTTP/1.1 mínimo (con conexiones persistentes).
+    Las operaciones costosas se delegan a un ThreadPoolExecutor.
+    """
+
+    def __init__(self, corpus: Corpus = None, max_workers: int = None):
+        self.corpus = corpus if corpus is not None else Corpus()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or get_optimal_workers())
+        self.stats = ServiceStats()
+        self.routes = {
+            ("GET", "/health"): self.handle_health,
+            ("GET", "/stats"): self.handle_stats,
+            ("POST", "/load"): self.handle_load,
+            ("POST", "/unload"): self.handle_unload,
+            ("POST", "/search"): self.handle_search,
+        }
+
+    async def run_in_pool(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    # --- Endpoints ---
+
+    async def handle_health(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        return {"status": "ok"}
+
+    async def handle_stats(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        documents = {
+            name: {
+                "source": document.source,
+                "pages": document.num_pages,
+                "chars": len(document),
+                "words": document.normalized.total_words if document.normalized is not None else None,
+            }
+            for name, document in list(self.corpus.documents.items())
+        }
+        return {"documents": documents, "workers": self.executor._max_workers,
+                "query_cache": QUERY_CACHE.stats(), **self.stats.snapshot()}
+
+    async def handle_load(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        path = body.get("path")
+        if not path:
+            raise HTTPError(400, "Falta el campo 'path'")
+        if not os.path.exists(path):
+            raise HTTPError(404, f"El archivo {path} no existe")
+        start_time = time.perf_counter()
+        name = await self.run_in_pool(self.corpus.load, path)
+        document = self.corpus.get(name)
+        return {"name": name, "pages": document.num_pages,
+                "load_ms": round((time.perf_counter() - start_time) * 1000, 3)}
+
+    async def handle_unload(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        name = body.get("name")
+        if not name:
+            raise HTTPError(400, "Falta el campo 'name'")
+        return {"unloaded": self.corpus.unload(name)}
+
+    async def handle_search(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        if body.get("mode", "exact") in ("exact", "flexible", "fuzzy") and not body.get("phrase"):
+            raise HTTPError(400, "Falta el campo 'phrase'")
+        targets = body.get("pdf") or self.corpus.names()
+        if isinstance(targets, str):
+            targets = [targets]
+        try:
+            documents = [(name, self.corpus.get(name)) for name in targets]
+        except LookupError as e:
+            raise HTTPError(404, str(e))
+
+        results = await asyncio.gather(*(
+            self.run_in_pool(self._timed_query, name, document, body)
+            for name, document in documents
+        ))
+        return {"results": results}
+
+    @staticmethod
+    def _timed_query(name: str, document, query: Dict[str, Any]) -> Dict[str, Any]:
+        start_time = time.perf_counter()
+        result = run_query(document, query)
+        return {"pdf": name, **result, "latency_ms": round((time.perf_counter() - start_time) * 1000, 3)}
+
+    # --- Protocolo HTTP ---
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, raw_body = request
+                status, payload = await self.dispatch(method, path, raw_body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            self._write_response(writer, e.status, {"error": str(e)}, False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Línea de petición inválida")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0) or 0)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Cuerpo de la petición demasiado grande")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    async def dispatch(self, method: str, path: str, raw_body: bytes) -> Tuple[int, Dict[str, Any]]:
+        start_time = time.perf_counter()
+        handler = self.routes.get((method, path))
+        status = 200
+        self.stats.in_flight += 1
+        try:
+            if handler is None:
+                known = any(route_path == path for _, route_path in self.routes)
+                raise HTTPError(405 if known else 404, f"Ruta no disponible: {method} {path}")
+            try:
+                body = json.loads(raw_body) if raw_body else {}
+            except json.JSONDecodeError as e:
+                raise HTTPError(400, f"JSON inválido: {str(e)}")
+            if not isinstance(body, dict):
+                raise HTTPError(400, "El cuerpo debe ser un objeto JSON")
+            payload = await handler(body)
+        except HTTPError as e:
+            status, payload = e.status, {"error": str(e)}
+        except (KeyError, ValueError) as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": str(e)}
+        finally:
+            self.stats.in_flight -= 1
+        self.stats.record(path if handler else "other", (time.perf_counter() - start_time) * 1000, status == 200)
+        return status, payload
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    # --- Arranque ---
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    unix_path: str = None) -> asyncio.AbstractServer:
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.remove(unix_path)
+            return await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_path: str = None):
+        server = await self.start(host, port, unix_path)
+        where = unix_path or "http://%s:%d" % server.sockets[0].getsockname()[:2]
+        print(f"Servicio de búsqueda escuchando en {where}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=False)
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, unix_path: str, timeout: float = None):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = unix_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+class ServiceClient:
+    """Cliente local del servicio (una conexión persistente por cliente)."""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 unix_path: str = None, timeout: float = 300):
+        if unix_path:
+            self.connection = _UnixHTTPConnection(unix_path, timeout)
+        else:
+            self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def request(self, method: str, path: str, body: Dict[str, Any] = None) -> Tuple[int, Dict[str, Any]]:
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        self.connection.request(method, path, body=data, headers=headers)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read() or b"{}")
+
+    def load(self, path: str) -> Dict[str, Any]:
+        return self.request("POST", "/load", {"path": path})[1]
+
+    def unload(self, name: str) -> Dict[str, Any]:
+        return self.request("POST", "/unload", {"name": name})[1]
+
+    def search(self, phrase: str, mode: str = "exact", **options) -> Dict[str, Any]:
+        return self.request("POST", "/search", {"mode": mode, "phrase": phrase, **options})[1]
+
+    def stats(self) -> Dict[str, Any]:
+        return self.request("GET", "/stats")[1]
+
+    def close(self):
+        self.connection.close()
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Servicio local de búsqueda en PDFs")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="Ruta de un socket Unix (en lugar de TCP)")
+    parser.add_argument("--workers", type=int, help="Workers para extracción y búsqueda")
+    parser.add_argument("--backend", default="process", choices=("thread", "process"),
+                        help="Backend de extracción")
+    parser.add_argument("--preload", nargs="*", default=[], help="PDFs a cargar al iniciar")
+    args = parser.parse_args(argv)
+
+    service = SearchService(Corpus(backend=args.backend), max_workers=args.workers)
+    for pdf_path in args.preload:
+        print(f"Cargado {service.corpus.load(pdf_path)}")
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print("\nServicio detenido")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+"""
+Índice persistente para las búsquedas en múltiples PDFs: un fragmento (shard)
+por documento, con el documento ya extraído, normalizado e indexado, y un
+manifiesto con el estado de cada archivo. Agregar, quitar o modificar un PDF
+solo reconstruye su propio fragmento; las consultas se reparten entre los
+fragmentos y se combinan los resultados.
+
+Uso:
+    python shard_index.py add libro1.pdf libro2.pdf
+    python shard_index.py remove libro1.pdf
+    python shard_index.py refresh
+    python shard_index.py list
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+import zlib
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Any, Tuple
+from document import Document
+from corpus import load_document
+from search_engine import flexible_search, DEFAULT_MAX_INTERMEDIATE
+from multi_phrase import multi_phrase_search
+from match_set import MatchSet
+from scheduler import PdfScheduler
+from tracing import span
+
+SHARD_DIR = os.environ.get(
+    "PDF_SHARD_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "analisis_de_datos", "shards")
+)
+# Fragmentos que se mantienen cargados en memoria entre consultas
+MAX_RESIDENT_SHARDS = int(os.environ.get("PDF_SHARD_MEMORY", 32))
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 2
+SHARD_MAGIC = b"PDFSHARD1\n"
+SHARD_SUFFIX = ".shard"
+# Frecuencias de palabras de cada documento, sin el texto (ver term_counts)
+TERMS_MAGIC = b"PDFTERMS1\n"
+TERMS_SUFFIX = ".terms"
+
+def shard_name(pdf_path: str) -> str:
+    """Nombre estable del fragmento, derivado de la ruta absoluta del PDF."""
+    return hashlib.sha1(os.path.abspath(pdf_path).encode("utf-8")).hexdigest()[:24] + SHARD_SUFFIX
+
+def _file_state(pdf_path: str) -> Tuple[int, int]:
+    stat = os.stat(pdf_path)
+    return stat.st_size, stat.st_mtime_ns
+
+def _write_atomic(path: str, payload: bytes):
+    """Escritura atómica: un fragmento o manifiesto nunca queda a medias."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def term_counts(document: Document) -> Dict[str, int]:
+    """Ocurrencias de cada palabra del texto limpio en minúsculas (índice de proximidad)."""
+    tokens = document.proximity.tokens
+    counts = np.bincount(tokens.ids, minlength=len(tokens.vocabulary))
+    return {word: int(counts[word_id]) for word, word_id in tokens.vocabulary.items()}
+
+def build_shard(pdf_path: str, shard_dir: str) -> Dict[str, Any]:
+    """
+    Extrae, normaliza e indexa un PDF y guarda el Document resultante en su
+    fragmento, y aparte sus frecuencias de palabras (para el ranking, que así
+    descarta documentos sin cargarlos). Devuelve la entrada del manifiesto.
+    Se ejecuta dentro de una tarea del planificador, así que la extracción es
+    en serie.
+    """
+    size, mtime_ns = _file_state(pdf_path)
+    start_time = time.perf_counter()
+    document = load_document(pdf_path, backend="serial")
+    document.term_table = None
+    payload = SHARD_MAGIC + zlib.compress(pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    terms = TERMS_MAGIC + zlib.compress(pickle.dumps(term_counts(document), protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+    name = shard_name(pdf_path)
+    terms_name = name[:-len(SHARD_SUFFIX)] + TERMS_SUFFIX
+    _write_atomic(os.path.join(shard_dir, name), payload)
+    _write_atomic(os.path.join(shard_dir, terms_name), terms)
+    return {
+        "shard": name,
+        "terms": terms_name,
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "pages": document.num_pages,
+        "words": document.normalized.total_words,
+        "tokens": len(document.proximity.tokens.ids),
+        "shard_bytes": len(payload),
+        "build_seconds": round(time.perf_counter() - start_time, 3),
+        "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def _load_payload(path: str, magic: bytes) -> Any:
+    with open(path, 'rb') as file:
+        data = file.read()
+    if not data.startswith(magic):
+        raise ValueError(f"Fragmento inválido: {path}")
+    return pickle.loads(zlib.decompress(data[len(magic):]))
+
+def load_shard(shard_file: str) -> Document:
+    return _load_payload(shard_file, SHARD_MAGIC)
+
+def load_terms(terms_file: str) -> Dict[str, int]:
+    return _load_payload(terms_file, TERMS_MAGIC)
+
+class ShardedCorpus:
+    """
+    Colección persistente de documentos indexados, uno por fragmento.
+    El manifiesto registra por ruta absoluta el fragmento y el tamaño y mtime
+    del PDF con que se construyó; un PDF cambió si alguno de los dos difiere.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or SHARD_DIR
+        os.makedirs(self.root, exist_ok=True)
+        self.manifest_file = os.path.join(self.root, MANIFEST_FILE)
+        self.documents: Dict[str, Dict[str, Any]] = self._load_manifest()
+        self._resident: "OrderedDict[str, Document]" = OrderedDict()
+        # Frecuencias de palabras por documento: pequeñas, se mantienen todas
+        self._terms: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    # --- Manifiesto ---
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_file, encoding="utf-8") as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Manifiesto ilegible, se reconstruirán los fragmentos: {str(e)}")
+            return {}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        return manifest.get("documents", {})
+
+    def _save_manifest(self):
+        manifest = {"version": MANIFEST_VERSION, "documents": self.documents}
+        _write_atomic(self.manifest_file, json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8"))
+
+    # --- Mantenimiento ---
+
+    def is_current(self, pdf_path: str) -> bool:
+        """El fragmento existe y corresponde al PDF tal como está en disco."""
+        entry = self.documents.get(os.path.abspath(pdf_path))
+        if entry is None or not os.path.exists(os.path.join(self.root, entry["shard"])):
+            return False
+        try:
+            return (entry["size"], entry["mtime_ns"]) == _file_state(pdf_path)
+        except OSError:
+            return False
+
+    def sync(self, pdf_paths: List[str]) -> Dict[str, List[str]]:
+        """
+        Deja al día los fragmentos de los PDFs indicados: solo se construyen
+        los nuevos o modificados. Devuelve las rutas por estado.
+        """
+        status: Dict[str, List[str]] = {"added": [], "updated": [], "unchanged": [], "missing": [], "failed": []}
+        stale = []
+        for pdf_path in dict.fromkeys(os.path.abspath(path) for path in pdf_paths):
+            if not os.path.exists(pdf_path):
+                print(f"\nEl archivo {pdf_path} no existe, omitiendo...")
+                status["missing"].append(pdf_path)
+            elif self.is_current(pdf_path):
+                status["unchanged"].append(pdf_path)
+            else:
+                stale.append(pdf_path)
+
+        if stale:
+            print(f"Construyendo {len(stale)} fragmentos ({len(status['unchanged'])} sin cambios)...")
+            for pdf_path, entry in PdfScheduler().run(build_shard, stale, self.root):
+                if entry is None:
+                    status["failed"].append(pdf_path)
+                    continue
+                status["updated" if pdf_path in self.documents else "added"].append(pdf_path)
+                with self._lock:
+                    self.documents[pdf_path] = entry
+                    self._resident.pop(pdf_path, None)
+                    self._terms.pop(pdf_path, None)
+            self._save_manifest()
+        return status
+
+    def remove(self, pdf_path: str) -> bool:
+        """Quita un PDF de la colección y borra su fragmento."""
+        pdf_path = os.path.abspath(pdf_path)
+        with self._lock:
+            entry = self.documents.pop(pdf_path, None)
+            self._resident.pop(pdf_path, None)
+            self._terms.pop(pdf_path, None)
+        if entry is None:
+            return False
+        for name in (entry["shard"], entry["terms"]):
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError:
+                pass
+        self._save_manifest()
+        return True
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """Reconstruye los fragmentos de PDFs modificados y quita los de PDFs borrados."""
+        removed = [path for path in list(self.documents) if not os.path.exists(path)]
+        for pdf_path in removed:
+            self.remove(pdf_path)
+        status = self.sync(list(self.documents))
+        status["removed"] = removed
+        return status
+
+    # --- Consultas ---
+
+    def document(self, pdf_path: str) -> Document:
+        """Documento de un fragmento, desde memoria o desde disco."""
+        pdf_path = os.path.abspath(pdf_path)
+        with self._lock:
+            document = self._resident.get(pdf_path)
+            if document is not None:
+                self._resident.move_to_end(pdf_path)
+                return document
+            entry = self.documents[pdf_path]
+
+        with span("load_shard", "shard", file=os.path.basename(pdf_path), bytes=entry["shard_bytes"]):
+            document = load_shard(os.path.join(self.root, entry["shard"]))
+        with self._lock:
+            self._resident[pdf_path] = document
+            while len(self._resident) > MAX_RESIDENT_SHARDS:
+                self._resident.popitem(last=False)
+        return document
+
+    def terms(self, pdf_path: str) -> Dict[str, int]:
+        """Frecuencias de palabras de un documento, sin cargar su fragmento."""
+        pdf_path = os.path.abspath(pdf_path)
+        with self._lock:
+            counts = self._terms.get(pdf_path)
+            if counts is not None:
+                return counts
+            entry = self.documents[pdf_path]
+        counts = load_terms(os.path.join(self.root, entry["terms"]))
+        with self._lock:
+            self._terms[pdf_path] = counts
+        return counts
+
+    def targets(self, pdf_paths: List[str] = None) -> List[str]:
+        """Rutas absolutas indexadas entre pdf_paths (todas si no se indican), sin repetir."""
+        targets = [os.path.abspath(path) for path in pdf_paths] if pdf_paths else list(self.documents)
+        return [path for path in dict.fromkeys(targets) if path in self.documents]
+
+    def _fan_out(self, function, pdf_paths: List[str] = None, *args) -> List[Tuple[str, Any]]:
+        """Ejecuta function(documento, *args) en cada fragmento; resultados en el orden de pdf_paths."""
+        targets = self.targets(pdf_paths)
+
+        def search_shard(pdf_path, *args):
+            return function(self.document(pdf_path), *args)
+
+        # Hilos: los resultados apuntan al texto de cada documento y no se copian
+        results = dict(PdfScheduler(mode="thread").run(search_shard, targets, *args))
+        return [(path, results[path]) for path in targets if results.get(path) is not None]
+
+    def flexible_search(self, phrase: str, max_intermediate: int = DEFAULT_MAX_INTERMEDIATE,
+                        pdf_paths: List[str] = None) -> Tuple[int, MatchSet]:
+        """Búsqueda flexible en todos los fragmentos (o en los de pdf_paths)."""
+        total_words = 0
+        all_matches = MatchSet(flexible=True)
+        for pdf_path, (words, matches) in self._fan_out(flexible_search, pdf_paths, phrase, max_intermediate):
+            total_words += words
+            all_matches.extend(_tag_matches(matches, pdf_path, flexible=True))
+        return total_words, all_matches
+
+    def phrase_search(self, phrases: List[str], pdf_paths: List[str] = None) -> Tuple[int, Dict[str, MatchSet]]:
+        """Búsqueda exacta de varias frases en todos los fragmentos (o en los de pdf_paths)."""
+        total_words = 0
+        all_results: Dict[str, MatchSet] = {phrase: MatchSet() for phrase in dict.fromkeys(phrases)}
+
+        def search(document, phrases):
+            return multi_phrase_search(document, phrases, max_workers=1)
+
+        for pdf_path, (words, results) in self._fan_out(search, pdf_paths, phrases):
+            total_words += words
+            for phrase, matches in results.items():
+                all_results.setdefault(phrase, MatchSet()).extend(_tag_matches(matches, pdf_path))
+        return total_words, all_results
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+def _tag_matches(matches, pdf_path: str, flexible: bool = False) -> MatchSet:
+    """Coincidencias de un documento con su archivo asociado (pdf_name y pdf_path)."""
+    if isinstance(matches, MatchSet):
+        # Los arreglos ya apuntan al texto del documento: solo se nombra la
+        # fuente, en una copia (el resultado puede venir de la caché de consultas
+        # y ser el mismo para dos PDFs con igual texto)
+        return matches.named(os.path.basename(pdf_path), pdf_path)
+    tagged = MatchSet(flexible=flexible)
+    doc_id = tagged.add_source(name=os.path.basename(pdf_path), path=pdf_path)
+    for match in matches:
+        tagged.add_match(doc_id, match)
+    return tagged
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice persistente de PDFs por fragmentos")
+    parser.add_argument("command", choices=["add", "remove", "refresh", "list"])
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--root", help=f"Directorio del índice (por defecto {SHARD_DIR})")
+    args = parser.parse_args()
+
+    corpus = ShardedCorpus(args.root)
+    if args.command == "add":
+        for state, paths in corpus.sync(args.pdfs).items():
+            if paths:
+                print(f"{state}: {len(paths)}")
+    elif args.command == "remove":
+        for pdf_path in args.pdfs:
+            print(f"{pdf_path}: {'eliminado' if corpus.remove(pdf_path) else 'no estaba en el índice'}")
+    elif args.command == "refresh":
+        for state, paths in corpus.refresh().items():
+            if paths:
+                print(f"{state}: {len(paths)}")
+    else:
+        for pdf_path, entry in sorted(corpus.documents.items()):
+            state = "al día" if corpus.is_current(pdf_path) else "desactualizado"
+            print(f"{pdf_path}  {entry['pages']} páginas, {entry['words']:,} palabras, "
+                  f"{entry['shard_bytes'] / 1e6:.1f} MB ({state})")
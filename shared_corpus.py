@@ -0,0 +1,268 @@
+"""
+Texto normalizado de un Document en memoria compartida, para que las
+búsquedas por recorrido del texto se repartan entre procesos sin serializar
+los chunks en cada consulta.
+
+El texto limpio y el texto limpio en minúsculas se copian una sola vez a un
+segmento de multiprocessing.shared_memory (en UTF-8), junto con una tabla de
+desplazamientos por chunk y las tablas de páginas. A cada worker solo se le
+envía la descripción del segmento y el número de chunk: se conecta al
+segmento una vez, lee las tablas como arreglos de numpy sin copiarlas y
+decodifica únicamente el tramo de su chunk.
+"""
+import threading
+import weakref
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, BrokenExecutor
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import List, Tuple, Dict, Any
+from document import Document
+from text_extractor import get_optimal_processes
+from tracing import span
+from search_limits import SearchLimits, gather_chunks, mark_truncated
+
+# Columnas de la tabla de chunks: páginas, bytes en el segmento, inicio en
+# caracteres (para ubicar la página de cada coincidencia) y palabras
+CHUNK_COLUMNS = 6
+START_PAGE, END_PAGE, BYTE_START, BYTE_END, CHAR_START, WORDS = range(CHUNK_COLUMNS)
+
+# Segmentos a los que cada worker se mantiene conectado
+MAX_ATTACHED_SEGMENTS = 8
+
+def utf8_offsets(text: str, positions: List[int]) -> List[int]:
+    """Desplazamientos en bytes (UTF-8) de posiciones de caracteres ordenadas."""
+    if text.isascii():
+        return list(positions)
+    offsets = []
+    previous = byte_position = 0
+    for position in positions:
+        byte_position += len(text[previous:position].encode("utf-8"))
+        offsets.append(byte_position)
+        previous = position
+    return offsets
+
+def _chunk_table(text: str, chunk_ranges: List[Tuple[int, int]],
+                 bounds: List[Tuple[int, int]], words: List[int]) -> np.ndarray:
+    positions = sorted({position for bound in bounds for position in bound})
+    byte_of = dict(zip(positions, utf8_offsets(text, positions)))
+    return np.array([
+        (start_page, end_page, byte_of[start], byte_of[end], start, chunk_words)
+        for (start_page, end_page), (start, end), chunk_words in zip(chunk_ranges, bounds, words)
+    ], dtype=np.int64).reshape(-1, CHUNK_COLUMNS)
+
+class SharedLayout:
+    """
+    Descripción de un segmento: nombre y, por sección, (desplazamiento,
+    bytes, dtype, forma). Es lo único que viaja a los workers.
+    """
+    __slots__ = ("name", "sections")
+
+    def __init__(self, name: str, sections: Dict[str, Tuple[int, int, str, Tuple[int, ...]]]):
+        self.name = name
+        self.sections = sections
+
+    def __getstate__(self):
+        return self.name, self.sections
+
+    def __setstate__(self, state):
+        self.name, self.sections = state
+
+def _release(segment: shared_memory.SharedMemory):
+    segment.close()
+    try:
+        segment.unlink()
+    except FileNotFoundError:
+        pass
+
+class SharedCorpus:
+    """
+    Segmento de memoria compartida con el texto normalizado de un documento.
+    El segmento se libera al cerrar el corpus, al liberarse el documento o al
+    terminar el programa.
+    """
+
+    def __init__(self, document: Document):
+        normalized = document.normalized
+        text = normalized.text.encode("utf-8")
+        lower = normalized.lower.encode("utf-8")
+        sections = {
+            "text": text,
+            "lower": lower,
+            "text_chunks": _chunk_table(normalized.text, normalized.chunk_ranges,
+                                        normalized.chunk_bounds, normalized.chunk_words),
+            "lower_chunks": _chunk_table(normalized.lower, normalized.chunk_ranges,
+                                         normalized.lower_chunk_bounds, normalized.lower_chunk_words),
+            "page_offsets": np.asarray(normalized.page_offsets, dtype=np.int64),
+            "page_nums": np.asarray(normalized.page_nums, dtype=np.int64),
+            "lower_offsets": np.asarray(normalized.lower_offsets, dtype=np.int64),
+            "lower_nums": np.asarray(normalized.lower_nums, dtype=np.int64),
+        }
+
+        # Secciones alineadas a 8 bytes para leerlas como arreglos int64
+        layout, offset = {}, 0
+        for name, data in sections.items():
+            size = len(data) if isinstance(data, bytes) else data.nbytes
+            dtype = "bytes" if isinstance(data, bytes) else data.dtype.str
+            shape = (size,) if isinstance(data, bytes) else data.shape
+            layout[name] = (offset, size, dtype, shape)
+            offset += (size + 7) // 8 * 8
+
+        self.segment = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name, data in sections.items():
+            start, size = layout[name][:2]
+            self.segment.buf[start:start + size] = data if isinstance(data, bytes) else data.tobytes()
+        self.layout = SharedLayout(self.segment.name, layout)
+        self.nbytes = offset
+        self.chunk_chars = [end - start for start, end in normalized.chunk_bounds]
+        self.lower_chunk_chars = [end - start for start, end in normalized.lower_chunk_bounds]
+        self._finalizer = weakref.finalize(self, _release, self.segment)
+
+    def close(self):
+        self._finalizer()
+
+# Un segmento por documento, mientras el documento siga vivo
+_shared: "weakref.WeakKeyDictionary[Document, SharedCorpus]" = weakref.WeakKeyDictionary()
+_shared_lock = threading.Lock()
+
+def share_document(document: Document) -> SharedCorpus:
+    """Copia el texto normalizado del documento a memoria compartida (una sola vez)."""
+    with _shared_lock:
+        corpus = _shared.get(document)
+        if corpus is None:
+            with span("share_document", "preparation", chars=len(document.normalized.text)) as share_span:
+                corpus = _shared[document] = SharedCorpus(document)
+                share_span.set(bytes=corpus.nbytes)
+        return corpus
+
+def release_document(document: Document):
+    """Libera el segmento del documento, si tenía uno."""
+    with _shared_lock:
+        corpus = _shared.pop(document, None)
+    if corpus is not None:
+        corpus.close()
+
+class SharedView:
+    """Conexión de un worker a un segmento: tablas como arreglos sin copia."""
+
+    def __init__(self, layout: SharedLayout):
+        self.layout = layout
+        self.segment = shared_memory.SharedMemory(name=layout.name)
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def array(self, name: str) -> np.ndarray:
+        array = self._arrays.get(name)
+        if array is None:
+            offset, _, dtype, shape = self.layout.sections[name]
+            array = self._arrays[name] = np.ndarray(shape, dtype=dtype, buffer=self.segment.buf, offset=offset)
+        return array
+
+    def decode(self, name: str, byte_start: int, byte_end: int) -> str:
+        """Texto de un tramo de la sección; solo se decodifica ese tramo."""
+        offset = self.layout.sections[name][0]
+        with self.segment.buf[offset + byte_start:offset + byte_end] as view:
+            return str(view, "utf-8")
+
+    def close(self):
+        # Los arreglos exportan el buffer: se sueltan antes de cerrar
+        self._arrays.clear()
+        try:
+            self.segment.close()
+        except BufferError:
+            pass
+
+# Segmentos conectados en este proceso (los workers atienden varias consultas)
+_attached: "OrderedDict[str, SharedView]" = OrderedDict()
+_attached_lock = threading.Lock()
+
+def attach(layout: SharedLayout) -> SharedView:
+    with _attached_lock:
+        view = _attached.get(layout.name)
+        if view is None:
+            view = _attached[layout.name] = SharedView(layout)
+            while len(_attached) > MAX_ATTACHED_SEGMENTS:
+                _attached.popitem(last=False)[1].close()
+        else:
+            _attached.move_to_end(layout.name)
+        return view
+
+def _chunk_text(view: SharedView, section: str, chunk: int) -> Tuple[str, np.ndarray]:
+    row = view.array(f"{section}_chunks")[chunk]
+    return view.decode(section, int(row[BYTE_START]), int(row[BYTE_END])), row
+
+def _tag_matches(found: List[Tuple[int, Dict[str, Any]]], row: np.ndarray,
+                 offsets: np.ndarray, page_nums: np.ndarray) -> List[Dict[str, Any]]:
+    start_page, end_page, char_start = int(row[START_PAGE]), int(row[END_PAGE]), int(row[CHAR_START])
+    pages = np.searchsorted(offsets, [char_start + position for position, _ in found], side='right') - 1
+    matches = []
+    for (_, match), index in zip(found, pages.tolist()):
+        match['page_range'] = f"{start_page}-{end_page}"
+        match['pages'] = (start_page, end_page)
+        match['page'] = int(page_nums[max(0, index)])
+        matches.append(match)
+    return matches
+
+def exact_shared_chunk(layout: SharedLayout, chunk: int, phrase: str) -> Tuple[int, List[Dict[str, Any]]]:
+    """Igual que process_document_chunk, sobre el chunk del segmento compartido."""
+    from search_engine import find_phrase_matches
+
+    view = attach(layout)
+    text, row = _chunk_text(view, "text", chunk)
+    found = find_phrase_matches(text, phrase)
+    return int(row[WORDS]), _tag_matches(found, row, view.array("page_offsets"), view.array("page_nums"))
+
+def flexible_shared_chunk(layout: SharedLayout, chunk: int, phrase: str,
+                          max_intermediate: int) -> Tuple[int, List[Dict[str, Any]]]:
+    """Igual que process_document_flexible, sobre el chunk del segmento compartido."""
+    from search_engine import find_flexible_matches
+
+    view = attach(layout)
+    text, row = _chunk_text(view, "lower", chunk)
+    found = find_flexible_matches(text, phrase, max_intermediate)
+    return int(row[WORDS]), _tag_matches(found, row, view.array("lower_offsets"), view.array("lower_nums"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _search_executor() -> ProcessPoolExecutor:
+    """Pool de procesos de búsqueda, creado una vez y reutilizado entre consultas."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = get_optimal_processes()
+            print(f"Procesos de búsqueda: {workers} (basado en su número de núcleos)")
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        return _executor
+
+def shutdown_executor():
+    """Cierra el pool de búsqueda (se vuelve a crear en la siguiente consulta)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+def process_search(document: Document, function, *args,
+                   limits: SearchLimits = None) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Ejecuta function(layout, chunk, *args) para cada chunk del documento en el
+    pool de procesos, respetando los límites de la búsqueda (ver
+    search_limits). Si el pool falla (BrokenExecutor) se descarta para que la
+    siguiente consulta cree uno nuevo y se vuelve a lanzar la excepción.
+    """
+    from search_engine import search_chunk_traced
+
+    corpus = share_document(document)
+    chunk_chars = corpus.lower_chunk_chars if function is flexible_shared_chunk else corpus.chunk_chars
+    executor = _search_executor()
+    tasks = [
+        (function, start, end, chunk_chars[chunk], corpus.layout, chunk) + args
+        for chunk, (start, end) in enumerate(document.normalized.chunk_ranges)
+    ]
+    try:
+        total_words, all_matches, reason = gather_chunks(executor, search_chunk_traced, tasks,
+                                                         executor._max_workers, limits)
+    except BrokenExecutor:
+        shutdown_executor()
+        raise
+    return total_words, mark_truncated(all_matches, reason, limits)
@@ -0,0 +1,102 @@
+import re
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Tuple, Union
+from document import Document, chunk_ranges
+from text_extractor import get_optimal_processes
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
+# Por debajo de este tamaño de texto no compensa arrancar procesos
+PARALLEL_MIN_CHARS = 2_000_000
+# Grupos de páginas en vuelo por proceso (copiados y enviados, sin contar aún)
+GROUPS_PER_WORKER = 2
+
+def count_page_terms(pages: List[str]) -> Counter:
+    """
+    Cuenta las palabras (en minúsculas) de un grupo de páginas, página a página,
+    sin concatenar el texto. Las claves quedan en orden de primera aparición.
+    """
+    counts = Counter()
+    for page in pages:
+        counts.update(WORD_PATTERN.findall(page.lower()))
+    return counts
+
+class TermFrequencyTable:
+    """
+    Frecuencias de todas las palabras de un documento, ordenadas una sola vez.
+    Las consultas con distinto top_n o min_length solo filtran la tabla.
+    """
+
+    def __init__(self, counts: Counter):
+        self.counts = counts
+        # Mismo orden que Counter.most_common: por frecuencia y, a igualdad,
+        # por primera aparición en el texto
+        self._ranked = counts.most_common()
+
+    def __len__(self) -> int:
+        return len(self._ranked)
+
+    def top_terms(self, top_n: int = 20, min_length: int = 4) -> List[Tuple[str, int]]:
+        """Las top_n palabras más frecuentes con longitud >= min_length y no numéricas."""
+        terms = []
+        if top_n is not None and top_n <= 0:
+            return terms
+        for word, count in self._ranked:
+            if len(word) >= min_length and not word.isnumeric():
+                terms.append((word, count))
+                if len(terms) == top_n:
+                    break
+        return terms
+
+def _page_groups(pages: Union[Document, List[Tuple[int, str]]]) -> List[Tuple[int, int]]:
+    """Rangos de páginas que cuenta cada tarea."""
+    if isinstance(pages, Document):
+        return pages.chunk_ranges()
+    return chunk_ranges(len(pages))
+
+def _group_pages(pages: Union[Document, List[Tuple[int, str]]], start: int, end: int) -> List[str]:
+    if isinstance(pages, Document):
+        return [str(pages.page(page_num)) for page_num in range(start, end)]
+    return [text for _, text in pages[start:end]]
+
+def bounded_map(executor: Executor, function: Callable, items: Iterable, window: int) -> Iterator:
+    """
+    Como executor.map, en orden, pero tomando items de a uno: como máximo
+    window tareas enviadas sin que se haya leído su resultado.
+    """
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(function, item))
+    while pending:
+        yield pending.popleft().result()
+
+def build_term_table(pages: Union[Document, List[Tuple[int, str]]]) -> TermFrequencyTable:
+    """
+    Cuenta las palabras por grupos de páginas en paralelo (procesos) y combina
+    los conteos en orden de página. Con un Document, la tabla queda asociada a él.
+    """
+    ranges = _page_groups(pages)
+    # Los grupos se copian de a uno: nunca se arma el texto completo en minúsculas
+    groups = (_group_pages(pages, start, end) for start, end in ranges)
+    total_chars = len(pages) if isinstance(pages, Document) else sum(len(text) for _, text in pages)
+
+    counts = Counter()
+    max_workers = min(get_optimal_processes(), len(ranges))
+    if max_workers > 1 and total_chars >= PARALLEL_MIN_CHARS:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # Conteos en orden (se conserva el orden de aparición), con pocos
+            # grupos copiados a la vez
+            for partial_counts in bounded_map(executor, count_page_terms, groups,
+                                              max_workers * GROUPS_PER_WORKER):
+                counts.update(partial_counts)
+    else:
+        for group in groups:
+            counts.update(count_page_terms(group))
+
+    table = TermFrequencyTable(counts)
+    if isinstance(pages, Document):
+        pages.term_table = table
+    return table
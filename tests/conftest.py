@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+from query_cache import QUERY_CACHE  # noqa: E402
+
+@pytest.fixture
+def query_cache():
+    """Caché de consultas activa y vacía durante la prueba."""
+    max_entries = QUERY_CACHE.max_entries
+    QUERY_CACHE.max_entries = max(max_entries, 128)
+    QUERY_CACHE.clear()
+    yield QUERY_CACHE
+    QUERY_CACHE.max_entries = max_entries
+    QUERY_CACHE.clear()
+
+@pytest.fixture(scope="session")
+def corpus_pdfs(tmp_path_factory):
+    """Dos PDFs con el mismo texto y un tercero distinto (corpus sintético)."""
+    from corpus_generator import generate_corpus
+
+    directory = tmp_path_factory.mktemp("pdfs")
+    paths = {}
+    infos = {}
+    for name, seed in (("rich.pdf", 0), ("rich_copy.pdf", 0), ("corp.pdf", 1)):
+        paths[name] = str(directory / name)
+        infos[name] = generate_corpus(paths[name], pages=20, words_per_page=300,
+                                      phrase_density=8.0, seed=seed)
+    return paths, infos
+
+def write_pdf(path: str, pages):
+    """PDF con una página por texto (líneas cortas, para que la extracción las conserve)."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen.canvas import Canvas
+
+    canvas = Canvas(path, pagesize=letter, invariant=1)
+    for text in pages:
+        y = 720
+        words = text.split()
+        for start in range(0, len(words), 10):
+            canvas.drawString(72, y, " ".join(words[start:start + 10]))
+            y -= 14
+        canvas.showPage()
+    canvas.save()
+    return path
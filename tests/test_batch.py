@@ -0,0 +1,52 @@
+import io
+import json
+
+from batch import main, read_queries
+
+def test_read_queries():
+    lines = io.StringIO('# comentario\n\n{"mode": "flexible", "phrase": "van helsing"}\ncount dracula\n'
+                        '{"id": "a", "mode": "multi", "phrases": ["x"]}\n"castle gate"\n')
+    assert list(read_queries(lines)) == [
+        {"mode": "flexible", "phrase": "van helsing", "id": 3},
+        {"mode": "exact", "phrase": "count dracula", "id": 4},
+        {"id": "a", "mode": "multi", "phrases": ["x"]},
+        {"mode": "exact", "phrase": "castle gate", "id": 6},
+    ]
+
+def test_batch_writes_one_json_line_per_query_and_document(corpus_pdfs, tmp_path, capsys):
+    paths, infos = corpus_pdfs
+    queries = tmp_path / "consultas.jsonl"
+    queries.write_text(
+        "count dracula\n"
+        '{"id": "flex", "mode": "flexible", "phrase": "van helsing", "pdf": "corp.pdf", "max_results": 2}\n'
+        '{"id": "multi", "mode": "multi", "phrases": ["castle gate", "van helsing"], "pdf": "rich.pdf"}\n'
+        '{"id": "error", "phrase": "count dracula", "pdf": "otro.pdf"}\n', encoding="utf-8")
+    output = tmp_path / "resultados.jsonl"
+
+    assert main([paths["rich.pdf"], paths["corp.pdf"], "--queries", str(queries), "--output", str(output),
+                 "--backend", "thread", "--no-cache"]) == 0
+    assert capsys.readouterr().out == ""  # el progreso va a stderr
+
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [(record["id"], record["pdf"]) for record in records] == [
+        (1, "rich.pdf"), (1, "corp.pdf"), ("flex", "corp.pdf"), ("multi", "rich.pdf"), ("error", "otro.pdf")]
+    for record in records[:2]:
+        assert record["count"] == infos[record["pdf"]]["expected"]["exact"]["count dracula"]
+        assert len(record["matches"]) == record["count"]
+        assert record["latency_ms"] >= 0
+    assert records[2]["truncated"] == "max_results"
+    assert len(records[2]["matches"]) == 2
+    assert {phrase: result["count"] for phrase, result in records[3]["phrases"].items()} == {
+        phrase: infos["rich.pdf"]["expected"]["exact"][phrase] for phrase in ("castle gate", "van helsing")}
+    assert "otro.pdf" in records[4]["error"]
+
+def test_summary_only_omits_matches(corpus_pdfs, tmp_path):
+    paths, _ = corpus_pdfs
+    queries = tmp_path / "consultas.jsonl"
+    queries.write_text('{"mode": "multi", "phrases": ["van helsing"]}\ncount dracula\n', encoding="utf-8")
+    output = tmp_path / "resultados.jsonl"
+    main([paths["rich.pdf"], "--queries", str(queries), "--output", str(output),
+          "--backend", "thread", "--no-cache", "--summary-only"])
+    multi, exact = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert "matches" not in exact and exact["count"] > 0
+    assert "matches" not in multi["phrases"]["van helsing"]
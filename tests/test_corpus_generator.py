@@ -0,0 +1,24 @@
+from corpus import load_document
+from corpus_generator import generate_corpus
+from match_set import total_count
+from search_engine import concurrent_search, flexible_search
+
+def test_same_seed_same_pdf(tmp_path):
+    first = generate_corpus(str(tmp_path / "a.pdf"), pages=3, words_per_page=200, seed=7)
+    second = generate_corpus(str(tmp_path / "b.pdf"), pages=3, words_per_page=200, seed=7)
+    other = generate_corpus(str(tmp_path / "c.pdf"), pages=3, words_per_page=200, seed=8)
+
+    assert (tmp_path / "a.pdf").read_bytes() == (tmp_path / "b.pdf").read_bytes()
+    assert (tmp_path / "a.pdf").read_bytes() != (tmp_path / "c.pdf").read_bytes()
+    assert {**first, "file": None} == {**second, "file": None}
+    assert first["total_words"] == 3 * 200 == other["total_words"]
+
+def test_expected_counts_match_searches(corpus_pdfs):
+    paths, infos = corpus_pdfs
+    info = infos["corp.pdf"]
+    document = load_document(paths["corp.pdf"], backend="thread", use_cache=False)
+    total_words, _ = concurrent_search(document, info["phrases"][0])
+    assert total_words == info["total_words"]
+    for phrase in info["phrases"]:
+        assert total_count(concurrent_search(document, phrase)[1]) == info["expected"]["exact"][phrase]
+        assert total_count(flexible_search(document, phrase)[1]) == info["expected"]["flexible"][phrase]
@@ -0,0 +1,32 @@
+from document import Document, chunk_ranges
+
+PAGES = ["primera página", "", "tercera\ncon dos líneas", "cuarta"]
+
+def test_pages_round_trip():
+    document = Document.from_pages(PAGES)
+    assert document.num_pages == 4
+    assert [str(view) for _, view in document.iter_pages()] == PAGES
+    assert document.text == "\n".join(PAGES)
+    assert len(document) == len(document.text)
+
+def test_page_of_every_offset():
+    document = Document.from_pages(PAGES)
+    for page_num in range(document.num_pages):
+        start, end = document.page_bounds(page_num)
+        for offset in range(start, end):
+            assert document.page_of(offset) == page_num
+    # La página vacía no contiene ningún desplazamiento propio
+    assert document.page_bounds(1)[0] == document.page_bounds(1)[1]
+
+def test_pages_range_and_chunks():
+    document = Document.from_pages(PAGES, chunk_size=2)
+    assert str(document.pages_range(2, 4)) == "tercera\ncon dos líneas\ncuarta"
+    assert str(document.pages_range(3, 3)) == ""
+    assert document.chunks() == [(0, 2, "primera página\n"), (2, 4, "tercera\ncon dos líneas\ncuarta")]
+
+def test_chunk_ranges_cover_all_pages():
+    assert chunk_ranges(25, 10) == [(0, 10), (10, 20), (20, 25)]
+    assert chunk_ranges(0, 10) == []
+    ranges = chunk_ranges(95)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 95
+    assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from document import Document
+from fuzzy import auto_distance, build_fuzzy_index, edit_distance, fuzzy_search
+
+PAGES = [
+    "The count dracula slept. The cont draculla woke up. The cuont dracula hid. Count drac ula rose.",
+    "The coun dracula ate. Van helsing and van helsnig met the count of dracula.",
+]
+
+def _levenshtein(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+def test_bounded_edit_distance():
+    rng = random.Random(22)
+    for _ in range(2000):
+        a = "".join(rng.choice("abc") for _ in range(rng.randint(0, 7)))
+        b = "".join(rng.choice("abc") for _ in range(rng.randint(0, 7)))
+        limit = rng.randint(0, 3)
+        assert edit_distance(a, b, limit) == min(_levenshtein(a, b), limit + 1), (a, b, limit)
+
+def test_similar_terms_equal_vocabulary_scan():
+    words = ["dracula", "draculla", "dracul", "drakula", "ula", "castle", "cast", "vast", "dracula's", "acula"]
+    document = Document.from_pages([" ".join(words) + "."])
+    index = build_fuzzy_index(document)
+    for word in ["dracula", "cast", "ula", "xyz"]:
+        for max_distance in range(3):
+            expected = {term: _levenshtein(term, word) for term in index.words
+                        if _levenshtein(term, word) <= max_distance}
+            found = {index.words[word_id]: distance
+                     for word_id, distance in index.similar_terms(word, max_distance).items()}
+            assert found == expected, (word, max_distance)
+
+def test_fuzzy_search_finds_typos_and_split_words():
+    document = Document.from_pages(PAGES)
+    _, matches = fuzzy_search(document, "count dracula")
+    # "cuont" está a dos ediciones de "count" (una sola permitida con cinco letras)
+    assert [match["original"] for match in matches] == [
+        "count dracula", "cont draculla", "count drac ula", "coun dracula"]
+    assert [match["page"] for match in matches] == [0, 0, 0, 1]
+
+    _, exact_only = fuzzy_search(document, "count dracula", max_distance=0)
+    # Sin ediciones solo quedan la frase exacta y la palabra cortada
+    assert [match["original"] for match in exact_only] == ["count dracula", "count drac ula"]
+    _, names = fuzzy_search(document, "Van Helsing")
+    assert [match["original"] for match in names] == ["van helsing", "van helsnig"]
+
+@pytest.mark.parametrize("word, distance", [("of", 0), ("van", 1), ("count", 1), ("helsing", 2)])
+def test_auto_distance(word, distance):
+    assert auto_distance(word) == distance
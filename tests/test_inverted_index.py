@@ -0,0 +1,49 @@
+import pytest
+
+from document import Document
+from inverted_index import build_index
+from search_engine import clean_text, find_phrase_in_chunk
+
+PAGES = [
+    "El conde Drácula vivía en el castillo. El CONDE drácula salió de noche. ¿Quién era el conde",
+    "drácula? Nadie lo sabía. La la la la canción. Conde, Drácula! el conde drácula",
+    "Mr. Harker escribió: el conde drácula. Sin punto final el conde drácula",
+    "Otra página. Un conde. Un drácula. El conde-drácula no cuenta. Al final el conde drácula",
+]
+
+def _scan(document: Document, phrase: str):
+    """Resultado de referencia: find_phrase_in_chunk sobre cada chunk limpio."""
+    matches = []
+    for _, _, text in document.chunks():
+        matches.extend(find_phrase_in_chunk(clean_text(text), phrase))
+    return matches
+
+def _indexed(document: Document, phrase: str):
+    _, matches = document.index.search(phrase)
+    return [{key: match[key] for key in ("paragraph", "count", "positions")} for match in matches]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 4])
+@pytest.mark.parametrize("phrase", [
+    "conde drácula",    # mayúsculas, acentos y frase partida entre páginas
+    "CONDE DRACULA",    # sin acento: no debe coincidir con drácula
+    "la la",            # coincidencias solapadas
+    "drácula",          # texto después del último punto
+    "sabía la",         # cruza un fin de oración
+    "conde",
+    "palabra ausente",
+])
+def test_index_matches_scan(phrase, chunk_size):
+    document = Document.from_pages(PAGES, chunk_size=chunk_size)
+    build_index(document)
+    assert _indexed(document, phrase) == _scan(document, phrase)
+
+def test_index_cases_are_not_empty():
+    document = Document.from_pages(PAGES, chunk_size=4)
+    build_index(document)
+    [song] = _indexed(document, "la la")
+    assert song["count"] == 2
+    # El texto después del último punto del chunk no es una oración
+    paragraphs = [m["paragraph"] for m in _indexed(document, "conde drácula")]
+    assert paragraphs[-1] == "Sin punto final el conde drácula Otra página."
+    assert _indexed(document, "CONDE DRÁCULA") == _indexed(document, "conde drácula")
+    assert _indexed(document, "conde dracula") == []
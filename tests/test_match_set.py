@@ -0,0 +1,59 @@
+from match_set import ELLIPSIS_AFTER, ELLIPSIS_BEFORE, MatchSet, total_count
+
+EXACT = [
+    {"paragraph": "El conde drácula.", "count": 1, "positions": [3], "page_range": "0-10", "pages": (0, 10),
+     "page": 2},
+    {"paragraph": "conde drácula y conde drácula.", "count": 2, "positions": [0, 16]},
+]
+FLEXIBLE = [
+    {"paragraph": "...el conde, ya viejo, drácula", "original": "conde, ya viejo, drácula", "count": 1,
+     "positions": [3], "page_range": "10-20", "pages": (10, 20), "page": 11},
+]
+
+def test_dicts_round_trip():
+    exact = MatchSet()
+    exact.extend(EXACT)
+    assert list(exact) == EXACT
+    assert exact[-1] == EXACT[-1] and exact[0:1] == EXACT[:1]
+    assert exact == EXACT and total_count(exact) == total_count(EXACT) == 3
+
+    flexible = MatchSet(flexible=True)
+    flexible.extend(FLEXIBLE)
+    assert list(flexible) == FLEXIBLE
+
+def test_offsets_into_shared_text():
+    text = "Nada. Al final el conde, ya viejo, drácula se fue."
+    matches = MatchSet(flexible=True)
+    doc_id = matches.add_source(text)
+    start = text.index("conde")
+    end = text.index(" se fue")
+    matches.add(doc_id, 9, text.index(" fue"), [start - 9], match_start=start, match_length=end - start, page=0,
+                pages=(0, 1), flags=ELLIPSIS_BEFORE | ELLIPSIS_AFTER)
+    assert matches[0] == {"paragraph": "...final el conde, ya viejo, drácula se...",
+                          "original": "conde, ya viejo, drácula", "count": 1, "positions": [start - 9],
+                          "page_range": "0-1", "pages": (0, 1), "page": 0}
+
+def test_extend_named_and_counts_by_document():
+    first = MatchSet()
+    first.extend(EXACT)
+    second = MatchSet()
+    second.extend(EXACT[1:])
+
+    combined = MatchSet()
+    combined.extend(first.named("a.pdf", "/a.pdf"))
+    combined.extend(second.named("b.pdf", "/b.pdf"))
+    assert [(m["pdf_name"], m["count"]) for m in combined] == [("a.pdf", 1), ("a.pdf", 2), ("b.pdf", 2)]
+    assert combined.counts_by_document() == {"a.pdf": 3, "b.pdf": 2}
+    assert [(name, len(list(group))) for name, group in combined.by_document()] == [("a.pdf", 2), ("b.pdf", 1)]
+    # named no modifica el original (puede estar en la caché de consultas)
+    assert "pdf_name" not in first[0]
+
+def test_truncate():
+    matches = MatchSet()
+    matches.extend(EXACT + EXACT)
+    matches.truncate(3)
+    assert list(matches) == (EXACT + EXACT)[:3]
+    assert matches.total_count() == 4
+    matches.truncate(10)
+    assert len(matches) == 3
+    assert matches.nbytes() > 0
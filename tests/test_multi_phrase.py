@@ -0,0 +1,38 @@
+import pytest
+
+from corpus import load_document, prepare_document
+from document import Document
+from multi_phrase import AhoCorasick, multi_phrase_search
+from search_engine import concurrent_search
+
+PAGES = [
+    "El conde Drácula vivía en el castillo. Van Helsing llegó al castillo del conde.",
+    "La la la canción del conde drácula. Van Helsing y el conde drácula",
+    "se encontraron. Nadie vio al conde. Al final, van helsing",
+]
+PHRASES = ["conde drácula", "van helsing", "conde", "la la", "el castillo", "frase ausente", "conde drácula"]
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = AhoCorasick([("he",), ("she",), ("his",), ("she", "he"), ("he", "he")])
+    found = sorted(automaton.iter_matches(["she", "he", "he", "his"]))
+    assert found == [(0, 1), (1, 0), (1, 3), (2, 0), (2, 4), (3, 2)]
+
+@pytest.mark.parametrize("prepared", [False, True])
+def test_single_pass_equals_per_phrase_search(prepared):
+    document = Document.from_pages(PAGES, chunk_size=1)
+    if prepared:
+        prepare_document(document)
+    total_words, results = multi_phrase_search(document, PHRASES, max_workers=2)
+    assert list(results) == list(dict.fromkeys(PHRASES))
+    for phrase, matches in results.items():
+        expected_words, expected = concurrent_search(document, phrase)
+        assert total_words == expected_words
+        assert matches == list(expected), phrase
+    assert len(results["conde"]) > len(results["conde drácula"]) > 0
+
+def test_generated_corpus(corpus_pdfs):
+    paths, infos = corpus_pdfs
+    document = load_document(paths["rich.pdf"], backend="thread")
+    _, results = multi_phrase_search(document, infos["rich.pdf"]["phrases"])
+    for phrase, matches in results.items():
+        assert sum(match["count"] for match in matches) == infos["rich.pdf"]["expected"]["exact"][phrase]
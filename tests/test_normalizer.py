@@ -0,0 +1,50 @@
+import pytest
+
+from document import Document
+from normalizer import clean_with_offsets, normalize_document
+from search_engine import clean_pages, clean_text, concurrent_search, flexible_search
+
+PAGES = [
+    "  El «conde» Drácula,\tvivía — en el castillo.  ",
+    "",
+    "¿Quién era? ¡Van Helsing!\n(lo sabía) el conde   drácula.",
+    "@@@",
+    "Última página: el conde, ya viejo, drácula",
+]
+
+@pytest.mark.parametrize("text", PAGES + ["a — b", "—a", "a—b c"])
+def test_clean_with_offsets_equals_clean_text(text):
+    cleaned, cleaned_starts, original_starts = clean_with_offsets(text)
+    assert cleaned == clean_text(text)
+    for cleaned_start, original_start in zip(cleaned_starts, original_starts):
+        assert cleaned[cleaned_start] == text[original_start]
+
+def test_normalized_text_and_counts():
+    document = Document.from_pages(PAGES, chunk_size=2)
+    normalized = normalize_document(document)
+    assert normalize_document(document) is normalized
+
+    assert normalized.text == clean_pages(document, 0, len(PAGES))[0]
+    assert normalized.lower == clean_pages(document, 0, len(PAGES), lower=True)[0]
+    assert list(normalized.page_words) == [len(clean_text(page).split()) for page in PAGES]
+    assert normalized.total_words == len(normalized.text.split())
+    for (start, end), (first, last) in zip(normalized.chunk_bounds, normalized.chunk_ranges):
+        assert normalized.text[start:end] == clean_pages(document, first, last)[0]
+
+def test_positions_map_back_to_pages():
+    document = Document.from_pages(PAGES)
+    normalized = normalize_document(document)
+    for position, char in enumerate(normalized.text):
+        if char == " ":
+            continue
+        original = normalized.to_original(position)
+        assert document.text[original] == char
+        assert normalized.page_of(position) == document.page_of(original)
+
+@pytest.mark.parametrize("phrase", ["conde drácula", "el conde", "van helsing"])
+def test_searches_agree_with_and_without_normalization(phrase):
+    plain = Document.from_pages(PAGES, chunk_size=2)
+    normalized = Document.from_pages(PAGES, chunk_size=2)
+    normalize_document(normalized)
+    assert concurrent_search(normalized, phrase) == concurrent_search(plain, phrase)
+    assert flexible_search(normalized, phrase, 2) == flexible_search(plain, phrase, 2)
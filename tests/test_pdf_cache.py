@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+import pdf_cache
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "cache"
+    monkeypatch.setattr(pdf_cache, "CACHE_DIR", str(directory))
+    monkeypatch.setattr(pdf_cache, "_fingerprint_memo", pdf_cache.OrderedDict())
+    return directory
+
+def _touch(path, content: bytes, mtime_ns: int):
+    path.write_bytes(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+def test_fingerprint_memo_is_bounded(cache_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_cache, "MAX_FINGERPRINTS", 3)
+    paths = [_touch(tmp_path / f"{i}.pdf", b"%PDF", 10 ** 18) for i in range(5)]
+    for path in paths:
+        pdf_cache.pdf_fingerprint(path)
+    pdf_cache.pdf_fingerprint(paths[2])  # la más antigua de las memorizadas pasa a ser reciente
+    pdf_cache.pdf_fingerprint(paths[0])
+    assert [key[0] for key in pdf_cache._fingerprint_memo] == [
+        os.path.abspath(paths[4]), os.path.abspath(paths[2]), os.path.abspath(paths[0])]
+
+def test_fingerprint_memo_keeps_one_version_per_file(cache_dir, tmp_path):
+    path = _touch(tmp_path / "libro.pdf", b"uno", 10 ** 18)
+    first = pdf_cache.pdf_fingerprint(path)
+    _touch(tmp_path / "libro.pdf", b"dos", 2 * 10 ** 18)
+    second = pdf_cache.pdf_fingerprint(path)
+    assert first != second
+    assert list(pdf_cache._fingerprint_memo.values()) == [second]
+
+def test_store_load_and_invalidate(cache_dir, tmp_path):
+    path = _touch(tmp_path / "libro.pdf", b"%PDF uno", 10 ** 18)
+    assert pdf_cache.load_cached_pages(path) is None
+    pdf_cache.store_cached_pages(path, ["página uno", "página dos"])
+    assert pdf_cache.load_cached_pages(path) == ["página uno", "página dos"]
+
+    assert pdf_cache.invalidate_cache(path) == 1
+    assert pdf_cache.load_cached_pages(path) is None
+
+def test_modified_pdf_misses_and_replaces_old_entry(cache_dir, tmp_path):
+    path = _touch(tmp_path / "libro.pdf", b"%PDF uno", 10 ** 18)
+    pdf_cache.store_cached_pages(path, ["antes"])
+    _touch(tmp_path / "libro.pdf", b"%PDF dos", 2 * 10 ** 18)
+    assert pdf_cache.load_cached_pages(path) is None
+
+    pdf_cache.store_cached_pages(path, ["después"])
+    assert pdf_cache.load_cached_pages(path) == ["después"]
+    assert len(os.listdir(cache_dir)) == 1
+
+def test_corrupt_entry_is_discarded(cache_dir, tmp_path):
+    path = _touch(tmp_path / "libro.pdf", b"%PDF", 10 ** 18)
+    cache_file = pdf_cache.store_cached_pages(path, ["texto"])
+    with open(cache_file, "wb") as file:
+        file.write(pdf_cache.CACHE_MAGIC + b"no es zlib")
+    assert pdf_cache.load_cached_pages(path) is None
+    assert not os.path.exists(cache_file)
+
+def test_cache_limit_evicts_least_recently_used(cache_dir, tmp_path):
+    paths = [_touch(tmp_path / f"{i}.pdf", b"%PDF", 10 ** 18) for i in range(3)]
+    files = [pdf_cache.store_cached_pages(path, ["x" * 1000]) for path in paths]
+    for age, cache_file in enumerate(files):
+        os.utime(cache_file, (age, age))
+    pdf_cache.load_cached_pages(paths[0])  # marca la primera como usada recientemente
+
+    size = os.path.getsize(files[0])
+    assert pdf_cache.enforce_cache_limit(2 * size) == 1
+    assert [os.path.exists(f) for f in files] == [True, False, True]
@@ -0,0 +1,50 @@
+import PyPDF2
+
+from pdf_reporter import (MatchSummary, create_exact_search_pdf_report, create_flexible_pdf_report,
+                          highlight, report_styles)
+
+def _pdf_text(path: str) -> str:
+    return " ".join(page.extract_text() for page in PyPDF2.PdfReader(path).pages)
+
+def _matches(count: int):
+    for i in range(count):
+        yield {"paragraph": f"El conde Drácula <{i}> y el CONDE drácula.", "count": 2,
+               "positions": [3, 28], "page": i % 7}
+
+def test_highlight_escapes_and_marks_every_occurrence():
+    marked = highlight("a < conde & Conde", "conde")
+    assert marked == ('a &lt; <font backColor="yellow">conde</font> &amp; '
+                      '<font backColor="yellow">Conde</font>')
+    assert highlight("conde conde", "conde", all_occurrences=False).count("backColor") == 1
+    assert highlight("<b>", "") == "&lt;b&gt;"
+
+def test_summary_groups_pages_in_numeric_order():
+    summary = MatchSummary()
+    for page, group in ((10, "b.pdf"), (1, "b.pdf"), (2, "a.pdf"), (1, "b.pdf")):
+        summary.add({"count": 1, "page": page}, group)
+    summary.add({"count": 3, "page_range": "0-10"}, "a.pdf")
+    rows = summary.table("Archivo")._cellvalues
+    assert rows == [["Archivo", "Página(s)", "Coincidencias"],
+                    ["b.pdf", "2", "2"], ["b.pdf", "11", "1"], ["a.pdf", "3", "1"], ["a.pdf", "0-10", "3"]]
+    assert (summary.total, summary.matches) == (7, 5)
+
+def test_details_are_capped_and_summary_counts_everything(tmp_path):
+    output = str(tmp_path / "exacta.pdf")
+    create_exact_search_pdf_report(1000, _matches(300), "conde drácula", output, max_details=5)
+    text = _pdf_text(output)
+    assert "Coincidencia #5" in text
+    assert "Coincidencia #6" not in text
+    assert "Se muestra el detalle de 5 de 300 coincidencias" in text
+    assert "Total de coincidencias: 600" in text
+    assert "&lt;" not in text and "<4>" in text
+
+def test_flexible_report_and_cached_styles(tmp_path):
+    assert report_styles() is report_styles()
+    output = str(tmp_path / "flexible.pdf")
+    matches = [{"paragraph": "...el conde, ya viejo, drácula...", "original": "conde, ya viejo, drácula",
+                "count": 1, "positions": [6], "page": 0}]
+    create_flexible_pdf_report(100, matches, "conde drácula", output, max_intermediate=2)
+    assert "conde, ya viejo, drácula" in _pdf_text(output)
+    empty = str(tmp_path / "vacio.pdf")
+    create_exact_search_pdf_report(100, [], "nada", empty)
+    assert "No se encontraron coincidencias exactas." in _pdf_text(empty)
@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from proximity import WordTokens, proximity_hits
+from search_engine import clean_text, find_flexible_matches, flexible_pattern
+
+VOCABULARY = ["conde", "drácula", "van", "helsing", "el", "castillo", "de", "noche"]
+
+def _regex_hits(text: str, phrase: str, max_intermediate: int):
+    """Resultado de referencia: la regex flexible con retroceso."""
+    pattern = flexible_pattern(tuple(phrase.split()), max_intermediate)
+    return [match.span() for match in pattern.finditer(text) if match.group() != phrase]
+
+def _random_text(rng: random.Random, words: int) -> str:
+    parts = []
+    for _ in range(words):
+        parts.append(rng.choice(VOCABULARY))
+        if rng.random() < 0.1:
+            parts[-1] += rng.choice(".,;")
+    return clean_text(" ".join(parts).lower())
+
+@pytest.mark.parametrize("phrase", ["conde drácula", "van helsing el", "el el", "de noche de"])
+@pytest.mark.parametrize("max_intermediate", [1, 2, 3])
+def test_linear_matcher_equals_regex(phrase, max_intermediate):
+    rng = random.Random(f"{phrase}-{max_intermediate}")
+    for _ in range(50):
+        text = _random_text(rng, rng.randint(0, 60))
+        tokens = WordTokens(text)
+        hits = proximity_hits(tokens, 0, len(text), phrase, phrase.split(), max_intermediate)
+        assert hits == _regex_hits(text, phrase, max_intermediate), text
+
+def test_flexible_matches_exclude_exact_phrase():
+    text = clean_text("El conde drácula. El conde, ya viejo, drácula. Conde de la noche drácula".lower())
+    matches = find_flexible_matches(text, "conde drácula", 2)
+    assert [match["original"] for _, match in matches] == ["conde, ya viejo, drácula"]
+    assert find_flexible_matches(text, "conde drácula", 3)[-1][1]["original"] == "conde de la noche drácula"
+    assert find_flexible_matches(text, "conde", 2) == []
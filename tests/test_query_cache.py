@@ -0,0 +1,92 @@
+import gc
+
+from corpus import prepare_document
+from document import Document
+from query_cache import QueryCache, cached_search, result_size
+from search_engine import concurrent_search, flexible_pattern, flexible_search, phrase_pattern
+from search_limits import mark_truncated
+from shard_index import ShardedCorpus
+
+PAGES = ["Count Dracula met Van Helsing.", "The count of the castle.", "Count Dracula slept."]
+
+def test_identical_pdfs_keep_their_names(tmp_path, corpus_pdfs, query_cache):
+    """Dos PDFs con igual texto comparten el resultado en caché, no el nombre."""
+    paths, infos = corpus_pdfs
+    corpus = ShardedCorpus(str(tmp_path / "shards"))
+    corpus.sync(list(paths.values()))
+
+    expected = {name: info["expected"]["flexible"]["count dracula"] for name, info in infos.items()}
+    assert all(expected.values())
+    _, matches = corpus.flexible_search("count dracula", 2)
+    assert matches.counts_by_document() == expected
+
+    # Al repetir, los tres resultados salen de la caché y los dos PDFs
+    # iguales reciben el mismo objeto
+    hits = query_cache.stats()["hits"]
+    _, repeated = corpus.flexible_search("count dracula", 2)
+    assert query_cache.stats()["hits"] == hits + 3
+    assert repeated.counts_by_document() == expected
+    assert {match["pdf_name"] for match in repeated} == set(paths)
+
+def _result(size: int):
+    return 0, [{"original": "x" * size}]
+
+def test_lru_evicts_by_entries_and_bytes():
+    cache = QueryCache(max_entries=2)
+    cache.put("a", _result(1))
+    cache.put("b", _result(1))
+    assert cache.get("a") is not None
+    cache.put("c", _result(1))
+    # "a" se usó después de "b", así que sale "b"
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+    limit = result_size(_result(1000))
+    cache = QueryCache(max_entries=10, max_bytes=2 * limit)
+    for key in "abc":
+        cache.put(key, _result(1000))
+    assert [cache.get(key) is not None for key in "abc"] == [False, True, True]
+    assert cache.stats()["bytes"] <= 2 * limit
+    cache.put("grande", _result(10 * limit))
+    assert cache.get("grande") is None and cache.stats()["entries"] == 2
+
+def test_repeated_search_hits_cache(query_cache):
+    document = prepare_document(Document.from_pages(PAGES, chunk_size=2))
+    before = query_cache.stats()
+    first = concurrent_search(document, "Count Dracula")
+    assert concurrent_search(document, "Count Dracula")[1] is first[1]
+    # Otra frase, otro modo y otro documento con el mismo texto
+    concurrent_search(document, "van helsing")
+    flexible_search(document, "count dracula", 2)
+    copy = prepare_document(Document.from_pages(PAGES, chunk_size=2))
+    assert concurrent_search(copy, "Count Dracula")[1] is first[1]
+    after = query_cache.stats()
+    assert (after["hits"] - before["hits"], after["misses"] - before["misses"]) == (2, 3)
+
+    # Al liberarse los documentos se quitan sus resultados
+    del document, copy, first
+    gc.collect()
+    assert query_cache.stats()["entries"] == 0
+
+def test_truncated_result_is_not_stored(query_cache):
+    document = Document.from_pages(PAGES)
+    calls = []
+
+    def truncated_search():
+        calls.append(1)
+        return 0, mark_truncated([], "deadline")
+
+    for _ in range(2):
+        assert cached_search(document, ("exact", "count"), truncated_search) == ((0, []), False)
+    assert len(calls) == 2 and query_cache.stats()["entries"] == 0
+    # Lo que no es un Document no se guarda
+    assert cached_search(PAGES, ("exact", "count"), lambda: (1, [])) == ((1, []), False)
+    assert query_cache.stats()["entries"] == 0
+
+def test_patterns_are_compiled_once():
+    phrase_pattern.cache_clear()
+    assert phrase_pattern("count dracula") is phrase_pattern("count dracula")
+    assert phrase_pattern("van helsing") is not phrase_pattern("count dracula")
+    assert phrase_pattern.cache_info().hits == 2
+    assert flexible_pattern(("count", "dracula"), 2) is flexible_pattern(("count", "dracula"), 2)
+    assert flexible_pattern(("count", "dracula"), 3).pattern != flexible_pattern(("count", "dracula"), 2).pattern
@@ -0,0 +1,69 @@
+import os
+import random
+
+import pytest
+
+from conftest import write_pdf
+from ranking import QueryStats, query_terms, ranked_search, score_passages
+from shard_index import ShardedCorpus
+
+WORDS = ["the", "night", "castle", "old", "road", "wolf", "dark", "door"]
+
+@pytest.fixture(scope="module")
+def ranked_corpus(tmp_path_factory):
+    """Varios PDFs con distinta densidad de "count dracula" y uno sin los términos."""
+    directory = tmp_path_factory.mktemp("ranking")
+    rng = random.Random(23)
+    pdf_paths = []
+    for number, density in enumerate([0.0, 0.02, 0.05, 0.1, 0.2, 0.02]):
+        words = []
+        for _ in range(400):
+            if rng.random() < density:
+                words.extend(rng.choice([["count", "dracula"], ["count", "old", "dracula"], ["count"], ["dracula"]]))
+            else:
+                words.append(rng.choice(WORDS))
+        pages = [" ".join(words[start:start + 100]) + "." for start in range(0, len(words), 100)]
+        pdf_paths.append(write_pdf(str(directory / f"{number}.pdf"), pages))
+    corpus = ShardedCorpus(str(directory / "shards"))
+    corpus.sync(pdf_paths)
+    return corpus, pdf_paths
+
+def _all_passages(corpus, phrase, max_intermediate):
+    """Resultado de referencia: el puntaje de todos los pasajes de todos los documentos."""
+    targets = corpus.targets()
+    counts = {path: corpus.terms(path) for path in targets}
+    lengths = {path: corpus.documents[path]["tokens"] for path in targets}
+    stats = QueryStats(query_terms(phrase), counts, lengths, max_intermediate)
+    passages = []
+    for path in targets:
+        document_score = stats.document_score(counts[path], lengths[path])
+        found = score_passages(corpus.document(path), stats, document_score)
+        if found:
+            assert max(score for score, _, _ in found) <= stats.upper_bound(counts[path], lengths[path])
+        passages.extend((score, path, start) for score, start, _ in found)
+    return passages
+
+@pytest.mark.parametrize("k", [1, 5, 20, 1000])
+def test_top_k_equals_sorting_every_passage(ranked_corpus, k):
+    corpus, _ = ranked_corpus
+    passages = _all_passages(corpus, "count dracula", 2)
+    _, results, scores = ranked_search(corpus, "count dracula", k=k)
+
+    expected = sorted(passages, key=lambda passage: passage[0], reverse=True)[:k]
+    assert scores == pytest.approx([score for score, _, _ in expected])
+    assert scores == sorted(scores, reverse=True)
+    assert len(results) == min(k, len(passages))
+    assert all(match["original"].startswith("count") for match in results)
+
+def test_documents_without_the_terms_are_skipped(ranked_corpus):
+    corpus, pdf_paths = ranked_corpus
+    _, results, _ = ranked_search(corpus, "count dracula", k=1000)
+    assert os.path.basename(pdf_paths[0]) not in {match["pdf_name"] for match in results}
+    assert ranked_search(corpus, "vampire", k=5)[1:] == (results.__class__(flexible=True), [])
+    assert ranked_search(corpus, "count dracula", k=0)[2] == []
+
+def test_low_bound_documents_are_pruned(ranked_corpus, capsys):
+    corpus, _ = ranked_corpus
+    ranked_search(corpus, "count dracula", k=1)
+    pruned = int(capsys.readouterr().out.split("buscados, ")[1].split()[0])
+    assert pruned > 0
@@ -0,0 +1,51 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import PdfScheduler
+
+def _files(tmp_path, sizes):
+    paths = []
+    for i, size in enumerate(sizes):
+        path = tmp_path / f"{i}.pdf"
+        path.write_bytes(b"x" * size)
+        paths.append(str(path))
+    return paths
+
+def test_order_largest_first_without_duplicates(tmp_path):
+    small, large, medium = _files(tmp_path, [10, 300, 100])
+    assert PdfScheduler(2).order([small, large, medium, large]) == [large, medium, small]
+
+def test_never_runs_more_than_max_workers(tmp_path):
+    paths = _files(tmp_path, range(1, 9))
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def task(pdf_path, delay):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(delay)
+        with lock:
+            running[0] -= 1
+        return pdf_path.upper()
+
+    results = dict(PdfScheduler(3, mode="thread").run(task, paths, 0.01))
+    assert results == {path: path.upper() for path in paths}
+    assert peak[0] == 3
+
+def test_failed_file_yields_none(tmp_path):
+    good, bad = _files(tmp_path, [10, 20])
+
+    def task(pdf_path):
+        if pdf_path == bad:
+            raise RuntimeError("PDF dañado")
+        return "ok"
+
+    assert dict(PdfScheduler(2, mode="thread").run(task, [good, bad])) == {good: "ok", bad: None}
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        PdfScheduler(mode="gpu")
@@ -0,0 +1,67 @@
+import pytest
+
+import shared_corpus
+from corpus import load_document
+from document import Document
+from normalizer import normalize_document
+from search_engine import concurrent_search, flexible_search
+
+@pytest.fixture
+def process_calls(monkeypatch):
+    """Registra las búsquedas que llegan al pool de procesos."""
+    calls = []
+    process_search = shared_corpus.process_search
+
+    def spy(document, function, *args, **kwargs):
+        calls.append(function.__name__)
+        return process_search(document, function, *args, **kwargs)
+
+    monkeypatch.setattr(shared_corpus, "process_search", spy)
+    yield calls
+    shared_corpus.shutdown_executor()
+
+@pytest.mark.parametrize("search, args, function", [
+    (concurrent_search, ("count dracula",), "exact_shared_chunk"),
+    (flexible_search, ("count dracula", 2), "flexible_shared_chunk"),
+])
+def test_explicit_process_backend_scans_indexed_document(corpus_pdfs, process_calls, search, args, function):
+    """Con backend="process" un documento cargado (con índices) se recorre en procesos."""
+    paths, _ = corpus_pdfs
+    document = load_document(paths["rich.pdf"], backend="serial")
+    assert document.index is not None and document.proximity is not None
+
+    _, indexed = search(document, *args)
+    assert process_calls == []
+
+    _, scanned = search(document, *args, backend="process")
+    assert process_calls == [function]
+    assert list(scanned) == list(indexed)
+    shared_corpus.release_document(document)
+
+def test_shared_segment_holds_the_normalized_chunks():
+    pages = ["El conde drácula. Ñandú en el castillo.", "", "Van Helsing — llegó tarde.", "Fin del día."]
+    document = Document.from_pages(pages, chunk_size=2)
+    normalize_document(document)
+    normalized = document.normalized
+
+    shared = shared_corpus.share_document(document)
+    assert shared_corpus.share_document(document) is shared
+    view = shared_corpus.SharedView(shared.layout)
+    try:
+        for chunk, (start, end) in enumerate(normalized.chunk_bounds):
+            text, row = shared_corpus._chunk_text(view, "text", chunk)
+            assert text == normalized.text[start:end]
+            assert int(row[shared_corpus.WORDS]) == normalized.chunk_words[chunk]
+        for chunk, (start, end) in enumerate(normalized.lower_chunk_bounds):
+            assert shared_corpus._chunk_text(view, "lower", chunk)[0] == normalized.lower[start:end]
+    finally:
+        view.close()
+
+    shared_corpus.release_document(document)
+    with pytest.raises(FileNotFoundError):
+        shared_corpus.SharedView(shared.layout)
+
+def test_utf8_offsets():
+    text = "año ñandú x"
+    positions = [0, 2, 4, 9, 10]
+    assert shared_corpus.utf8_offsets(text, positions) == [len(text[:p].encode("utf-8")) for p in positions]
@@ -0,0 +1,93 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from document import Document
+from normalizer import normalize_document
+from corpus import prepare_document
+from search_engine import concurrent_search, flexible_search
+from search_limits import (CHUNKS_PER_WORKER, CancelToken, SearchLimits, deadline_after, gather_chunks,
+                           truncation)
+
+PAGES = ["Count Dracula came to the castle. The castle was dark. Count Dracula smiled." for _ in range(200)]
+
+@pytest.fixture
+def indexed():
+    return prepare_document(Document.from_pages(PAGES, chunk_size=10))
+
+@pytest.fixture
+def scanned():
+    document = Document.from_pages(PAGES, chunk_size=10)
+    normalize_document(document)
+    return document
+
+@pytest.mark.parametrize("search, args", [
+    (concurrent_search, ("Count Dracula",)),
+    (flexible_search, ("dracula castle", 3)),
+])
+def test_stopped_search_skips_cache(indexed, query_cache, search, args):
+    """Con el token ya cancelado o el plazo vencido no se devuelve el resultado guardado."""
+    total_words, full = search(indexed, *args)
+    assert truncation(full) is None and len(full) > 0
+
+    cancel = CancelToken()
+    cancel.cancel()
+    words, matches = search(indexed, *args, cancel=cancel)
+    assert (words, len(matches), truncation(matches)) == (0, 0, "cancelled")
+
+    words, matches = search(indexed, *args, deadline=time.monotonic() - 1)
+    assert (words, len(matches), truncation(matches)) == (0, 0, "deadline")
+
+    # El resultado completo sigue en la caché
+    assert search(indexed, *args)[1] is full
+
+@pytest.mark.parametrize("search, args", [
+    (concurrent_search, ("Count Dracula",)),
+    (flexible_search, ("dracula castle", 3)),
+])
+def test_truncated_total_words_agree(indexed, scanned, query_cache, search, args):
+    """Índice y recorrido con hilos informan las mismas palabras al truncar."""
+    full_words, _ = search(indexed, *args)
+    index_words, index_matches = search(indexed, *args, max_results=25)
+    scan_words, scan_matches = search(scanned, *args, max_results=25)
+    assert truncation(index_matches) == truncation(scan_matches) == "max_results"
+    assert list(index_matches) == list(scan_matches)
+    assert 0 < index_words == scan_words < full_words
+
+@pytest.mark.parametrize("backend", [None, "thread", "process"])
+def test_max_results_returns_a_prefix(indexed, backend):
+    _, full = concurrent_search(indexed, "Count Dracula", backend=backend)
+    words, matches = concurrent_search(indexed, "Count Dracula", backend=backend, max_results=7)
+    assert truncation(matches) == "max_results"
+    assert list(matches) == list(full)[:7]
+    # Una búsqueda que no llega al máximo queda completa
+    _, complete = concurrent_search(indexed, "Count Dracula", backend=backend, max_results=len(full))
+    assert truncation(complete) is None and list(complete) == list(full)
+
+def _slow_chunk(number: int, started: list, cancel: CancelToken = None):
+    started.append(number)
+    if cancel is not None and number == 3:
+        cancel.cancel()
+    time.sleep(0.02)
+    return 1, [{"chunk": number}]
+
+def test_cancel_stops_scheduling_chunks():
+    cancel = CancelToken()
+    started = []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        words, matches, reason = gather_chunks(executor, _slow_chunk, [(n, started, cancel) for n in range(50)],
+                                               workers=2, limits=SearchLimits(cancel=cancel))
+    assert reason == "cancelled"
+    # Solo se llegaron a programar los chunks de la ventana en curso
+    assert len(started) <= 3 + 2 * CHUNKS_PER_WORKER
+    assert [match["chunk"] for match in matches] == list(range(words))
+
+def test_deadline_returns_finished_chunks():
+    started = []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        words, matches, reason = gather_chunks(executor, _slow_chunk, [(n, started) for n in range(200)],
+                                               workers=2, limits=SearchLimits(deadline=deadline_after(0.1)))
+    assert reason == "deadline"
+    assert 0 < words < 200 and len(started) < 200
+    assert [match["chunk"] for match in matches] == list(range(words))
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from search_engine import (find_phrase_matches, match_candidates, phrase_pattern, sentence_ends,
+                           split_sentences)
+
+TEXTS = [
+    "",
+    "   ",
+    "Sin punto final",
+    "Una. Dos.\nTres.\r\nCuatro",
+    "Mr.Harker llegó. 3.14 no corta. Fin.",
+    "...  Puntos seguidos. . Fin.",
+    " Empieza con espacio. Y termina con punto.",
+]
+
+def _split_by_characters(text: str):
+    """Resultado de referencia: el recorrido carácter a carácter anterior."""
+    sentences = []
+    current_start = 0
+    for i, char in enumerate(text):
+        if char == '.' and (i == len(text) - 1 or text[i + 1] in (' ', '\n', '\r')):
+            raw = text[current_start:i + 1]
+            sentence = raw.strip()
+            if sentence:
+                sentences.append((current_start + len(raw) - len(raw.lstrip()), sentence))
+            current_start = i + 1
+    if not sentences and text.strip():
+        sentences = [(len(text) - len(text.lstrip()), text.strip())]
+    return sentences
+
+def _random_text(rng: random.Random) -> str:
+    return "".join(rng.choice(["la ", "la", ".", " ", "\n", "casa", ". ", "x."]) for _ in range(rng.randint(0, 40)))
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_split_sentences_matches_character_loop(text):
+    assert split_sentences(text) == _split_by_characters(text)
+
+def test_split_sentences_random_texts():
+    rng = random.Random(8)
+    for _ in range(500):
+        text = _random_text(rng)
+        assert split_sentences(text) == _split_by_characters(text), repr(text)
+
+def test_sentence_ends_in_a_range():
+    text = "Uno. Dos. Tres. Cuatro."
+    assert sentence_ends(text).tolist() == [4, 9, 15, 23]
+    assert sentence_ends(text, 5, 15).tolist() == [9, 15]
+
+def test_match_candidates_equal_sentence_scan():
+    rng = random.Random(9)
+    pattern = phrase_pattern("la la")
+    for _ in range(300):
+        text = _random_text(rng)
+        start = rng.randint(0, len(text))
+        end = rng.randint(start, len(text))
+        candidates = [m.start() + start for m in pattern.finditer(text[start:end])]
+        candidates += [m.start() for m in pattern.finditer(text) if m.start() not in candidates]
+        candidates.sort()
+        expected = [(position + start, match) for position, match in find_phrase_matches(text[start:end], "la la")]
+        found = match_candidates(text, start, end, pattern, candidates, sentence_ends(text))
+        assert found == expected, (text, start, end)
+        assert match_candidates(text, start, end, pattern, candidates) == found
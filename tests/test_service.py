@@ -0,0 +1,94 @@
+import asyncio
+import threading
+
+import pytest
+
+import corpus as corpus_module
+from corpus import Corpus
+from service import SearchService, ServiceClient
+
+async def _stop(server):
+    """Cierra el servidor y las conexiones que sigan abiertas."""
+    server.close()
+    await server.wait_closed()
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+@pytest.fixture
+def service(tmp_path):
+    """Servicio con un corpus vacío escuchando en un socket Unix (en otro hilo)."""
+    unix_path = str(tmp_path / "busqueda.sock")
+    search_service = SearchService(Corpus(backend="thread", use_cache=False), max_workers=2)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(search_service.start(unix_path=unix_path))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    client = ServiceClient(unix_path=unix_path, timeout=60)
+    yield search_service, client
+    client.close()
+    asyncio.run_coroutine_threadsafe(_stop(server), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+    search_service.executor.shutdown(wait=True)
+
+def test_health(service):
+    _, client = service
+    assert client.request("GET", "/health") == (200, {"status": "ok"})
+
+def test_load_and_exact_search(service, corpus_pdfs):
+    search_service, client = service
+    paths, infos = corpus_pdfs
+    loaded = client.load(paths["rich.pdf"])
+    assert loaded["name"] == "rich.pdf"
+    assert loaded["pages"] == 20
+
+    phrase = "count dracula"
+    response = client.search(phrase)
+    [result] = response["results"]
+    assert result["pdf"] == "rich.pdf"
+    assert result["count"] == infos["rich.pdf"]["expected"]["exact"][phrase]
+    assert result["count"] == len(result["matches"])
+    assert result["truncated"] is None
+
+def test_flexible_search_truncated_by_max_results(service, corpus_pdfs):
+    _, client = service
+    paths, _ = corpus_pdfs
+    client.load(paths["rich.pdf"])
+
+    [complete] = client.search("van helsing", mode="flexible")["results"]
+    assert complete["count"] > 3
+    assert complete["truncated"] is None
+
+    [limited] = client.search("van helsing", mode="flexible", max_results=3)["results"]
+    assert limited["truncated"] == "max_results"
+    assert limited["matches"] == complete["matches"][:3]
+
+def test_bad_requests(service, tmp_path):
+    _, client = service
+    assert client.request("POST", "/load", {})[0] == 400
+    assert client.request("POST", "/search", {"mode": "exact"})[0] == 400
+
+    status, payload = client.request("POST", "/load", {"path": str(tmp_path / "no_existe.pdf")})
+    assert status == 404
+    assert "no existe" in payload["error"]
+    assert client.request("POST", "/search", {"phrase": "x", "pdf": "otro.pdf"})[0] == 404
+    assert client.request("GET", "/no_existe")[0] == 404
+    assert client.request("GET", "/load")[0] == 405
+
+def test_backend_of_the_given_corpus_is_used(service, corpus_pdfs, monkeypatch):
+    search_service, client = service
+    paths, _ = corpus_pdfs
+    backends = []
+    extract_document = corpus_module.extract_document
+
+    def spy(pdf_path, use_cache=True, backend="process"):
+        backends.append(backend)
+        return extract_document(pdf_path, use_cache=use_cache, backend=backend)
+
+    monkeypatch.setattr(corpus_module, "extract_document", spy)
+    assert len(search_service.corpus) == 0
+    client.load(paths["corp.pdf"])
+    assert backends == ["thread"]
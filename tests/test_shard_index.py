@@ -0,0 +1,63 @@
+import os
+
+from conftest import write_pdf
+from corpus import load_document
+from search_engine import flexible_search
+from shard_index import ShardedCorpus
+
+def _search(corpus, pdf_paths, phrase, max_intermediate=2):
+    corpus.sync(pdf_paths)
+    return corpus.flexible_search(phrase, max_intermediate, pdf_paths)
+
+def test_first_and_repeated_searches_agree(tmp_path, corpus_pdfs, query_cache):
+    """La búsqueda que construye los fragmentos y las siguientes dan las mismas coincidencias."""
+    paths, infos = corpus_pdfs
+    corpus = ShardedCorpus(str(tmp_path / "shards"))
+    pdf_paths = list(paths.values())
+    expected = {name: info["expected"]["flexible"]["count dracula"] for name, info in infos.items()}
+
+    first_words, first = _search(corpus, pdf_paths, "count dracula")
+    assert first.counts_by_document() == expected
+    # Otra instancia: los fragmentos se leen del disco
+    again_words, again = _search(ShardedCorpus(str(tmp_path / "shards")), pdf_paths, "count dracula")
+    assert again_words == first_words
+    assert list(again) == list(first)
+
+def test_match_across_chunk_boundary(tmp_path, query_cache):
+    """Una frase que cruza el límite entre chunks da el mismo resultado siempre."""
+    pages = [f"Page {number} filler words here." for number in range(12)]
+    pages[9] = "Nothing happens here. The count"
+    pages[10] = "old dracula walked away. Nothing else."
+    pdf_path = write_pdf(str(tmp_path / "boundary.pdf"), pages)
+    document = load_document(pdf_path, backend="serial")
+    assert document.chunk_ranges() == [(0, 10), (10, 12)]
+    expected = flexible_search(document, "count dracula", 2)
+
+    corpus = ShardedCorpus(str(tmp_path / "shards"))
+    first_words, first = _search(corpus, [pdf_path], "count dracula")
+    second_words, second = _search(corpus, [pdf_path], "count dracula")
+    assert first_words == second_words == expected[0]
+    assert list(first) == list(second)
+    assert [{key: value for key, value in match.items() if key not in ("pdf_name", "pdf_path")}
+            for match in first] == list(expected[1])
+
+def test_sync_only_rebuilds_new_and_modified_files(tmp_path):
+    first = write_pdf(str(tmp_path / "uno.pdf"), ["The count dracula slept."])
+    second = write_pdf(str(tmp_path / "dos.pdf"), ["Van helsing arrived."])
+    corpus = ShardedCorpus(str(tmp_path / "shards"))
+    assert corpus.sync([first, second, first])["added"] == [os.path.abspath(first), os.path.abspath(second)]
+
+    status = ShardedCorpus(str(tmp_path / "shards")).sync([first, second, str(tmp_path / "otro.pdf")])
+    assert status["unchanged"] == [os.path.abspath(first), os.path.abspath(second)]
+    assert status["missing"] == [str(tmp_path / "otro.pdf")]
+
+    write_pdf(second, ["Van helsing left.", "And came back."])
+    assert corpus.sync([first, second])["updated"] == [os.path.abspath(second)]
+    assert corpus.document(second).num_pages == 2
+
+    os.remove(first)
+    assert corpus.refresh()["removed"] == [os.path.abspath(first)]
+    assert corpus.targets() == [os.path.abspath(second)]
+    assert sorted(os.listdir(tmp_path / "shards")) == sorted(
+        ["manifest.json", corpus.documents[os.path.abspath(second)]["shard"],
+         corpus.documents[os.path.abspath(second)]["terms"]])
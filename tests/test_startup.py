@@ -0,0 +1,15 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import REPO_DIR
+from startup_benchmark import LAZY_MODULES
+
+@pytest.mark.parametrize("module", ["main", "batch", "service", "corpus"])
+def test_startup_does_not_load_heavy_dependencies(module):
+    code = (f"import sys, {module}\n"
+            f"print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
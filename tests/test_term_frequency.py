@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import term_frequency
+from document import Document
+from term_frequency import TermFrequencyTable, bounded_map, build_term_table
+
+PAGES = [f"Página {i}: el conde Drácula y el castillo {i % 3}. El CONDE vuelve." for i in range(25)]
+
+def test_parallel_table_equals_serial(monkeypatch):
+    serial = build_term_table(Document.from_pages(PAGES, chunk_size=4))
+
+    monkeypatch.setattr(term_frequency, "PARALLEL_MIN_CHARS", 0)
+    monkeypatch.setattr(term_frequency, "get_optimal_processes", lambda: 2)
+    document = Document.from_pages(PAGES, chunk_size=4)
+    parallel = build_term_table(document)
+
+    assert document.term_table is parallel
+    assert list(parallel.counts.items()) == list(serial.counts.items())
+    assert parallel.counts == Counter(term_frequency.WORD_PATTERN.findall(document.text.lower()))
+    assert parallel.top_terms(3) == serial.top_terms(3)
+
+def test_top_terms_filters_and_keeps_first_appearance_order():
+    table = TermFrequencyTable(Counter({"castillo": 2, "1234": 9, "el": 9, "conde": 3, "noche": 2}))
+    assert table.top_terms(3) == [("conde", 3), ("castillo", 2), ("noche", 2)]
+    assert table.top_terms(10, min_length=2) == [("el", 9), ("conde", 3), ("castillo", 2), ("noche", 2)]
+    assert table.top_terms(0) == []
+
+def test_bounded_map_limits_tasks_in_flight():
+    lock = threading.Lock()
+    submitted = []
+    consumed = 0
+
+    def items():
+        for i in range(20):
+            with lock:
+                # Nunca más de 3 tareas enviadas sin leer su resultado
+                assert len(submitted) - consumed <= 3
+            submitted.append(i)
+            yield i
+
+    def square(i):
+        time.sleep(0.001)
+        return i * i
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = []
+        for result in bounded_map(executor, square, items(), 3):
+            results.append(result)
+            consumed += 1
+    assert results == [i * i for i in range(20)]
@@ -0,0 +1,65 @@
+import pytest
+
+import text_extractor
+from text_extractor import DecodeCostModel, _get_worker_reader, extract_all_pages
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_backends_extract_the_same_pages(corpus_pdfs, backend):
+    paths, _ = corpus_pdfs
+    serial = extract_all_pages(paths["corp.pdf"], use_cache=False, backend="serial")
+    assert len(serial) == 20
+    assert extract_all_pages(paths["corp.pdf"], use_cache=False, backend=backend) == serial
+
+def test_worker_parses_each_pdf_once(corpus_pdfs):
+    paths, _ = corpus_pdfs
+    reader = _get_worker_reader(paths["rich.pdf"])
+    assert _get_worker_reader(paths["rich.pdf"]) is reader
+    assert _get_worker_reader(paths["corp.pdf"]) is not reader
+
+def test_unknown_backend_and_missing_file(tmp_path):
+    with pytest.raises(ValueError):
+        extract_all_pages(str(tmp_path / "libro.pdf"), backend="gpu")
+    with pytest.raises(FileNotFoundError):
+        extract_all_pages(str(tmp_path / "libro.pdf"), backend="serial")
+
+def _covers(ranges, total_pages):
+    return ranges[0][0] == 0 and ranges[-1][1] == total_pages and all(
+        end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+
+def test_partition_balances_estimated_cost():
+    model = DecodeCostModel([1000] * 40)
+    ranges = model.partition(workers=2, units_per_worker=4)
+    assert _covers(ranges, 40)
+    assert len(ranges) == 8
+    assert {end - start for start, end in ranges} == {5}
+
+def test_costly_page_gets_its_own_unit():
+    costs = [100] * 30
+    costs[12] = 1_000_000
+    ranges = DecodeCostModel(costs).partition(workers=2, units_per_worker=4)
+    assert _covers(ranges, 30)
+    assert (12, 13) in ranges
+    # Las páginas después de la costosa se siguen repartiendo en varias unidades
+    assert len(ranges) == 8
+    assert DecodeCostModel([]).partition(4) == []
+
+def test_observe_fits_measured_times():
+    model = DecodeCostModel([100, 5000, 200, 8000, 300, 50])
+    per_page, per_byte = 0.01, 1e-5
+    for start, end in [(0, 2), (2, 4), (4, 6), (1, 3)]:
+        model.observe(start, end, per_page * (end - start) + per_byte * model.content_bytes(start, end))
+    assert model.per_page == pytest.approx(per_page)
+    assert model.per_byte == pytest.approx(per_byte)
+    assert model.predict(0, 6) == pytest.approx(per_page * 6 + per_byte * 13650)
+
+def test_single_measurement_scales_the_estimate():
+    model = DecodeCostModel([1000, 1000])
+    predicted = model.predict(0, 1)
+    model.observe(0, 1, 3 * predicted)
+    assert model.predict(0, 2) == pytest.approx(6 * predicted)
+
+def test_dynamic_extraction_keeps_page_order(corpus_pdfs, monkeypatch):
+    paths, _ = corpus_pdfs
+    serial = extract_all_pages(paths["rich.pdf"], use_cache=False, backend="serial")
+    monkeypatch.setattr(text_extractor, "get_optimal_workers", lambda: 3)
+    assert extract_all_pages(paths["rich.pdf"], use_cache=False, backend="thread") == serial
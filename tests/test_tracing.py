@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import REPO_DIR
+import tracing
+from tracing import Tracer, traced_action
+
+@pytest.fixture
+def tracer(tmp_path, monkeypatch):
+    monkeypatch.setenv("PDF_TRACE_PID", str(os.getpid()))
+    return Tracer(str(tmp_path / "traza.json"))
+
+def test_spans_are_exported_as_trace_events(tracer):
+    with tracer.span("search", "search", phrase="conde") as outer:
+        with tracer.span("chunk", "search", pages=10):
+            pass
+        outer.set(matches=3)
+    with pytest.raises(ValueError):
+        with tracer.span("broken", "search"):
+            raise ValueError("PDF dañado")
+    report = tracer.begin("report_build", "report")
+    tracer.finish(report)
+
+    with open(tracer.export(), encoding="utf-8") as file:
+        trace = json.load(file)
+    events = {event["name"]: event for event in trace["traceEvents"] if event["ph"] == "X"}
+    assert list(events) == ["chunk", "search", "broken", "report_build"]
+    assert events["search"]["args"]["matches"] == 3
+    assert events["search"]["args"]["phrase"] == "conde"
+    assert events["search"]["dur"] >= events["chunk"]["dur"] >= 0
+    assert events["broken"]["args"]["error"] == "ValueError: PDF dañado"
+    assert [event["ph"] for event in trace["traceEvents"]].count("M") == 1
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    with tracer.span("search") as span:
+        span.set(matches=1)
+    tracer.finish(tracer.begin("report_build"))
+    assert tracer.events == []
+
+def test_trace_includes_process_workers(corpus_pdfs, tmp_path):
+    paths, _ = corpus_pdfs
+    trace_file = tmp_path / "traza.json"
+    code = ("from corpus import load_document\n"
+            "from search_engine import concurrent_search\n"
+            f"document = load_document({paths['rich.pdf']!r}, backend='process', use_cache=False)\n"
+            "concurrent_search(document, 'count dracula')\n")
+    env = {**os.environ, "PDF_TRACE": str(trace_file)}
+    env.pop("PDF_TRACE_PID", None)
+    subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, env=env, check=True, capture_output=True)
+
+    with open(trace_file, encoding="utf-8") as file:
+        events = [event for event in json.load(file)["traceEvents"] if event["ph"] == "X"]
+    names = {event["name"] for event in events}
+    assert {"extract_document", "extract_chunk", "normalize", "build_index", "exact_search"} <= names
+    # Los chunks los extraen los workers del pool de procesos
+    assert {event["pid"] for event in events if event["name"] == "extract_chunk"}.isdisjoint(
+        event["pid"] for event in events if event["name"] == "extract_document")
+    assert not list(tmp_path.glob("traza.json.*.part"))
+
+def test_traced_action_saves_a_profile(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(tracing, "PROFILE_DIR", str(tmp_path / "perfiles"))
+    with traced_action("busqueda_exacta"):
+        sum(range(1000))
+    assert len(list((tmp_path / "perfiles").glob("busqueda_exacta_*.prof"))) == 1
+    assert "Perfil guardado" in capsys.readouterr().out
@@ -1,67 +1,327 @@
 import os
-import PyPDF2
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, BrokenExecutor, FIRST_COMPLETED, wait
 from typing import List, Tuple
+from pdf_cache import load_cached_pages, store_cached_pages
+from document import Document, chunk_ranges
+from tracing import span
+
+# Backend de extracción por defecto: "thread" o "process"
+EXTRACTION_BACKEND = os.environ.get("PDF_EXTRACTION_BACKEND", "thread")
+
+# Unidades de trabajo por worker al repartir las páginas por costo: más unidades
+# equilibran mejor la carga, menos reducen el costo de despacho
+UNITS_PER_WORKER = int(os.environ.get("PDF_UNITS_PER_WORKER", 8))
+
+# Estimación inicial del tiempo de decodificación, antes de tener mediciones
+DEFAULT_SECONDS_PER_PAGE = 0.0005
+DEFAULT_SECONDS_PER_BYTE = 2e-6
+
+# Lectores abiertos por cada worker (hilo o proceso), uno por documento
+_worker_state = threading.local()
 
 def get_optimal_workers():
     """Calcula el número óptimo de hilos basado en los núcleos del CPU."""
     cpu_count = os.cpu_count() or 1  # Default 1 si no se detectan núcleos
     # Usamos el mínimo entre: (núcleos * 2) y 32 para evitar sobrecarga
-    return min(cpu_count * 2, 32)  
-
-def extract_pages_range(pdf_path: str, start_page: int, end_page: int) -> Tuple[int, int, str]:
-    """Extrae texto de un rango específico de páginas del PDF."""
-    text = ""
-    try:
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
+    return min(cpu_count * 2, 32)
+
+def get_optimal_processes():
+    """Número de procesos para la extracción: uno por núcleo."""
+    return os.cpu_count() or 1
+
+def _pdf_reader(source) -> "PyPDF2.PdfReader":
+    """
+    Crea un lector de PyPDF2. La biblioteca se importa aquí, solo cuando hay
+    que decodificar un PDF: con el texto en caché no se carga nunca.
+    """
+    import PyPDF2
+    return PyPDF2.PdfReader(source)
+
+def _get_worker_reader(pdf_path: str) -> "PyPDF2.PdfReader":
+    """
+    Devuelve el lector del documento para el worker actual.
+    Cada worker analiza la estructura del PDF una sola vez y reutiliza el lector.
+    """
+    readers = getattr(_worker_state, "readers", None)
+    if readers is None:
+        readers = _worker_state.readers = {}
+
+    key = (os.path.abspath(pdf_path), os.stat(pdf_path).st_mtime_ns)
+    reader = readers.get(key)
+    if reader is None:
+        reader = readers[key] = _pdf_reader(pdf_path)
+    return reader
+
+def extract_pages_text(pdf_path: str, start_page: int, end_page: int) -> Tuple[int, List[str], bool]:
+    """
+    Extrae el texto de cada página de un rango.
+    Devuelve (página_inicial, textos_por_página, ok).
+    """
+    pages = []
+    with span("extract_chunk", "extraction", start_page=start_page, end_page=end_page) as chunk_span:
+        try:
+            reader = _get_worker_reader(pdf_path)
             for page_num in range(start_page, min(end_page, len(reader.pages))):
-                page_text = reader.pages[page_num].extract_text()
-                if page_text:  # Evitar concatenar None
-                    text += page_text + "\n"
-    except Exception as e:
-        print(f"Error procesando páginas {start_page}-{end_page}: {str(e)}")
-        text = ""
-    return (start_page, end_page, text.strip())
-
-def extract_text_in_chunks(pdf_path: str, chunk_size: int = None) -> List[Tuple[int, int, str]]:
-    """Extrae texto del PDF en chunks de forma concurrente, con tamaño de chunk automático."""
-    if not os.path.exists(pdf_path):
-        raise FileNotFoundError(f"El archivo {pdf_path} no existe")
+                pages.append(reader.pages[page_num].extract_text() or "")
+        except Exception as e:
+            print(f"Error procesando páginas {start_page}-{end_page}: {str(e)}")
+            chunk_span.set(error=str(e), pages=0, chars=0)
+            return (start_page, [""] * (end_page - start_page), False)
+        chunk_span.set(pages=len(pages), chars=sum(len(page) for page in pages))
+    return (start_page, pages, True)
 
-    # Configuración dinámica
-    with open(pdf_path, 'rb') as file:
-        total_pages = len(PyPDF2.PdfReader(file).pages)
-    
-    # Tamaño de chunk automático (aprox. 10 páginas por núcleo)
-    if chunk_size is None:
-        cpu_count = os.cpu_count() or 1
-        chunk_size = max(10, total_pages // (cpu_count * 2))
-    
-    # Generar rangos
-    ranges = [
-        (start, min(start + chunk_size, total_pages))
-        for start in range(0, total_pages, chunk_size)
-    ]
-
-    # Configuración de hilos
+def extract_unit(pdf_path: str, start_page: int, end_page: int) -> Tuple[int, List[str], bool, float]:
+    """extract_pages_text más el tiempo de decodificación medido en el worker."""
+    start_time = time.perf_counter()
+    _, pages, ok = extract_pages_text(pdf_path, start_page, end_page)
+    return (start_page, pages, ok, time.perf_counter() - start_time)
+
+def _stream_size(stream) -> int:
+    stream = stream.get_object()
+    # Tamaño del stream tal como está en el archivo (sin descomprimirlo)
+    return len(getattr(stream, "_data", b"") or b"")
+
+def page_costs(reader) -> List[int]:
+    """
+    Bytes de los content streams de cada página, incluidos los de sus Form
+    XObjects (las imágenes no se decodifican al extraer texto). Solo se leen
+    los streams, sin interpretarlos.
+    """
+    costs = []
+    for page in reader.pages:
+        size = 0
+        try:
+            contents = page.get("/Contents")
+            if contents is not None:
+                contents = contents.get_object()
+                streams = contents if isinstance(contents, list) else [contents]
+                size += sum(_stream_size(stream) for stream in streams)
+            resources = page.get("/Resources")
+            xobjects = resources.get_object().get("/XObject") if resources is not None else None
+            if xobjects is not None:
+                for xobject in xobjects.get_object().values():
+                    xobject = xobject.get_object()
+                    if xobject.get("/Subtype") == "/Form":
+                        size += _stream_size(xobject)
+        except Exception:
+            pass  # Página dañada: se estima solo con el costo fijo por página
+        costs.append(size)
+    return costs
+
+class DecodeCostModel:
+    """
+    Tiempo estimado de decodificar un rango de páginas:
+    segundos_por_página * páginas + segundos_por_byte * bytes_de_contenido.
+    Los coeficientes parten de valores por defecto y se ajustan por mínimos
+    cuadrados con los tiempos medidos a medida que terminan las unidades.
+    """
+
+    def __init__(self, costs: List[int]):
+        self.prefix = np.concatenate(([0], np.cumsum(costs, dtype=np.int64)))
+        self.per_page = DEFAULT_SECONDS_PER_PAGE
+        self.per_byte = DEFAULT_SECONDS_PER_BYTE
+        self.samples: List[Tuple[int, int, float]] = []
+
+    @property
+    def total_pages(self) -> int:
+        return len(self.prefix) - 1
+
+    def content_bytes(self, start_page: int, end_page: int) -> int:
+        return int(self.prefix[end_page] - self.prefix[start_page])
+
+    def predict(self, start_page: int, end_page: int) -> float:
+        return self.per_page * (end_page - start_page) + self.per_byte * self.content_bytes(start_page, end_page)
+
+    def observe(self, start_page: int, end_page: int, seconds: float):
+        """Registra el tiempo medido de una unidad y recalcula los coeficientes."""
+        self.samples.append((end_page - start_page, self.content_bytes(start_page, end_page), seconds))
+        pages, sizes, times = (np.array(column, dtype=np.float64) for column in zip(*self.samples))
+        if len(self.samples) >= 2:
+            (per_page, per_byte), *_ = np.linalg.lstsq(np.column_stack((pages, sizes)), times, rcond=None)
+            if per_page < 0 and sizes.any():
+                # Coeficientes no negativos: el costo es solo por byte
+                per_page, per_byte = 0.0, (sizes @ times) / (sizes @ sizes)
+            elif per_byte < 0:
+                per_page, per_byte = times.sum() / pages.sum(), 0.0
+            if per_page > 0 or per_byte > 0:
+                self.per_page, self.per_byte = float(per_page), float(per_byte)
+                return
+        # Una sola medición: escalar la estimación actual
+        predicted = self.per_page * pages.sum() + self.per_byte * sizes.sum()
+        if predicted > 0:
+            scale = times.sum() / predicted
+            self.per_page *= scale
+            self.per_byte *= scale
+
+    def partition(self, workers: int, units_per_worker: int = None) -> List[Tuple[int, int]]:
+        """
+        Rangos consecutivos de costo estimado parecido, unos units_per_worker
+        por worker; una página muy costosa queda sola en su unidad.
+        """
+        units_per_worker = units_per_worker or UNITS_PER_WORKER
+        total = self.total_pages
+        if total == 0:
+            return []
+        units = max(1, workers * units_per_worker)
+        target = self.predict(0, total) / units
+
+        ranges = []
+        start = 0
+        for end in range(1, total + 1):
+            # El rango también se cierra antes de una página que por sí sola
+            # supera el objetivo, para que esa página quede sola
+            heavy_next = end < total and self.predict(end, end + 1) >= target
+            if end == total or heavy_next or self.predict(start, end) >= target:
+                ranges.append((start, end))
+                start = end
+                if end < total:
+                    # Lo que falta se reparte entre las unidades restantes
+                    target = self.predict(end, total) / max(1, units - len(ranges))
+        return ranges
+
+def _extract_dynamic(executor, workers: int, pdf_path: str, ranges: List[Tuple[int, int]],
+                     model: DecodeCostModel) -> List[Tuple[List[str], bool]]:
+    """
+    Reparte las unidades a medida que los workers quedan libres, las más
+    costosas (según el modelo) primero, y devuelve los resultados en orden de
+    página. Solo hay workers unidades enviadas a la vez, así que ninguna queda
+    asignada de antemano a un worker ocupado.
+    """
+    pending = sorted(range(len(ranges)), key=lambda i: model.predict(*ranges[i]), reverse=True)
+    results: List[Tuple[List[str], bool]] = [None] * len(ranges)
+    running = {}
+    while pending or running:
+        while pending and len(running) < workers:
+            i = pending.pop(0)
+            running[executor.submit(extract_unit, pdf_path, *ranges[i])] = i
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            i = running.pop(future)
+            start, end = ranges[i]
+            try:
+                _, chunk_pages, ok, seconds = future.result()
+                model.observe(start, end, seconds)
+            except BrokenExecutor:
+                raise  # El pool entero falló: extract_all_pages recurre a hilos
+            except Exception as e:
+                # El span del chunk ya registró el error dentro del worker
+                print(f"Error en chunk: {str(e)}")
+                chunk_pages, ok = [""] * (end - start), False
+            results[i] = (chunk_pages, ok)
+        # Con los tiempos medidos, reordenar lo que falta por costo estimado
+        pending.sort(key=lambda i: model.predict(*ranges[i]), reverse=True)
+    return results
+
+def _extract_with_threads(pdf_path: str, ranges: List[Tuple[int, int]],
+                          model: DecodeCostModel) -> List[Tuple[List[str], bool]]:
+    """Extrae los rangos con un pool de hilos (limitado por el GIL)."""
     max_workers = get_optimal_workers()
-    print(f"\nProcesando {total_pages} páginas en {len(ranges)} chunks")
     print(f"Hilos activos: {max_workers} (basado en {os.cpu_count()} núcleos)")
 
-    # Procesamiento paralelo
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [
-            executor.submit(extract_pages_range, pdf_path, start, end)
-            for start, end in ranges
-        ]
-        
-        results = []
-        for future in futures:
+        return _extract_dynamic(executor, max_workers, pdf_path, ranges, model)
+
+def _extract_serially(pdf_path: str, ranges: List[Tuple[int, int]]) -> List[Tuple[List[str], bool]]:
+    """
+    Extrae los rangos en el hilo actual con un solo lector, sin crear otro pool.
+    Es lo que usa cada tarea del planificador de búsquedas en múltiples PDFs.
+    """
+    reader = _pdf_reader(pdf_path)
+    results = []
+    for start, end in ranges:
+        with span("extract_chunk", "extraction", start_page=start, end_page=end) as chunk_span:
             try:
-                results.append(future.result())
+                chunk_pages = [
+                    reader.pages[page_num].extract_text() or ""
+                    for page_num in range(start, min(end, len(reader.pages)))
+                ]
+                results.append((chunk_pages, True))
+                chunk_span.set(pages=len(chunk_pages), chars=sum(len(page) for page in chunk_pages))
             except Exception as e:
-                print(f"Error en chunk: {str(e)}")
-                continue
-        
-        return results
\ No newline at end of file
+                print(f"Error procesando páginas {start}-{end}: {str(e)}")
+                results.append(([""] * (end - start), False))
+                chunk_span.set(error=str(e), pages=0, chars=0)
+    return results
+
+def _extract_with_processes(pdf_path: str, ranges: List[Tuple[int, int]],
+                            model: DecodeCostModel) -> List[Tuple[List[str], bool]]:
+    """
+    Extrae los rangos con un pool de procesos. Cada proceso abre el PDF una
+    vez y va tomando unidades a medida que queda libre.
+    """
+    max_workers = min(get_optimal_processes(), len(ranges)) or 1
+    print(f"Procesos activos: {max_workers} (basado en {os.cpu_count()} núcleos)")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return _extract_dynamic(executor, max_workers, pdf_path, ranges, model)
+
+def extract_all_pages(pdf_path: str, chunk_size: int = None, use_cache: bool = True,
+                      backend: str = None) -> List[str]:
+    """
+    Devuelve el texto de todas las páginas del PDF.
+    Si existe una entrada válida en la caché se evita volver a decodificar el PDF.
+    backend selecciona "thread" (por defecto), "process" o "serial" (en el hilo
+    actual, sin pool) para la extracción.
+    """
+    backend = backend or EXTRACTION_BACKEND
+    if backend not in ("thread", "process", "serial"):
+        raise ValueError(f"Backend de extracción desconocido: {backend}")
+
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"El archivo {pdf_path} no existe")
+
+    if use_cache:
+        cached = load_cached_pages(pdf_path)
+        if cached is not None:
+            print(f"\nTexto cargado desde caché: {len(cached)} páginas")
+            return cached
+
+    # Configuración dinámica (solo se recorre el árbol de páginas y se miden los
+    # content streams, sin extraer texto)
+    with open(pdf_path, 'rb') as file:
+        reader = _pdf_reader(file)
+        if backend == "serial":
+            ranges = chunk_ranges(len(reader.pages), chunk_size)
+        else:
+            model = DecodeCostModel(page_costs(reader))
+            workers = get_optimal_processes() if backend == "process" else get_optimal_workers()
+            # Con chunk_size explícito se respeta el tamaño fijo de los rangos
+            ranges = chunk_ranges(model.total_pages, chunk_size) if chunk_size else model.partition(workers)
+    print(f"\nProcesando {sum(end - start for start, end in ranges)} páginas en {len(ranges)} chunks")
+
+    # Procesamiento paralelo
+    if backend == "process":
+        try:
+            results = _extract_with_processes(pdf_path, ranges, model)
+        except Exception as e:
+            print(f"Error en el pool de procesos, se usan hilos: {str(e)}")
+            results = _extract_with_threads(pdf_path, ranges, model)
+    elif backend == "serial":
+        results = _extract_serially(pdf_path, ranges)
+    else:
+        results = _extract_with_threads(pdf_path, ranges, model)
+
+    pages = []
+    complete = True
+    for chunk_pages, ok in results:
+        pages.extend(chunk_pages)
+        complete = complete and ok
+
+    # Solo se guarda en caché una extracción sin errores
+    if use_cache and complete:
+        store_cached_pages(pdf_path, pages)
+    return pages
+
+def extract_document(pdf_path: str, chunk_size: int = None, use_cache: bool = True,
+                     backend: str = None) -> Document:
+    """Extrae el PDF como un Document con el texto completo y la tabla de páginas."""
+    with span("extract_document", "extraction", file=os.path.basename(pdf_path),
+              backend=backend or EXTRACTION_BACKEND, bytes=os.path.getsize(pdf_path)) as document_span:
+        pages = extract_all_pages(pdf_path, chunk_size, use_cache, backend)
+        document = Document.from_pages(pages, source=pdf_path, chunk_size=chunk_size)
+        document_span.set(pages=len(pages), chars=len(document))
+    return document
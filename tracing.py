@@ -0,0 +1,190 @@
+"""
+Trazas por etapa (extracción de cada chunk, búsqueda, mapa de calor y
+reportes) exportables en formato Chrome trace-event JSON, y perfiles de
+cProfile por opción del menú.
+
+Se activan por entorno:
+    PDF_TRACE=traza.json    guarda la traza al terminar el programa
+                            (abrir con chrome://tracing o https://ui.perfetto.dev)
+    PDF_PROFILE=perfiles/   guarda un .prof por cada opción del menú ejecutada
+
+Sin PDF_TRACE los spans no registran nada y su costo es mínimo.
+"""
+import atexit
+import glob
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator
+
+TRACE_FILE = os.environ.get("PDF_TRACE")
+PROFILE_DIR = os.environ.get("PDF_PROFILE")
+
+# Proceso que exporta la traza; los workers de los pools de procesos heredan
+# la variable y escriben sus spans en archivos parciales junto a la traza
+_TRACE_PID_VARIABLE = "PDF_TRACE_PID"
+
+def _now_us() -> float:
+    # perf_counter usa un reloj monótono del sistema: comparable entre procesos en Linux
+    return time.perf_counter_ns() / 1000
+
+class Span:
+    """Un intervalo de la traza; set() agrega datos (páginas, bytes, errores...)."""
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name: str, category: str, args: Dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = _now_us()
+
+    def set(self, **args):
+        self.args.update(args)
+
+class _NullSpan:
+    """Span de una traza desactivada: no guarda nada."""
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Tracer:
+    """
+    Colector de spans compartido por todos los hilos del proceso.
+    Cada span guarda el worker que lo ejecutó (proceso e hilo) y, si falla,
+    el error; la excepción se vuelve a lanzar.
+    """
+
+    def __init__(self, trace_file: str = None):
+        self.trace_file = trace_file
+        self.enabled = trace_file is not None
+        self.events: List[Dict[str, Any]] = []
+        self.thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.environ.setdefault(_TRACE_PID_VARIABLE, str(os.getpid()))
+            if not self._is_worker_process():
+                # Parciales de una ejecución anterior que no llegó a exportar
+                for path in glob.glob(f"{glob.escape(trace_file)}.*.part"):
+                    os.remove(path)
+
+    def _is_worker_process(self) -> bool:
+        return os.environ.get(_TRACE_PID_VARIABLE) != str(os.getpid())
+
+    @contextmanager
+    def span(self, name: str, category: str = "", **args) -> Iterator[Span]:
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+        span = Span(name, category, args)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self.finish(span)
+
+    def finish(self, span: Span):
+        """Cierra un span creado con begin() (los de span() se cierran solos)."""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        tid = threading.get_native_id()
+        pid = os.getpid()
+        span.args.setdefault("worker", f"{pid}/{thread.name}")
+        event = {
+            "name": span.name, "cat": span.category, "ph": "X",
+            "ts": span.start, "dur": _now_us() - span.start,
+            "pid": pid, "tid": tid, "args": span.args,
+        }
+        with self._lock:
+            self.thread_names[tid] = thread.name
+            if self._is_worker_process():
+                self._write_partial(event, thread.name)
+            else:
+                self.events.append(event)
+
+    def begin(self, name: str, category: str = "", **args):
+        """Span que se cierra explícitamente con finish(); sin traza devuelve un span nulo."""
+        return Span(name, category, args) if self.enabled else _NULL_SPAN
+
+    def _write_partial(self, event: Dict[str, Any], thread_name: str):
+        # Los workers de procesos no ejecutan atexit: cada span se escribe al cerrarse
+        with open(f"{self.trace_file}.{os.getpid()}.part", "a", encoding="utf-8") as file:
+            file.write(json.dumps({"event": event, "thread": thread_name}, default=str) + "\n")
+
+    def _collect_partials(self) -> List[Dict[str, Any]]:
+        events = []
+        for path in glob.glob(f"{glob.escape(self.trace_file)}.*.part"):
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    record = json.loads(line)
+                    events.append(record["event"])
+                    self.thread_names[record["event"]["tid"]] = record["thread"]
+            os.remove(path)
+        return events
+
+    def export(self, output_file: str = None) -> str:
+        """Escribe la traza (incluida la de los workers de procesos) como Chrome trace-event JSON."""
+        output_file = output_file or self.trace_file
+        with self._lock:
+            self.events.extend(self._collect_partials())
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+
+        tids = {(event["pid"], event["tid"]) for event in events}
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+             "args": {"name": thread_names.get(tid, str(tid))}}
+            for pid, tid in sorted(tids)
+        ]
+        with open(output_file, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, file, default=str)
+        return output_file
+
+TRACER = Tracer(TRACE_FILE)
+span = TRACER.span
+
+def _export_at_exit():
+    if TRACER.events or glob.glob(f"{glob.escape(TRACER.trace_file)}.*.part"):
+        print(f"Traza guardada: {os.path.abspath(TRACER.export())}")
+
+if TRACER.enabled and not TRACER._is_worker_process():
+    atexit.register(_export_at_exit)
+
+@contextmanager
+def traced_action(name: str) -> Iterator[Span]:
+    """
+    Span de una opción del menú y, si PDF_PROFILE está definido, perfil de
+    cProfile de toda la opción (archivo .prof y resumen por consola).
+    """
+    if not PROFILE_DIR:
+        with span(name, "action") as action_span:
+            yield action_span
+        return
+
+    # Solo se cargan si se pidieron perfiles
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    with span(name, "action") as action_span:
+        profiler.enable()
+        try:
+            yield action_span
+        finally:
+            profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profile_file = os.path.join(PROFILE_DIR, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.prof")
+            profiler.dump_stats(profile_file)
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(15)
+            print(summary.getvalue())
+            print(f"Perfil guardado: {os.path.abspath(profile_file)}")
+            action_span.set(profile=profile_file)
@@ -29,11 +29,15 @@ def get_multiple_pdf_paths():
 def get_user_choice():
     print("\nOpciones disponibles:")
     print("1. Buscar frase exacta (un PDF)")
-    print("2. Buscar frases aproximadas (hasta 3 palabras intermedias)")
+    print("2. Buscar frases aproximadas (palabras intermedias configurables)")
     print("3. Generar mapa de calor de palabras frecuentes")
     print("4. Buscar frase aproximada en múltiples PDFs")
-    print("5. Salir")
-    return input("Seleccione una opción (1-5): ").strip()
+    print("5. Buscar varias frases exactas (un PDF)")
+    print("6. Buscar varias frases exactas en múltiples PDFs")
+    print("7. Buscar frase tolerante a errores (OCR, palabras cortadas)")
+    print("8. Mejores resultados de una frase en múltiples PDFs (ranking)")
+    print("9. Salir")
+    return input("Seleccione una opción (1-9): ").strip()
 
 def get_multiple_phrases():
     print("\nIngrese las frases que desea buscar (una por línea). Vacío para terminar):")
@@ -51,5 +55,25 @@ def get_multiple_phrases():
 def get_search_phrase(prompt):
     return input(prompt).strip()
 
+def get_max_intermediate(default):
+    """Pregunta cuántas palabras intermedias se permiten entre términos (Enter = valor por defecto)"""
+    while True:
+        value = input(f"Máximo de palabras intermedias entre términos [{default}]: ").strip()
+        if not value:
+            return default
+        if value.isdigit() and int(value) >= 1:
+            return int(value)
+        print("Ingrese un número entero mayor o igual a 1")
+
+def get_max_distance():
+    """Pregunta cuántas ediciones se permiten por palabra (Enter = según el largo de la palabra)"""
+    while True:
+        value = input("Máximo de ediciones por palabra [automático]: ").strip()
+        if not value:
+            return None
+        if value.isdigit():
+            return int(value)
+        print("Ingrese un número entero mayor o igual a 0")
+
 def get_pdf_path():
     return "/home/hertz676/Documentos/Analisis 2do parcial/Dracula.pdf".strip()
\ No newline at end of file